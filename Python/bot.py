@@ -4,6 +4,7 @@ Ce fichier expose la classe Bot et permet de démarrer le client.
 from dotenv import load_dotenv
 import os
 import asyncio
+import time
 
 load_dotenv()
 
@@ -11,6 +12,7 @@ from discord import Intents, app_commands
 from logger import Logger, command_invocation
 from verification import VerificationManager
 from telegram_bridge import get_bridge
+from command_stats import get_command_stats
 import importlib.util
 import pathlib
 import sys
@@ -33,9 +35,12 @@ class Bot:
         # lazy import to avoid heavy imports at module load
         import discord
         self.client = discord.Client(intents=intents)
-        self.logger = Logger()
+        # pont Telegram unique du processus, partagé par Logger, vérification et slash-commands
         self.telegram = get_bridge()
+        self.logger = Logger(telegram_bridge=self.telegram)
         self.verification = VerificationManager(self.client, self.logger, self.telegram)
+        # compteurs d'usage des commandes (résumé périodique, /stats)
+        self.command_stats = get_command_stats()
         # containers for commands
         self.prefix_commands = {}
         self.slash_commands = {}
@@ -64,10 +69,17 @@ class Bot:
                 for name, mod in self.slash_commands.items():
                     # build a wrapper command that calls the module's execute
                     async def _wrap(interaction, *, _mod=mod):
+                        started = time.perf_counter()
+                        error = False
                         try:
-                            await _mod.execute(interaction)
+                            await _mod.execute(interaction, telegram=self.telegram, stats=self.command_stats,
+                                              verification=self.verification, roles=self.verification.roles,
+                                              retry=self.verification.retry)
                         except Exception as e:
+                            error = True
                             self.logger.error(f'Erreur slash {getattr(_mod, "name", name)}: {e}')
+                        self._command_done('/' + getattr(_mod, 'name', name), interaction.user, interaction.guild,
+                                           interaction.channel, started, error)
                     cmd = app_commands.Command(name=getattr(mod, 'name', name), description=getattr(mod, 'description', '') or 'Slash command', callback=_wrap)
                     try:
                         self.client.tree.add_command(cmd)
@@ -90,6 +102,9 @@ class Bot:
         async def on_message(message):
             if message.author.bot:
                 return
+            # réponse attendue par une vérification (DM, fil de modération)
+            if self.verification.route_message(message):
+                return
             prefix = os.getenv('PREFIX', '!')
             if not message.content or not message.content.startswith(prefix):
                 return
@@ -99,22 +114,28 @@ class Bot:
             cmd = parts[0].lower()
             args = parts[1:]
             command = self.prefix_commands.get(cmd)
-            try:
-                command_invocation({
-                    'command': cmd,
-                    'userTag': message.author.tag,
-                    'userId': message.author.id,
-                    'guildId': message.guild.id if message.guild else None,
-                    'channelId': message.channel.id,
-                    'args': args
-                })
-            except Exception:
-                pass
+            # détail par invocation: flux debug échantillonné (COMMAND_LOG_SAMPLE_RATE)
+            if self.command_stats.sampled():
+                try:
+                    command_invocation({
+                        'command': cmd,
+                        'userTag': str(message.author),
+                        'userId': message.author.id,
+                        'guildId': message.guild.id if message.guild else None,
+                        'channelId': message.channel.id,
+                        'args': args
+                    })
+                except Exception:
+                    pass
             if not command:
+                self.command_stats.record(cmd, known=False)
                 return
+            started = time.perf_counter()
             try:
                 await command.execute(message, args)
+                self._command_done(cmd, message.author, message.guild, message.channel, started)
             except Exception as e:
+                self._command_done(cmd, message.author, message.guild, message.channel, started, error=True)
                 self.logger.error(f'Erreur lors de l\'exécution de la commande {cmd}: {e}')
                 try:
                     await message.reply('Une erreur est survenue lors de l\'exécution de la commande.')
@@ -123,7 +144,22 @@ class Bot:
 
         # interactionCreate for chat input commands is handled by added app_commands callbacks
 
-        self.client.run(self.token)
+        try:
+            self.client.run(self.token)
+        finally:
+            # dernier résumé d'usage puis vidage du writer de logs: tous deux
+            # transmettent encore des lignes au pont
+            self.command_stats.close()
+            self.logger.flush()
+            self.telegram.close()
+
+    def _command_done(self, cmd, user, guild, channel, started, error=False):
+        latency = (time.perf_counter() - started) * 1000
+        user_id, guild_id = getattr(user, 'id', None), getattr(guild, 'id', None)
+        self.command_stats.record(cmd, user_id=user_id, guild_id=guild_id, latency_ms=latency, error=error)
+        self.logger.event('Commande %s terminée en %.0fms', cmd, latency,
+                          event='command_done', command=cmd, userId=user_id, guildId=guild_id,
+                          channelId=getattr(channel, 'id', None), latency=round(latency, 1))
 
     def _load_prefix_commands(self):
         if not self.commands_dir.exists():
@@ -0,0 +1,281 @@
+"""Agrégation en mémoire de l'usage des commandes (préfixe et slash).
+
+Remplace le bloc de log de 6 lignes écrit à chaque message préfixé:
+- compteurs par commande, serveur et utilisateur + histogramme de latence
+  (buckets logarithmiques, ~5% d'erreur sur les quantiles)
+- instantané périodique (`COMMAND_STATS_SNAPSHOT_SEC`) vers
+  `data/command-stats.json` et un seul résumé compact vers Telegram
+- le détail par invocation devient un flux debug échantillonné
+  (`COMMAND_LOG_SAMPLE_RATE`, 0 = jamais, 1 = toujours)
+
+Les chiffres en direct sont affichés par `/stats`.
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+STATS_FILE = BASE_DIR / 'data' / 'command-stats.json'
+
+
+class LatencySketch:
+    """Histogramme de latences (ms) à buckets géométriques: mémoire bornée, quantiles approchés."""
+
+    GAMMA = 1.1
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        idx = 0 if ms <= 1 else int(math.ceil(math.log(ms) / math.log(self.GAMMA)))
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen > rank:
+                return min(self.max, self.GAMMA ** idx) if idx else 1.0
+        return self.max
+
+    def merge(self, other: 'LatencySketch'):
+        for idx, n in other.buckets.items():
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'total': round(self.total, 3), 'max': round(self.max, 3),
+                'buckets': {str(k): v for k, v in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LatencySketch':
+        s = cls()
+        s.count = int(data.get('count', 0))
+        s.total = float(data.get('total', 0))
+        s.max = float(data.get('max', 0))
+        s.buckets = {int(k): int(v) for k, v in (data.get('buckets') or {}).items()}
+        return s
+
+
+class _Window:
+    """Compteurs d'une période (entre deux instantanés) ou cumulés."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.started = time.time()
+        self.commands = {}
+        self.guilds = {}
+        self.users = {}
+        self.unknown = 0
+        self.errors = 0
+
+    def _bump(self, table: dict, key):
+        key = str(key)
+        if key in table or len(table) < self.max_keys:
+            table[key] = table.get(key, 0) + 1
+        else:
+            table['other'] = table.get('other', 0) + 1
+
+    def record(self, command, user_id, guild_id, latency_ms, known, error):
+        if not known:
+            # noms inconnus: saisis librement, on ne garde que le total
+            self.unknown += 1
+            return
+        entry = self.commands.get(command)
+        if entry is None:
+            entry = self.commands[command] = {'count': 0, 'errors': 0, 'latency': LatencySketch()}
+        entry['count'] += 1
+        if error:
+            entry['errors'] += 1
+            self.errors += 1
+        if latency_ms is not None:
+            entry['latency'].add(latency_ms)
+        if guild_id is not None:
+            self._bump(self.guilds, guild_id)
+        if user_id is not None:
+            self._bump(self.users, user_id)
+
+    def merge(self, other: '_Window'):
+        for name, e in other.commands.items():
+            mine = self.commands.setdefault(name, {'count': 0, 'errors': 0, 'latency': LatencySketch()})
+            mine['count'] += e['count']
+            mine['errors'] += e['errors']
+            mine['latency'].merge(e['latency'])
+        for table, theirs in ((self.guilds, other.guilds), (self.users, other.users)):
+            for key, n in theirs.items():
+                table[key] = table.get(key, 0) + n
+            if len(table) > self.max_keys:
+                keep = sorted(table.items(), key=lambda kv: kv[1], reverse=True)
+                table.clear()
+                table.update(keep[:self.max_keys])
+                table['other'] = table.get('other', 0) + sum(n for _, n in keep[self.max_keys:])
+        self.unknown += other.unknown
+        self.errors += other.errors
+
+    def to_dict(self) -> dict:
+        return {
+            'since': datetime.utcfromtimestamp(self.started).isoformat(),
+            'unknown': self.unknown, 'errors': self.errors,
+            'commands': {k: {'count': e['count'], 'errors': e['errors'], 'latency': e['latency'].to_dict()}
+                         for k, e in self.commands.items()},
+            'guilds': dict(self.guilds), 'users': dict(self.users),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, max_keys: int) -> '_Window':
+        w = cls(max_keys)
+        try:
+            w.started = (datetime.fromisoformat(data['since']) - datetime(1970, 1, 1)).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            pass
+        w.unknown = int(data.get('unknown', 0))
+        w.errors = int(data.get('errors', 0))
+        for k, e in (data.get('commands') or {}).items():
+            w.commands[k] = {'count': int(e.get('count', 0)), 'errors': int(e.get('errors', 0)),
+                             'latency': LatencySketch.from_dict(e.get('latency') or {})}
+        w.guilds = {str(k): int(v) for k, v in (data.get('guilds') or {}).items()}
+        w.users = {str(k): int(v) for k, v in (data.get('users') or {}).items()}
+        return w
+
+
+def _top(table: dict, n: int):
+    return sorted(((k, v) for k, v in table.items() if k != 'other'), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+class CommandStats:
+    """Agrégateur thread-safe: `record` est O(1), l'écriture disque est périodique."""
+
+    def __init__(self, path=None, interval: float = None, sample_rate: float = None,
+                 max_keys: int = None, telegram_bridge=None):
+        self.path = Path(path) if path else STATS_FILE
+        self.interval = float(interval if interval is not None else os.getenv('COMMAND_STATS_SNAPSHOT_SEC', '3600'))
+        self.sample_rate = float(sample_rate if sample_rate is not None else os.getenv('COMMAND_LOG_SAMPLE_RATE', '0'))
+        self.max_keys = int(max_keys or os.getenv('COMMAND_STATS_MAX_KEYS', '5000'))
+        self.telegram = telegram_bridge
+        self._lock = threading.Lock()
+        self._window = _Window(self.max_keys)
+        self._total = self._load()
+        self._stop = threading.Event()
+        self._thread = None
+        self.snapshots = 0
+
+    def _load(self) -> _Window:
+        try:
+            with open(self.path, encoding='utf8') as fh:
+                return _Window.from_dict(json.load(fh).get('total') or {}, self.max_keys)
+        except (OSError, ValueError, AttributeError):
+            return _Window(self.max_keys)
+
+    def record(self, command: str, user_id=None, guild_id=None, latency_ms: float = None,
+               known: bool = True, error: bool = False):
+        with self._lock:
+            self._window.record(command, user_id, guild_id, latency_ms, known, error)
+
+    def sampled(self) -> bool:
+        """True si cette invocation doit aussi être journalisée en détail (debug)."""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def live(self) -> dict:
+        """Période courante et cumul (cumul = instantanés précédents + période courante)."""
+        with self._lock:
+            total = _Window.from_dict(self._total.to_dict(), self.max_keys)
+            total.merge(self._window)
+            return {'window': self._window.to_dict(), 'total': total.to_dict()}
+
+    def summary(self, data: dict = None, top: int = 5) -> str:
+        """Résumé texte compact d'une période (dict de `_Window.to_dict`)."""
+        data = data or self.live()['window']
+        cmds = data['commands']
+        count = sum(e['count'] for e in cmds.values())
+        lines = [f"📊 Commandes depuis {data['since'][:16].replace('T', ' ')} UTC: {count} "
+                 f"(+{data['unknown']} inconnues, {data['errors']} erreurs)"]
+        for name, e in sorted(cmds.items(), key=lambda kv: kv[1]['count'], reverse=True)[:top]:
+            sk = LatencySketch.from_dict(e['latency'])
+            lat = f' — p50 {sk.quantile(0.5):.0f}ms p95 {sk.quantile(0.95):.0f}ms' if sk.count else ''
+            err = f", {e['errors']} err" if e['errors'] else ''
+            lines.append(f"• {name}: {e['count']}{err}{lat}")
+        if data['guilds']:
+            lines.append('Serveurs: ' + ', '.join(f'{k}×{v}' for k, v in _top(data['guilds'], top)))
+        if data['users']:
+            lines.append('Utilisateurs: ' + ', '.join(f'{k}×{v}' for k, v in _top(data['users'], top)))
+        return '\n'.join(lines)
+
+    def snapshot(self, to_telegram: bool = True) -> dict:
+        """Clôt la période: cumul sur disque (écriture atomique) + résumé Telegram."""
+        with self._lock:
+            window, self._window = self._window, _Window(self.max_keys)
+            self._total.merge(window)
+            data = {'window': window.to_dict(), 'total': self._total.to_dict()}
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, 'w', encoding='utf8') as fh:
+                json.dump(data, fh, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+        self.snapshots += 1
+        active = data['window']['commands'] or data['window']['unknown']
+        if to_telegram and active and os.getenv('TELEGRAM_ENABLED', '').lower() == 'true':
+            try:
+                if self.telegram is None:
+                    from telegram_bridge import get_bridge
+                    self.telegram = get_bridge()
+                self.telegram.enqueue_log(self.summary(data['window']))
+            except Exception:
+                pass
+        return data
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'CommandStats':
+        if not self.running and self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='command-stats', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        """Arrête le thread et écrit un dernier instantané."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.snapshot()
+
+
+_singleton = None
+_singleton_lock = threading.Lock()
+
+
+def get_command_stats() -> CommandStats:
+    """Retourne l'agrégateur du processus, créé et démarré une seule fois."""
+    global _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = CommandStats().start()
+        return _singleton
+
+
+__all__ = ['CommandStats', 'LatencySketch', 'get_command_stats']
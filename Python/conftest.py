@@ -0,0 +1,22 @@
+"""Fixtures partagées des tests: isole les fichiers de données et de logs."""
+import pytest
+
+import logger
+import telegram_bridge
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """Redirige logs/, la file Telegram et le pont du processus vers `tmp_path`."""
+    monkeypatch.setattr(logger, 'LOG_DIR', tmp_path / 'logs')
+    (tmp_path / 'logs').mkdir()
+    monkeypatch.setattr(telegram_bridge, 'QUEUE_FILE', tmp_path / 'telegram-queue.json')
+    monkeypatch.setattr(telegram_bridge, 'JOURNAL_DIR', tmp_path / 'telegram-journal')
+    monkeypatch.setattr(telegram_bridge, 'OVERFLOW_FILE', tmp_path / 'telegram-overflow.jsonl.gz')
+    monkeypatch.setattr(telegram_bridge, '_singleton', None)
+    yield tmp_path
+    if logger._writer is not None:
+        logger._writer.flush()
+    bridge = telegram_bridge._singleton
+    if bridge is not None:
+        bridge.close(drain=False)
@@ -0,0 +1,185 @@
+"""Routage des réponses attendues par les vérifications, sans `client.wait_for`.
+
+Chaque `client.wait_for('message', check=...)` ajoute un écouteur que
+discord.py évalue sur *chaque* message reçu: avec des centaines de DM de
+vérification ouverts, chaque message coûte des centaines d'appels Python.
+
+`ConversationRouter` indexe les conversations ouvertes par
+`(author_id, channel_id)`: un message est remis en O(1) à au plus une
+conversation (la plus récente pour cette clé), via sa file asyncio. Les
+délais d'attente sont portés par une `TimerWheel` partagée (une seule tâche
+asyncio pour toutes les conversations) plutôt qu'un `wait_for` par attente.
+
+    with router.open(member.id, dm.id) as conv:
+        message = await conv.next(timeout=600)   # asyncio.TimeoutError à l'échéance
+"""
+import asyncio
+import math
+import time
+
+
+class _Timer:
+    __slots__ = ('due', 'callback')
+
+    def __init__(self, due, callback):
+        self.due = due
+        self.callback = callback
+
+
+class TimerWheel:
+    """Échéances regroupées par tick (`tick` secondes): planifier/annuler en O(1).
+
+    Une tâche asyncio unique avance la roue tant qu'il reste des minuteries;
+    `advance(now)` peut aussi être appelé directement (tests, benchmark).
+    """
+
+    def __init__(self, tick: float = 1.0, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self._buckets = {}
+        self._current = int(clock() // tick)
+        self._count = 0
+        self._task = None
+        self.fired = 0
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, delay: float, callback) -> _Timer:
+        due = max(int(math.ceil((self.clock() + delay) / self.tick)), self._current + 1)
+        timer = _Timer(due, callback)
+        self._buckets.setdefault(due, set()).add(timer)
+        self._count += 1
+        self._ensure_running()
+        return timer
+
+    def cancel(self, timer: _Timer):
+        bucket = self._buckets.get(timer.due)
+        if bucket is not None and timer in bucket:
+            bucket.discard(timer)
+            self._count -= 1
+            if not bucket:
+                del self._buckets[timer.due]
+
+    def advance(self, now: float = None) -> int:
+        """Déclenche les minuteries échues à `now`; retourne leur nombre."""
+        now_tick = int((self.clock() if now is None else now) // self.tick)
+        if now_tick - self._current > len(self._buckets):
+            # longue pause: parcourir les buckets existants plutôt que chaque tick
+            dues = sorted(d for d in self._buckets if d <= now_tick)
+        else:
+            dues = range(self._current + 1, now_tick + 1)
+        fired = 0
+        for due in dues:
+            for timer in self._buckets.pop(due, ()):
+                self._count -= 1
+                fired += 1
+                try:
+                    timer.callback()
+                except Exception:
+                    pass
+        self._current = max(self._current, now_tick)
+        self.fired += fired
+        return fired
+
+    async def _run(self):
+        try:
+            while self._count:
+                await asyncio.sleep(self.tick)
+                self.advance()
+        finally:
+            self._task = None
+
+    def _ensure_running(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # hors boucle: avance manuelle
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+
+class _Expired:
+    __slots__ = ('generation',)
+
+    def __init__(self, generation):
+        self.generation = generation
+
+
+class Conversation:
+    """Conversation ouverte: les messages routés s'accumulent dans `queue`."""
+
+    def __init__(self, router: 'ConversationRouter', key):
+        self.router = router
+        self.key = key
+        self.queue = asyncio.Queue()
+        self._generation = 0
+
+    async def next(self, timeout: float):
+        """Prochain message de la conversation; `asyncio.TimeoutError` après `timeout` secondes."""
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if not isinstance(item, _Expired):
+                return item
+        self._generation += 1
+        generation = self._generation
+        timer = self.router.wheel.schedule(timeout, lambda: self.queue.put_nowait(_Expired(generation)))
+        try:
+            while True:
+                item = await self.queue.get()
+                if not isinstance(item, _Expired):
+                    return item
+                if item.generation == generation:
+                    raise asyncio.TimeoutError()
+        finally:
+            self.router.wheel.cancel(timer)
+
+    def close(self):
+        self.router.close(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConversationRouter:
+    """Conversations ouvertes indexées par (author_id, channel_id)."""
+
+    def __init__(self, wheel: TimerWheel = None):
+        self.wheel = wheel or TimerWheel()
+        self._sessions = {}
+        self.routed = 0
+
+    def __len__(self):
+        return sum(len(stack) for stack in self._sessions.values())
+
+    def open(self, author_id, channel_id) -> Conversation:
+        key = (author_id, channel_id)
+        conv = Conversation(self, key)
+        self._sessions.setdefault(key, []).append(conv)
+        return conv
+
+    def close(self, conv: Conversation):
+        stack = self._sessions.get(conv.key)
+        if stack and conv in stack:
+            stack.remove(conv)
+            if not stack:
+                del self._sessions[conv.key]
+
+    def dispatch(self, message) -> bool:
+        """Remet `message` à la conversation attendant cet auteur dans ce salon; False sinon."""
+        try:
+            key = (message.author.id, message.channel.id)
+        except AttributeError:
+            return False
+        stack = self._sessions.get(key)
+        if not stack:
+            return False
+        stack[-1].queue.put_nowait(message)
+        self.routed += 1
+        return True
+
+
+__all__ = ['ConversationRouter', 'Conversation', 'TimerWheel']
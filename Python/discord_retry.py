@@ -0,0 +1,235 @@
+"""Appels REST Discord avec budget partagé par route et reprises sur erreur.
+
+Remplace la détection par texte (`'429' in str(e)`) et les délais fixes de
+`try_role_operation`:
+
+- `classify` lit `HTTPException.status`, `retry_after` et les en-têtes
+  `X-RateLimit-*` (`Retry-After`, `Reset-After`, `Bucket`, `Global`) de la
+  réponse; les erreurs réseau (timeouts, connexions) sont reconnues par type.
+- `RoutePacer` garde un token bucket par route (`roles`, `dm`, `forum`,
+  `messages`, `threads`) partagé par toutes les vérifications en cours: un 429
+  bloque la route pour tous jusqu'au `retry_after` du serveur (un 429 global
+  bloque toutes les routes) au lieu que chacun relance dans le même 429.
+- `RetryEngine.call` attend son jeton, reprend les 429/5xx/erreurs réseau
+  (délai exponentiel avec jitter pour les 5xx et le réseau) et compte tout
+  par route (`stats()`, affiché par /stats).
+
+Le module n'importe pas discord: les exceptions sont inspectées par attributs.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+from rate_limit import TokenBucket
+
+DEFAULT_ROUTE_RATES = 'roles=10/10,dm=5/5,forum=5/10,messages=5/5,threads=5/5'
+# routes non configurées: pas de lissage, mais un 429 les bloque quand même
+_UNPACED = (50.0, 1.0)
+
+RATE_LIMITED = 'rate_limited'
+SERVER_ERROR = 'server'
+NETWORK_ERROR = 'network'
+FATAL = 'fatal'
+
+
+def parse_route_rates(spec: str) -> dict:
+    """`'roles=10/10,dm=5/5'` -> {'roles': (10.0, 10.0), ...} (appels / secondes)."""
+    rates = {}
+    for part in (spec or '').split(','):
+        name, _, value = part.partition('=')
+        count, _, period = value.partition('/')
+        try:
+            count, period = float(count), float(period or 1)
+        except ValueError:
+            continue
+        if name.strip() and count > 0 and period > 0:
+            rates[name.strip()] = (count, period)
+    return rates
+
+
+def _headers(exc) -> dict:
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    try:
+        return {str(k).lower(): v for k, v in headers.items()}
+    except AttributeError:
+        return {}
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(exc) -> dict:
+    """Nature d'une erreur REST: {'kind', 'status', 'retry_after', 'bucket', 'global'}."""
+    status = getattr(exc, 'status', None)
+    headers = _headers(exc)
+    info = {'kind': FATAL, 'status': status, 'retry_after': None,
+            'bucket': headers.get('x-ratelimit-bucket'),
+            'global': str(headers.get('x-ratelimit-global', '')).lower() == 'true'}
+    # discord.RateLimited (délai trop long pour discord.py) porte retry_after sans status
+    retry_after = _float(getattr(exc, 'retry_after', None))
+    if status == 429 or (status is None and retry_after is not None):
+        info['kind'] = RATE_LIMITED
+        for candidate in (retry_after, _float(headers.get('retry-after')),
+                          _float(headers.get('x-ratelimit-reset-after'))):
+            if candidate is not None:
+                info['retry_after'] = candidate
+                break
+        return info
+    if isinstance(status, int) and status >= 500:
+        info['kind'] = SERVER_ERROR
+    elif status is None and isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, OSError)):
+        info['kind'] = NETWORK_ERROR
+    elif status is None and type(exc).__name__ in ('ClientOSError', 'ServerDisconnectedError',
+                                                   'ClientConnectionError', 'ClientPayloadError'):
+        info['kind'] = NETWORK_ERROR
+    return info
+
+
+class RoutePacer:
+    """Un token bucket par route: `await acquire(route)` avant chaque appel REST."""
+
+    def __init__(self, rates: dict = None):
+        if rates is None:
+            rates = parse_route_rates(os.getenv('VERIFICATION_ROUTE_RATES', DEFAULT_ROUTE_RATES))
+        self.buckets = {name: TokenBucket(count / period, count) for name, (count, period) in rates.items()}
+        self.waited = {name: 0.0 for name in self.buckets}
+        # 429 global: bloque aussi les routes dont le seau n'existe pas encore
+        self.blocked_until = 0.0
+
+    def bucket(self, route: str) -> TokenBucket:
+        b = self.buckets.get(route)
+        if b is None:
+            b = self.buckets[route] = TokenBucket(*_UNPACED)
+            self.waited[route] = 0.0
+        return b
+
+    async def acquire(self, route: str):
+        bucket = self.bucket(route)
+        while True:
+            now = time.monotonic()
+            wait = max(bucket.wait_time(now), self.blocked_until - now)
+            if wait <= 0:
+                bucket.take(now)
+                return
+            self.waited[route] += wait
+            await asyncio.sleep(wait)
+
+    def penalize(self, route: str, retry_after: float, everywhere: bool = False):
+        """429: bloque la route (ou toutes pour un 429 global) jusqu'à `retry_after`."""
+        now = time.monotonic()
+        if everywhere:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        targets = list(self.buckets.values()) if everywhere else [self.bucket(route)]
+        for b in targets:
+            b.penalize(retry_after, now)
+
+
+def _route_metrics() -> dict:
+    return {'calls': 0, 'ok': 0, 'retries': 0, 'rate_limited': 0, 'server_errors': 0,
+            'network_errors': 0, 'failures': 0, 'backoff_sec': 0.0, 'bucket': None}
+
+
+class RetryEngine:
+    """Exécute les appels REST d'une route avec budget partagé et reprises."""
+
+    def __init__(self, pacer: RoutePacer = None, attempts: int = None, base: float = None,
+                 max_delay: float = None, sleep=asyncio.sleep):
+        self.pacer = pacer or RoutePacer()
+        self.attempts = max(1, int(attempts or os.getenv('DISCORD_RETRY_ATTEMPTS', '4')))
+        self.base = float(base if base is not None else os.getenv('DISCORD_BACKOFF_BASE_SEC', '0.5'))
+        self.max_delay = float(max_delay if max_delay is not None else os.getenv('DISCORD_BACKOFF_MAX_SEC', '30'))
+        self._sleep = sleep
+        self.metrics = {}
+
+    def _metrics(self, route: str) -> dict:
+        m = self.metrics.get(route)
+        if m is None:
+            m = self.metrics[route] = _route_metrics()
+        return m
+
+    def backoff(self, attempt: int) -> float:
+        """Délai exponentiel avec jitter (moitié à totalité du délai nominal)."""
+        delay = min(self.max_delay, self.base * (2 ** (attempt - 1)))
+        return random.uniform(delay / 2, delay)
+
+    async def call(self, route: str, op, idempotent: bool = True):
+        """`await op()` sur `route`; relance l'exception si elle est fatale ou après `attempts` essais.
+
+        `idempotent=False` (envoi de message, création de fil): seul un 429 est
+        repris, une 5xx ou une coupure ayant pu laisser l'appel aboutir.
+        """
+        m = self._metrics(route)
+        m['calls'] += 1
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.pacer.acquire(route)
+            try:
+                result = await op()
+            except Exception as exc:
+                info = classify(exc)
+                if info['kind'] == RATE_LIMITED:
+                    m['rate_limited'] += 1
+                    m['bucket'] = info['bucket'] or m['bucket']
+                    # budget partagé: toutes les vérifications attendent ce délai
+                    self.pacer.penalize(route, max(0.1, info['retry_after'] or 1.0), everywhere=info['global'])
+                elif info['kind'] == SERVER_ERROR:
+                    m['server_errors'] += 1
+                elif info['kind'] == NETWORK_ERROR:
+                    m['network_errors'] += 1
+                retryable = info['kind'] == RATE_LIMITED or (idempotent and info['kind'] != FATAL)
+                if not retryable or attempt >= self.attempts:
+                    m['failures'] += 1
+                    raise
+                m['retries'] += 1
+                if info['kind'] != RATE_LIMITED:
+                    delay = self.backoff(attempt)
+                    m['backoff_sec'] += delay
+                    await self._sleep(delay)
+                continue
+            self.pacer.bucket(route).reward()
+            m['ok'] += 1
+            return result
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        out = {}
+        for route, m in self.metrics.items():
+            bucket = self.pacer.buckets.get(route)
+            out[route] = {**m, 'backoff_sec': round(m['backoff_sec'], 2),
+                          'paced_sec': round(self.pacer.waited.get(route, 0.0), 2),
+                          'blocked_sec': round(max(0.0, max(bucket.blocked_until if bucket else 0.0,
+                                                            self.pacer.blocked_until) - now), 2)}
+        return out
+
+    def summary(self) -> str:
+        """Une ligne par route active, pour /stats."""
+        lines = []
+        for route, m in sorted(self.stats().items()):
+            lines.append(f"• {route}: {m['calls']} appels, {m['retries']} reprises, {m['rate_limited']}×429, "
+                         f"{m['server_errors'] + m['network_errors']} erreurs transitoires, {m['failures']} échecs"
+                         + (f", bloquée {m['blocked_sec']:.0f}s" if m['blocked_sec'] else ''))
+        return '\n'.join(lines)
+
+
+_singleton = None
+_singleton_lock = threading.Lock()
+
+
+def get_retry_engine() -> RetryEngine:
+    """Moteur partagé du processus (même budget pour vérifications et slash-commands)."""
+    global _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = RetryEngine()
+        return _singleton
+
+
+__all__ = ['RetryEngine', 'RoutePacer', 'classify', 'parse_route_rates', 'get_retry_engine',
+           'RATE_LIMITED', 'SERVER_ERROR', 'NETWORK_ERROR', 'FATAL']
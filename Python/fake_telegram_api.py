@@ -0,0 +1,150 @@
+"""Faux serveur de l'API Telegram, pour les tests et benchmarks hors ligne.
+
+Imite `POST /bot<token>/<method>` (sendMessage, sendDocument...) et peut
+injecter des pannes:
+- latence fixe (`latency`, en secondes) avant chaque réponse
+- 429 avec `parameters.retry_after`
+- erreurs 5xx
+- connexions coupées sans réponse (reset)
+
+Les pannes sont soit planifiées par numéro d'appel (`faults = {3: '429'}`,
+numérotation à partir de 1), soit tirées au hasard (`rates = {'5xx': 0.05}`)
+avec une graine fixe pour rester reproductibles.
+
+Usage:
+    api = FakeTelegramAPI(latency=0.02, rates={'429': 0.01}).start()
+    os.environ['TELEGRAM_API_BASE'] = api.base_url
+    ...
+    api.stop()
+"""
+import json
+import random
+import socket
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAULTS = ('429', '5xx', 'reset')
+
+# un appel reçu; les trois premiers champs restent accessibles par index
+Call = namedtuple('Call', 'path payload client status at')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.headers.get('Content-Type', '').startswith('multipart/'):
+            payload = body  # upload: corps multipart brut
+        else:
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                payload = {}
+        server = self.server
+        fault, index = server._next_fault()
+        if server.latency:
+            time.sleep(server.latency)
+        if fault == 'reset':
+            server._record(self.path, payload, self.client_address, 0)
+            self.close_connection = True
+            try:
+                # RST plutôt que FIN: imite une connexion coupée par un proxy
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, b'\x01\x00\x00\x00\x00\x00\x00\x00')
+            except OSError:
+                pass
+            return
+        if fault == '429':
+            status = 429
+            out = {'ok': False, 'error_code': 429, 'description': 'Too Many Requests: retry later',
+                   'parameters': {'retry_after': server.retry_after}}
+        elif fault == '5xx':
+            status = 502
+            out = {'ok': False, 'error_code': 502, 'description': 'Bad Gateway'}
+        elif index in server.fail_on:
+            status = 400
+            out = {'ok': False, 'error_code': 400, 'description': 'Bad Request'}
+        else:
+            status = 200
+            out = {'ok': True, 'result': {'message_id': index}}
+        server._record(self.path, payload, self.client_address, status)
+        raw = json.dumps(out).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeTelegramAPI(ThreadingHTTPServer):
+    """Serveur HTTP local (thread dédié) qui enregistre chaque appel dans `calls`.
+
+    `calls` ne contient que les requêtes traitées; `requests` compte aussi
+    celles qui ont reçu une panne. `fail_on` (numéros d'appel) renvoie un 400.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 faults: dict = None, rates: dict = None, retry_after: int = 1, seed: int = 0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.faults = dict(faults or {})
+        self.rates = dict(rates or {})
+        for kind in list(self.faults.values()) + list(self.rates):
+            if kind not in FAULTS:
+                raise ValueError(f'unknown fault {kind!r} (expected one of {FAULTS})')
+        self.retry_after = retry_after
+        self.fail_on = set()
+        self.calls = []
+        self.requests = 0
+        self.injected = {kind: 0 for kind in FAULTS}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.server_address[0]}:{self.server_port}'
+
+    def _next_fault(self):
+        with self._lock:
+            self.requests += 1
+            index = self.requests
+            fault = self.faults.get(index)
+            if fault is None:
+                roll = self._random.random()
+                for kind, rate in self.rates.items():
+                    if roll < rate:
+                        fault = kind
+                        break
+                    roll -= rate
+            if fault:
+                self.injected[fault] += 1
+            return fault, index
+
+    def _record(self, path, payload, client, status):
+        with self._lock:
+            self.calls.append(Call(path, payload, client, status, time.monotonic()))
+
+    def delivered(self):
+        """Appels acceptés (200), dans l'ordre de réception."""
+        with self._lock:
+            return [c for c in self.calls if c.status == 200]
+
+    def start(self) -> 'FakeTelegramAPI':
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-telegram-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+__all__ = ['FakeTelegramAPI', 'Call', 'FAULTS']
@@ -0,0 +1,65 @@
+"""Détection des vagues d'arrivées (fenêtre glissante par serveur).
+
+Au-delà de `JOIN_RATE_THRESHOLD` arrivées en `JOIN_RATE_WINDOW_SEC`
+secondes, le serveur passe en mode dégradé (`lockdown`): la vérification
+n'applique plus que `NON_VERIFIED_ROLE` et reporte DM et fils de forum. Le
+mode se lève quand le débit retombe sous `JOIN_RATE_RELEASE` (hystérésis,
+moitié du seuil par défaut); `VerificationManager` publie alors un résumé
+unique puis remet les membres reportés en file à `JOIN_DRAIN_PER_MIN`.
+"""
+import os
+import time
+from collections import deque
+
+
+class JoinRateMonitor:
+    """Compte les arrivées par serveur sur une fenêtre glissante; O(1) amorti par arrivée."""
+
+    def __init__(self, window: float = None, threshold: int = None, release: int = None, clock=time.monotonic):
+        self.window = float(window if window is not None else os.getenv('JOIN_RATE_WINDOW_SEC', '60'))
+        self.threshold = int(threshold if threshold is not None else os.getenv('JOIN_RATE_THRESHOLD', '10'))
+        default_release = max(1, self.threshold // 2)
+        self.release = int(release if release is not None else os.getenv('JOIN_RATE_RELEASE', default_release))
+        self.clock = clock
+        self._joins = {}
+        self._locked = {}
+
+    def _evict(self, joins: deque, now: float):
+        limit = now - self.window
+        while joins and joins[0] <= limit:
+            joins.popleft()
+
+    def rate(self, guild_id, now: float = None) -> int:
+        """Arrivées dans la fenêtre courante."""
+        joins = self._joins.get(guild_id)
+        if not joins:
+            return 0
+        self._evict(joins, self.clock() if now is None else now)
+        return len(joins)
+
+    def locked(self, guild_id) -> bool:
+        return guild_id in self._locked
+
+    def locked_since(self, guild_id):
+        return self._locked.get(guild_id)
+
+    def record(self, guild_id, now: float = None):
+        """Enregistre une arrivée; retourne 'enter' si elle déclenche le mode dégradé, sinon None."""
+        now = self.clock() if now is None else now
+        joins = self._joins.setdefault(guild_id, deque())
+        joins.append(now)
+        self._evict(joins, now)
+        if self.threshold > 0 and guild_id not in self._locked and len(joins) >= self.threshold:
+            self._locked[guild_id] = now
+            return 'enter'
+        return None
+
+    def update(self, guild_id, now: float = None):
+        """Retourne 'exit' (et lève le mode dégradé) quand le débit est retombé, sinon None."""
+        if guild_id in self._locked and self.rate(guild_id, now) < self.release:
+            del self._locked[guild_id]
+            return 'exit'
+        return None
+
+
+__all__ = ['JoinRateMonitor']
@@ -0,0 +1,139 @@
+"""Coalescence des logs répétés avant leur envoi vers Telegram.
+
+Quand une erreur se répète en boucle (retries de `try_role_operation`,
+`on_raw_reaction_add error`...), chaque ligne identique consommait le budget
+d'envoi Telegram. Ce module regroupe les lignes par empreinte:
+- l'empreinte ignore les timestamps, les identifiants numériques et les hex
+- chaque empreinte a son propre token bucket (`burst` lignes par fenêtre)
+- les lignes refusées par le bucket sont comptées, puis résumées en une ligne
+  "(×N repeated)" à la fin de la fenêtre
+"""
+import os
+import re
+import threading
+import time
+from typing import Callable
+
+_TS_RE = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?')
+# hex d'au moins 8 caractères contenant au moins un chiffre (épargne les mots ordinaires)
+_HEX_RE = re.compile(r'\b(?:0x)?(?=[0-9a-f]*\d)[0-9a-f]{8,}\b', re.IGNORECASE)
+_NUM_RE = re.compile(r'\d{3,}')
+_WS_RE = re.compile(r'\s+')
+
+
+def fingerprint(text: str) -> str:
+    """Forme normalisée d'une ligne: timestamps, IDs et nombres longs remplacés."""
+    norm = _TS_RE.sub('<ts>', text)
+    norm = _HEX_RE.sub('<hex>', norm)
+    norm = _NUM_RE.sub('#', norm)
+    return _WS_RE.sub(' ', norm).strip()
+
+
+class _Entry:
+    __slots__ = ('tokens', 'updated', 'window_end', 'suppressed', 'last_text', 'total')
+
+    def __init__(self, now: float, burst: float, window: float, text: str):
+        self.tokens = burst
+        self.updated = now
+        self.window_end = now + window
+        self.suppressed = 0
+        self.last_text = text
+        self.total = 0
+
+
+class LogCoalescer:
+    """Étage entre Logger et le pont Telegram.
+
+    `sink` reçoit les lignes à transmettre (première occurrence, occurrences
+    autorisées par le bucket, puis les résumés "×N repeated").
+    """
+
+    def __init__(self, sink: Callable[[str], object], window: float = None, burst: float = None,
+                 max_fingerprints: int = 5000, clock: Callable[[], float] = time.monotonic):
+        self.sink = sink
+        self.window = float(window if window is not None else os.getenv('TELEGRAM_COALESCE_WINDOW_SEC', '60'))
+        self.burst = max(1.0, float(burst if burst is not None else os.getenv('TELEGRAM_COALESCE_BURST', '1')))
+        self.max_fingerprints = max_fingerprints
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.seen = 0
+        self.forwarded = 0
+        self.suppressed = 0
+        self.summaries = 0
+        # empreintes les plus supprimées (cumul), pour /liste
+        self._suppressed_by_fp = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def offer(self, text: str) -> bool:
+        """Transmet `text` ou le compte comme répétition. Retourne True si transmis."""
+        if not self.enabled:
+            self.sink(text)
+            return True
+        fp = fingerprint(text)
+        now = self.clock()
+        out = []
+        with self._lock:
+            self.seen += 1
+            entry = self._entries.get(fp)
+            if entry is not None and now >= entry.window_end:
+                out.extend(self._close(fp, entry))
+                entry = None
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    old_fp = min(self._entries, key=lambda k: self._entries[k].window_end)
+                    out.extend(self._close(old_fp, self._entries[old_fp]))
+                entry = self._entries[fp] = _Entry(now, self.burst, self.window, text)
+            entry.total += 1
+            entry.last_text = text
+            # refill proportionnel: `burst` jetons par fenêtre
+            entry.tokens = min(self.burst, entry.tokens + (now - entry.updated) * self.burst / self.window)
+            entry.updated = now
+            forward = entry.tokens >= 1
+            if forward:
+                entry.tokens -= 1
+                self.forwarded += 1
+                out.append(text)
+            else:
+                entry.suppressed += 1
+                self.suppressed += 1
+                self._suppressed_by_fp[fp] = self._suppressed_by_fp.get(fp, 0) + 1
+                if len(self._suppressed_by_fp) > 2 * self.max_fingerprints:
+                    keep = sorted(self._suppressed_by_fp.items(), key=lambda kv: kv[1], reverse=True)
+                    self._suppressed_by_fp = dict(keep[:self.max_fingerprints])
+        for line in out:
+            self.sink(line)
+        return forward
+
+    def _close(self, fp: str, entry: _Entry):
+        del self._entries[fp]
+        if not entry.suppressed:
+            return []
+        self.summaries += 1
+        return [f'{entry.last_text.rstrip()} (×{entry.suppressed} repeated)']
+
+    def flush_expired(self, force: bool = False):
+        """Émet les résumés des fenêtres terminées (toutes si `force`)."""
+        now = self.clock()
+        out = []
+        with self._lock:
+            for fp, entry in list(self._entries.items()):
+                if force or now >= entry.window_end:
+                    out.extend(self._close(fp, entry))
+        for line in out:
+            self.sink(line)
+
+    def stats(self, top: int = 5) -> dict:
+        with self._lock:
+            worst = sorted(self._suppressed_by_fp.items(), key=lambda kv: kv[1], reverse=True)[:top]
+            return {
+                'seen': self.seen, 'forwarded': self.forwarded, 'suppressed': self.suppressed,
+                'summaries': self.summaries, 'open': len(self._entries),
+                'top': [{'fingerprint': fp[:120], 'suppressed': n} for fp, n in worst],
+            }
+
+
+__all__ = ['LogCoalescer', 'fingerprint']
@@ -0,0 +1,160 @@
+"""Index annexes des logs JSON-lines (`app-YYYY-MM-DD-HH.jsonl`).
+
+Pour chaque fichier horaire fermé, un index `<fichier>.idx` associe les
+valeurs de `userId`, `command` et `guildId` aux offsets (octets) des
+enregistrements correspondants. Une requête ouvre l'index, intersecte les
+listes d'offsets puis lit directement ces lignes (`seek`), sans parcourir le
+fichier. Un fichier sans index (heure courante) est simplement parcouru.
+
+Les offsets sont stockés en deltas pour garder l'index compact.
+"""
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from log_rotation import hour_of, name_pattern
+
+INDEXED_FIELDS = ('userId', 'command', 'guildId')
+JSONL_SUFFIX = '.jsonl'
+_JSONL_RE = name_pattern('app', JSONL_SUFFIX)
+
+
+def _encode(offsets):
+    prev, out = 0, []
+    for off in offsets:
+        out.append(off - prev)
+        prev = off
+    return out
+
+
+def _decode(deltas):
+    total, out = 0, []
+    for d in deltas:
+        total += d
+        out.append(total)
+    return out
+
+
+def build_index(path) -> dict:
+    """Construit (et écrit à côté) l'index de `path`; retourne l'index."""
+    path = Path(path)
+    keys = {field: {} for field in INDEXED_FIELDS}
+    records = 0
+    first = last = None
+    offset = 0
+    with open(path, 'rb') as fh:
+        for raw in fh:
+            start, offset = offset, offset + len(raw)
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(rec, dict):
+                continue
+            records += 1
+            first = first or rec.get('ts')
+            last = rec.get('ts') or last
+            for field in INDEXED_FIELDS:
+                value = rec.get(field)
+                if value is not None:
+                    keys[field].setdefault(str(value), []).append(start)
+    index = {
+        'v': 1, 'size': offset, 'records': records, 'first': first, 'last': last,
+        'keys': {f: {v: _encode(offs) for v, offs in vals.items()} for f, vals in keys.items()},
+    }
+    tmp = path.with_name(path.name + '.idx.tmp')
+    with open(tmp, 'w', encoding='utf8') as fh:
+        json.dump(index, fh, separators=(',', ':'))
+    os.replace(tmp, path.with_name(path.name + '.idx'))
+    return index
+
+
+def load_index(path):
+    """Index de `path`, ou None s'il est absent ou périmé (taille différente)."""
+    path = Path(path)
+    try:
+        with open(path.with_name(path.name + '.idx'), encoding='utf8') as fh:
+            index = json.load(fh)
+        if index.get('size') != path.stat().st_size:
+            return None
+        return index
+    except (OSError, ValueError):
+        return None
+
+
+def jsonl_files(directory, since: datetime = None, until: datetime = None):
+    """Fichiers .jsonl horaires de `directory` couvrant [since, until], du plus ancien au plus récent."""
+    epoch = datetime(1970, 1, 1)
+    lo = (since - epoch).total_seconds() - 3600 if since else None
+    hi = (until - epoch).total_seconds() if until else None
+    files = []
+    for entry in os.scandir(directory):
+        hour = hour_of(entry.name, _JSONL_RE)
+        if hour is None or entry.name.endswith('.gz'):
+            continue
+        if (lo is not None and hour < lo) or (hi is not None and hour > hi):
+            continue
+        files.append((hour, Path(entry.path)))
+    return [p for _, p in sorted(files)]
+
+
+def _matches(rec, filters, since, until):
+    for field, value in filters.items():
+        if str(rec.get(field)) != value:
+            return False
+    ts = rec.get('ts') or ''
+    if since and ts < since:
+        return False
+    if until and ts > until:
+        return False
+    return True
+
+
+def query(directory, since: datetime = None, until: datetime = None, stats: dict = None, **filters):
+    """Itère les enregistrements de `directory` correspondant aux filtres.
+
+    `filters` porte sur les champs indexés (`userId=...`, `command=...`,
+    `guildId=...`); `since`/`until` bornent les fichiers puis les `ts`.
+    `stats` (optionnel) reçoit les compteurs fichiers/indexés/seeks/lignes lues.
+    """
+    unknown = set(filters) - set(INDEXED_FIELDS)
+    if unknown:
+        raise ValueError(f'champs non indexés: {sorted(unknown)}')
+    filters = {k: str(v) for k, v in filters.items() if v is not None}
+    since_s = since.isoformat() if since else None
+    until_s = until.isoformat() if until else None
+    stats = stats if stats is not None else {}
+    for key in ('files', 'indexed', 'seeks', 'scanned'):
+        stats.setdefault(key, 0)
+    for path in jsonl_files(directory, since, until):
+        stats['files'] += 1
+        index = load_index(path) if filters else None
+        with open(path, 'rb') as fh:
+            if index is not None:
+                stats['indexed'] += 1
+                offsets = None
+                for field, value in filters.items():
+                    found = set(_decode(index['keys'].get(field, {}).get(value, [])))
+                    offsets = found if offsets is None else offsets & found
+                    if not offsets:
+                        break
+                lines = []
+                for off in sorted(offsets or ()):
+                    fh.seek(off)
+                    lines.append(fh.readline())
+                stats['seeks'] += len(lines)
+            else:
+                lines = fh
+            for raw in lines:
+                if index is None:
+                    stats['scanned'] += 1
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue
+                if isinstance(rec, dict) and _matches(rec, filters, since_s, until_s):
+                    yield rec
+
+
+__all__ = ['build_index', 'load_index', 'jsonl_files', 'query', 'INDEXED_FIELDS']
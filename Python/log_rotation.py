@@ -0,0 +1,247 @@
+"""Rotation horaire des fichiers de logs, compression et rétention.
+
+`LogRotator` garde ouvert le fichier de l'heure courante
+(`app-YYYY-MM-DD-HH.log`) et ne change de fichier qu'une fois l'échéance
+précalculée (début de l'heure suivante) dépassée: pas de formatage de date
+par ligne. Les fichiers fermés sont compressés en `.log.gz` par un thread
+`log-compress`, puis la rétention supprime les plus anciens:
+- `LOG_RETENTION_DAYS` (âge max, 0 = illimité)
+- `LOG_RETENTION_MAX_BYTES` (taille totale max du dossier, toutes familles
+  `.log`/`.jsonl` confondues, 0 = illimité)
+
+Le dossier n'est parcouru qu'une fois, à la création; l'inventaire est
+ensuite tenu à jour en mémoire.
+"""
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+
+def name_pattern(prefix: str, suffix: str):
+    return re.compile(rf'^{re.escape(prefix)}-(\d{{4}})-(\d{{2}})-(\d{{2}})-(\d{{2}}){re.escape(suffix)}(\.gz)?$')
+
+
+def hour_of(name: str, pattern=None):
+    """Début de l'heure (epoch UTC) encodée dans le nom, ou None."""
+    m = (pattern or _DEFAULT_RE).match(name)
+    if not m:
+        return None
+    y, mo, d, h = (int(x) for x in m.groups()[:4])
+    return (datetime(y, mo, d, h) - datetime(1970, 1, 1)).total_seconds()
+
+
+_DEFAULT_RE = name_pattern('app', '.log')
+
+
+class _Stream:
+    """Famille de fichiers horaires (`.log`, `.jsonl`...) tenue par un `LogRotator`."""
+
+    def __init__(self, prefix: str, suffix: str, header: str, compress: bool, on_closed: Callable):
+        self.suffix = suffix
+        self.header = header
+        self.compress = compress
+        self.on_closed = on_closed
+        self.re = name_pattern(prefix, suffix)
+        self.fh = None
+        self.path = None
+        self.deadline = 0.0
+
+
+class LogRotator:
+    """Écrit dans le fichier horaire courant et range les fichiers fermés.
+
+    `suffix` est la famille de fichiers par défaut (`.log`); `streams`
+    ajoute d'autres familles dans le même dossier, p.ex.
+    `{'.jsonl': {'compress': False, 'on_closed': build_index}}`, écrites avec
+    `write(data, suffix)`. Un seul inventaire et une seule rétention couvrent
+    toutes les familles: `LOG_RETENTION_MAX_BYTES` borne le dossier entier.
+    `on_closed(path)` est appelé par le thread de fond pour chaque fichier
+    fermé (après compression éventuelle), p.ex. pour construire un index.
+    Un fichier annexe `<nom>.idx` est supprimé avec son fichier.
+    """
+
+    def __init__(self, directory, header: str = '', compress: bool = None, max_age_days: float = None,
+                 max_total_bytes: int = None, clock: Callable[[], float] = time.time,
+                 prefix: str = 'app', suffix: str = '.log', on_closed: Callable = None, streams: dict = None):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.suffix = suffix
+        default_compress = os.getenv('LOG_COMPRESS', 'true').lower() != 'false'
+        self.compress = default_compress if compress is None else compress
+        self._streams = {suffix: _Stream(prefix, suffix, header, self.compress, on_closed)}
+        for sfx, opts in (streams or {}).items():
+            c = opts.get('compress')
+            self._streams[sfx] = _Stream(prefix, sfx, opts.get('header', ''),
+                                         default_compress if c is None else c, opts.get('on_closed'))
+        self.max_age = 86400 * float(max_age_days if max_age_days is not None
+                                     else os.getenv('LOG_RETENTION_DAYS', '30'))
+        self.max_total_bytes = int(max_total_bytes if max_total_bytes is not None
+                                   else os.getenv('LOG_RETENTION_MAX_BYTES', str(512 * 1024 * 1024)))
+        self.clock = clock
+        self._lock = threading.Lock()
+        # inventaire des fichiers fermés (toutes familles): nom -> (heure, taille)
+        self._files = {}
+        self._jobs = queue.Queue()
+        self._worker = None
+        self.compressed = 0
+        self.deleted = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._scan()
+
+    def _stream_of(self, name: str):
+        for stream in self._streams.values():
+            hour = hour_of(name, stream.re)
+            if hour is not None:
+                return stream, hour
+        return None, None
+
+    def _scan(self):
+        now = self.clock()
+        current = {self._name_for(now, sfx) for sfx in self._streams}
+        pending = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                stream, hour = self._stream_of(entry.name)
+                if stream is None or entry.name in current or not entry.is_file():
+                    continue
+                self._files[entry.name] = (hour, entry.stat().st_size)
+                if stream.compress and not entry.name.endswith('.gz'):
+                    pending.append((stream.suffix, entry.name))
+        for job in sorted(pending, key=lambda j: j[1]):
+            self._submit(*job)
+        self._enforce_retention()
+
+    def _name_for(self, now: float, suffix: str = None) -> str:
+        t = datetime.utcfromtimestamp(now)
+        return f'{self.prefix}-{t.year}-{t.month:02d}-{t.day:02d}-{t.hour:02d}{suffix or self.suffix}'
+
+    @property
+    def current_path(self):
+        return self._streams[self.suffix].path
+
+    def write(self, data: str, suffix: str = None):
+        """Écrit `data` dans le fichier de l'heure de la famille `suffix` (change de fichier à l'échéance)."""
+        stream = self._streams[suffix or self.suffix]
+        if stream.fh is None or self.clock() >= stream.deadline:
+            self._rotate(stream)
+        stream.fh.write(data)
+
+    def flush(self):
+        for stream in self._streams.values():
+            if stream.fh is not None:
+                stream.fh.flush()
+
+    def _rotate(self, stream: _Stream):
+        now = self.clock()
+        self._close_current(stream)
+        stream.path = self.directory / self._name_for(now, stream.suffix)
+        stream.deadline = (int(now) // 3600 + 1) * 3600
+        fh = open(stream.path, 'a', encoding='utf8')
+        if fh.tell() == 0 and stream.header:
+            fh.write(stream.header)
+        stream.fh = fh
+
+    def _close_current(self, stream: _Stream):
+        if stream.fh is None:
+            return
+        try:
+            stream.fh.close()
+        except Exception:
+            pass
+        path, stream.fh, stream.path = stream.path, None, None
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return
+        with self._lock:
+            self._files[path.name] = (hour_of(path.name, stream.re) or 0.0, size)
+        if stream.compress or stream.on_closed:
+            self._submit(stream.suffix, path.name)
+        else:
+            self._enforce_retention()
+
+    def _submit(self, suffix: str, name: str):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='log-compress', daemon=True)
+            self._worker.start()
+        self._jobs.put((suffix, name))
+
+    def _run(self):
+        while True:
+            suffix, name = self._jobs.get()
+            try:
+                stream = self._streams[suffix]
+                if stream.compress and not name.endswith('.gz'):
+                    name = self._compress(name, stream)
+                if stream.on_closed:
+                    stream.on_closed(self.directory / name)
+                self._enforce_retention()
+            except Exception:
+                pass
+            finally:
+                self._jobs.task_done()
+
+    def _compress(self, name: str, stream: _Stream):
+        src = self.directory / name
+        dst = self.directory / (name + '.gz')
+        tmp = self.directory / (name + '.gz.tmp')
+        with open(src, 'rb') as fin, gzip.open(tmp, 'wb') as fout:
+            shutil.copyfileobj(fin, fout, 256 * 1024)
+        os.replace(tmp, dst)
+        os.unlink(src)
+        with self._lock:
+            hour = self._files.pop(name, (hour_of(name, stream.re), 0))[0]
+            self._files[dst.name] = (hour, dst.stat().st_size)
+            self.compressed += 1
+        return dst.name
+
+    def _enforce_retention(self):
+        now = self.clock()
+        with self._lock:
+            victims = []
+            by_age = sorted(self._files.items(), key=lambda kv: kv[1][0])
+            total = sum(size for _, (_, size) in by_age)
+            for name, (hour, size) in by_age:
+                too_old = self.max_age > 0 and now - (hour + 3600) > self.max_age
+                too_big = self.max_total_bytes > 0 and total > self.max_total_bytes
+                if not (too_old or too_big):
+                    break
+                victims.append(name)
+                total -= size
+            for name in victims:
+                del self._files[name]
+        for name in victims:
+            try:
+                os.unlink(self.directory / name)
+                self.deleted += 1
+            except OSError:
+                pass
+            try:
+                os.unlink(self.directory / (name + '.idx'))
+            except OSError:
+                pass
+
+    def wait_idle(self):
+        """Attend la fin des compressions en cours (tests, arrêt)."""
+        self._jobs.join()
+
+    def close(self):
+        for stream in self._streams.values():
+            self._close_current(stream)
+        self.wait_idle()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'files': len(self._files), 'bytes': sum(s for _, s in self._files.values()),
+                    'compressed': self.compressed, 'deleted': self.deleted,
+                    'current': self.current_path.name if self.current_path else None}
+
+
+__all__ = ['LogRotator', 'hour_of', 'name_pattern']
@@ -1,10 +1,29 @@
 """Logger simple qui écrit des fichiers horaires et peut forwarder vers Telegram.
+
+Par défaut (`LOG_ASYNC=true`) l'appelant ne fait que déposer la ligne dans une
+file: un thread `log-writer` écrit par lots dans le fichier horaire (handle
+gardé ouvert), affiche la console et transmet au pont Telegram. Ainsi les
+handlers asyncio (`on_message`, vérification...) ne touchent jamais le disque.
+`LOG_ASYNC=false` restaure l'écriture synchrone.
+
+Avec `LOG_JSONL=true`, chaque ligne est aussi écrite en JSON (un objet par
+ligne, `app-YYYY-MM-DD-HH.jsonl`) avec des champs typés (`event`, `userId`,
+`guildId`, `channelId`, `command`, `latency`...), indexés par `log_index`
+à la rotation; voir `scripts/log_index.py` pour les requêtes.
 """
+import atexit
 import os
 import pathlib
 import json
+import queue
+import sys
+import threading
+import time
 from datetime import datetime
 
+from log_index import JSONL_SUFFIX, build_index
+from log_rotation import LogRotator
+
 
 # Place les fichiers de logs dans le dossier `Python/logs` pour garder les artefacts
 # liés au port Python à l'intérieur du répertoire `Python/`.
@@ -13,59 +32,297 @@ LOG_DIR = BASE_DIR / 'logs'
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def _current_log_file():
-    now = datetime.utcnow()
-    return LOG_DIR / f"app-{now.year}-{now.month:02d}-{now.day:02d}-{now.hour:02d}.log"
+LOG_HEADER = '/* Logs generated by Python port */\n\n'
 
 
-class Logger:
+def _bridge():
+    # dynamic import to avoid circular imports at startup
+    from telegram_bridge import get_bridge
+    return get_bridge()
+
+
+def _forward(text, bridge):
+    try:
+        if os.getenv('TELEGRAM_ENABLED', '').lower() == 'true':
+            (bridge or _bridge()).enqueue_log(text)
+    except Exception:
+        pass
+
+
+class LogWriter:
+    """Thread d'écriture des logs: lots, handle horaire ouvert, flush par taille/temps.
+
+    La rotation horaire, la compression et la rétention sont déléguées à un
+    seul `log_rotation.LogRotator` pour les `.log` et les `.jsonl`; le mode
+    synchrone (`LOG_ASYNC=false`) passe par le même rotator (`write_sync`).
+
+    `submit` ne fait qu'un `put_nowait`; si la file est pleine
+    (`LOG_QUEUE_MAX`), la ligne est comptée dans `dropped` plutôt que de
+    bloquer l'appelant.
+    """
+
     def __init__(self):
-        self.level = os.getenv('LOG_LEVEL', 'debug').lower()
+        self.flush_bytes = int(os.getenv('LOG_FLUSH_BYTES', str(64 * 1024)))
+        self.flush_interval = float(os.getenv('LOG_FLUSH_INTERVAL_SEC', '1'))
+        self._queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_MAX', '100000')))
+        self._rot = None
+        # écritures du thread et du mode synchrone sérialisées sur le rotator
+        self._io_lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
 
-    def _write(self, level, msg, no_telegram=False):
+    def submit(self, line, level='info', telegram=None, bridge=None, record=None):
+        """Dépose une ligne (fichier + console), un enregistrement JSON et/ou un texte pour Telegram."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((line, level, telegram, bridge, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Attend que tout ce qui a été déposé soit écrit (et le fichier vidé)."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_file()
+                continue
+            batch = [item]
+            # vide ce qui est déjà en file: une seule passe d'écriture par lot
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        for item in batch:
+            if isinstance(item, threading.Event):
+                with self._io_lock:
+                    self._flush_file()
+                item.set()
+                continue
+            line, level, telegram, bridge, record = item
+            with self._io_lock:
+                if record is not None:
+                    self._write_record(record)
+                if line is not None:
+                    self._write_line(line)
+            if line is not None:
+                print(line.strip(), file=sys.stderr if level == 'error' else sys.stdout)
+            if telegram is not None:
+                _forward(telegram, bridge)
+        if self._pending >= self.flush_bytes or time.monotonic() - self._last_flush >= self.flush_interval:
+            with self._io_lock:
+                self._flush_file()
+
+    def write_sync(self, line=None, record=None):
+        """Mode synchrone: écrit et vide tout de suite, avec la même rotation/rétention."""
+        with self._io_lock:
+            if record is not None:
+                self._write_record(record)
+            if line is not None:
+                self._write_line(line)
+            self._flush_file()
+
+    def _rotator(self) -> LogRotator:
+        # LOG_DIR peut être redirigé (tests): le rotator suit le dossier courant
+        if self._rot is None or self._rot.directory != LOG_DIR:
+            if self._rot is not None:
+                self._rot.close()
+            # .jsonl jamais compressés: les index donnent des offsets dans le fichier brut
+            self._rot = LogRotator(LOG_DIR, header=LOG_HEADER,
+                                   streams={JSONL_SUFFIX: {'compress': False, 'on_closed': build_index}})
+        return self._rot
+
+    def _write_record(self, record):
+        try:
+            data = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+            self._rotator().write(data, JSONL_SUFFIX)
+            self._pending += len(data)
+        except Exception:
+            pass
+
+    def _write_line(self, line):
+        try:
+            self._rotator().write(line)
+            self._pending += len(line)
+            self.written += 1
+        except Exception:
+            pass
+
+    def _flush_file(self):
+        self._last_flush = time.monotonic()
+        self._pending = 0
+        if self._rot is not None:
+            try:
+                self._rot.flush()
+            except Exception:
+                pass
+
+    def _close_file(self):
+        if self._rot is not None:
+            try:
+                self._rot.close()
+            except Exception:
+                pass
+        self._rot = None
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> LogWriter:
+    """Retourne le writer du processus (un seul thread `log-writer`)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter()
+            atexit.register(_writer.flush)
+        return _writer
+
+
+def _async_enabled() -> bool:
+    return os.getenv('LOG_ASYNC', 'true').lower() != 'false'
+
+
+DEBUG, INFO, WARN, ERROR = 10, 20, 30, 40
+# champs typés des enregistrements JSONL (les autres sont gardés tels quels)
+FIELD_TYPES = {'event': str, 'userId': int, 'guildId': int, 'channelId': int, 'command': str, 'latency': float}
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warn': WARN, 'warning': WARN, 'error': ERROR}
+
+
+def _render(msg, args):
+    """Construit le message: `msg()` si appelable, sinon `msg % args` s'il y a des args."""
+    if callable(msg):
+        return msg()
+    if args:
+        try:
+            return msg % args
+        except (TypeError, ValueError):
+            return ' '.join([str(msg)] + [str(a) for a in args])
+    return msg
+
+
+def _record(ts, level, msg, fields):
+    rec = {'ts': ts, 'level': level, 'msg': msg}
+    for key, value in fields.items():
+        if value is None:
+            continue
+        cast = FIELD_TYPES.get(key)
+        if cast is not None:
+            try:
+                value = cast(value)
+            except (TypeError, ValueError):
+                value = str(value)
+        rec[key] = value
+    return rec
+
+
+class Logger:
+    """Les messages peuvent être différés: `log.debug('x=%s', obj)` ou
+    `log.debug(lambda: ...)` ne sont formatés que si le niveau est actif.
+    Les mots-clés restants (`event=`, `userId=`, `latency=`...) alimentent
+    l'enregistrement JSONL quand `LOG_JSONL=true`.
+    """
+
+    def __init__(self, telegram_bridge=None):
+        self.level = os.getenv('LOG_LEVEL', 'info').lower()
+        # seuil entier précalculé: une comparaison par appel
+        self.threshold = LEVELS.get(self.level, INFO)
+        self.jsonl = os.getenv('LOG_JSONL', 'false').lower() == 'true'
+        # pont injecté par Bot; sinon le pont partagé du processus
+        self.telegram = telegram_bridge
+
+    def is_enabled(self, level: str) -> bool:
+        return LEVELS.get(level, ERROR) >= self.threshold
+
+    def _write(self, level, msg, no_telegram=False, args=(), text=True, **fields):
+        msg = _render(msg, args)
         ts = datetime.utcnow().isoformat()
-        line = f"[{ts}] [{level.upper()}] {msg}\n"
+        line = f"[{ts}] [{level.upper()}] {msg}\n" if text else None
+        record = _record(ts, level, msg, fields) if self.jsonl else None
+        if line is None and record is None:
+            return
+        if _async_enabled():
+            get_writer().submit(line, level, None if no_telegram else line, self.telegram, record)
+            return
         try:
-            f = _current_log_file()
-            if not f.exists() or f.stat().st_size == 0:
-                f.write_text('/* Logs generated by Python port */\n\n', encoding='utf8')
-            with f.open('a', encoding='utf8') as fh:
-                fh.write(line)
+            get_writer().write_sync(line, record)
         except Exception:
             pass
+        if line is None:
+            return
         # print to console
         if level == 'error':
             print(line.strip(), file=os.sys.stderr)
         else:
             print(line.strip())
         # forward to telegram if requested and enabled
-        try:
-            if not no_telegram and os.getenv('TELEGRAM_ENABLED', '').lower() == 'true':
-                # dynamic import to avoid circular imports at startup
-                from telegram_bridge import TelegramBridge
-                tb = TelegramBridge()
-                tb.enqueue_log(line)
-        except Exception:
-            pass
+        if not no_telegram:
+            _forward(line, self.telegram)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Attend l'écriture des lignes déjà déposées (à appeler avant l'arrêt)."""
+        return get_writer().flush(timeout) if _writer is not None else True
 
-    def debug(self, msg, **kwargs):
-        if self.level in ('debug',):
-            self._write('debug', msg, **kwargs)
+    def debug(self, msg, *args, **kwargs):
+        if self.threshold <= DEBUG:
+            self._write('debug', msg, args=args, **kwargs)
 
-    def info(self, msg, **kwargs):
-        if self.level in ('debug', 'info'):
-            self._write('info', msg, **kwargs)
+    def info(self, msg, *args, **kwargs):
+        if self.threshold <= INFO:
+            self._write('info', msg, args=args, **kwargs)
 
-    def warn(self, msg, **kwargs):
-        if self.level in ('debug', 'info', 'warn'):
-            self._write('warn', msg, **kwargs)
+    def warn(self, msg, *args, **kwargs):
+        if self.threshold <= WARN:
+            self._write('warn', msg, args=args, **kwargs)
 
-    def error(self, msg, **kwargs):
-        self._write('error', msg, **kwargs)
+    def error(self, msg, *args, **kwargs):
+        self._write('error', msg, args=args, **kwargs)
+
+    def event(self, msg, *args, **fields):
+        """Événement fréquent (fin de commande...): enregistrement JSONL toujours écrit au niveau info,
+        ligne texte seulement au niveau debug; jamais transmis à Telegram.
+        """
+        self._write('info', msg, no_telegram=True, args=args, text=self.threshold <= DEBUG, **fields)
 
 
 def command_invocation(details):
+    """Détail d'une invocation (debug + Telegram); appelé pour un échantillon seulement,
+    les compteurs vivent dans `command_stats`.
+    """
     try:
+        log = Logger()
+        telegram = os.getenv('TELEGRAM_ENABLED', '').lower() == 'true'
+        # ni fichier (niveau debug coupé) ni Telegram: rien à formater
+        if not telegram and not log.is_enabled('debug'):
+            return
+        fields = {}
         if isinstance(details, str):
             text = details
         else:
@@ -76,13 +333,17 @@ def command_invocation(details):
             cmd = details.get('commandName') or details.get('command') or 'unknown'
             opts = details.get('options') or details.get('args') or ''
             text = f"CMD {time}\nCommand: {cmd}\nUser: {user}\nGuild: {guild}\nChannel: {channel}\nOptions: {opts}"
-        Logger().info(text, no_telegram=True)
-        if os.getenv('TELEGRAM_ENABLED', '').lower() == 'true':
-            from telegram_bridge import TelegramBridge
-            tb = TelegramBridge()
-            tb.enqueue_log(text)
+            fields = {'event': 'command', 'command': cmd, 'userId': details.get('userId'),
+                      'guildId': details.get('guildId'), 'channelId': details.get('channelId')}
+        log.debug(text, no_telegram=True, **fields)
+        if not telegram:
+            return
+        if _async_enabled():
+            get_writer().submit(None, telegram=text)
+        else:
+            _forward(text, None)
     except Exception:
         pass
 
 
-__all__ = ['Logger', 'command_invocation']
+__all__ = ['Logger', 'LogWriter', 'get_writer', 'command_invocation']
@@ -0,0 +1,49 @@
+"""Token bucket partagé par le pont Telegram (`RateGovernor`) et les appels REST Discord (`RoutePacer`)."""
+import time
+
+
+class TokenBucket:
+    """Token bucket simple (non thread-safe: utilisé depuis une seule boucle asyncio)."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def wait_time(self, now: float = None) -> float:
+        """Secondes avant qu'un jeton soit disponible (0 si tout de suite)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+
+    def penalize(self, retry_after: float, now: float = None):
+        """429: bloque jusqu'à `retry_after`, vide le seau et divise le débit par deux."""
+        now = time.monotonic() if now is None else now
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.tokens = 0.0
+        self._updated = now
+        self.rate = max(self.base_rate / 8, self.rate / 2)
+
+    def reward(self):
+        """Succès: regagne progressivement le débit nominal après une pénalité."""
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 20)
+
+
+__all__ = ['TokenBucket']
@@ -0,0 +1,179 @@
+"""Résolution des rôles configurés, mise en cache par serveur.
+
+Les variables `NON_VERIFIED_ROLE`, `PELUCHER_ROLE`, `MAJOR_ROLE`,
+`MINOR_ROLE`, `ARTIST_ROLE` et `VERIFIER_ROLE` acceptent un nom, un ID ou
+une mention `<@&id>`. Elles sont lues une fois, puis résolues en objets
+`Role` une fois par serveur (un seul parcours de `guild.roles`). Le cache
+d'un serveur est invalidé par `on_guild_role_create/update/delete`
+(branchés dans `VerificationManager.attach_handlers`).
+"""
+import os
+import threading
+
+# clé logique -> variables d'environnement (la première définie gagne)
+ROLE_ENV = {
+    'non_verified': ('NON_VERIFIED_ROLE',),
+    'pelucher': ('PELUCHER_ROLE', 'PELUCHES_ROLE', 'PELUCHER'),
+    'major': ('MAJOR_ROLE',),
+    'minor': ('MINOR_ROLE',),
+    'artist': ('ARTIST_ROLE', 'ARTIST_ROLE_ID', 'ARTIST_ROLE_TAG'),
+    'verifier': ('VERIFIER_ROLE',),
+}
+
+
+def _parse_spec(spec: str):
+    """(id, None) pour un ID ou une mention `<@&id>`, sinon (None, nom)."""
+    spec = spec.strip()
+    if spec.startswith('<@&') and spec.endswith('>'):
+        digits = spec[3:-1]
+        if digits.isdigit():
+            return int(digits), None
+    if spec.isdigit():
+        return int(spec), None
+    return None, spec
+
+
+class RoleResolver:
+    """Cache {guild_id: {clé: Role | None}}; `has_role`/`can_verify` en O(1)."""
+
+    def __init__(self, env: dict = None):
+        env = os.environ if env is None else env
+        self.specs = {}
+        for key, names in ROLE_ENV.items():
+            for name in names:
+                if env.get(name):
+                    self.specs[key] = _parse_spec(env[name])
+                    break
+        self._guilds = {}
+        self._lock = threading.Lock()
+        self.resolutions = 0
+
+    def configured(self, key: str) -> bool:
+        return key in self.specs
+
+    def _build(self, guild) -> dict:
+        roles = list(getattr(guild, 'roles', None) or [])
+        by_id = {getattr(r, 'id', None): r for r in roles}
+        by_name = {}
+        for r in roles:
+            by_name.setdefault(getattr(r, 'name', None), r)
+        resolved = {}
+        for key, (role_id, name) in self.specs.items():
+            if role_id is not None:
+                role = by_id.get(role_id)
+                if role is None and hasattr(guild, 'get_role'):
+                    role = guild.get_role(role_id)
+            else:
+                role = by_name.get(name)
+            resolved[key] = role
+        self.resolutions += 1
+        return resolved
+
+    def _roles_for(self, guild) -> dict:
+        gid = getattr(guild, 'id', None)
+        cached = self._guilds.get(gid)
+        if cached is None:
+            with self._lock:
+                cached = self._guilds.get(gid)
+                if cached is None:
+                    cached = self._guilds[gid] = self._build(guild)
+        return cached
+
+    def resolve(self, guild, key: str):
+        """Rôle configuré pour `key` dans `guild`, ou None (non configuré / introuvable)."""
+        if guild is None or key not in self.specs:
+            return None
+        return self._roles_for(guild).get(key)
+
+    def has_role(self, member, key: str) -> bool:
+        role = self.resolve(getattr(member, 'guild', None), key)
+        if role is None:
+            return False
+        get_role = getattr(member, 'get_role', None)
+        if get_role is not None:
+            return get_role(role.id) is not None
+        return any(getattr(r, 'id', None) == role.id for r in getattr(member, 'roles', []) or [])
+
+    def can_verify(self, member, permission: str = 'manage_guild') -> bool:
+        """Permission de serveur (`manage_guild` par défaut, ou administrateur) ou rôle VERIFIER_ROLE."""
+        if member is None:
+            return False
+        perms = getattr(member, 'guild_permissions', None)
+        if perms is not None and (getattr(perms, permission, False) or getattr(perms, 'administrator', False)):
+            return True
+        return self.has_role(member, 'verifier')
+
+    def invalidate(self, guild_id=None):
+        """Oublie les rôles résolus d'un serveur (ou de tous)."""
+        with self._lock:
+            if guild_id is None:
+                self._guilds.clear()
+            else:
+                self._guilds.pop(guild_id, None)
+
+
+class RolePlan:
+    """Ensemble final des rôles d'un membre, appliqué en un seul `member.edit(roles=...)`.
+
+    Les ajouts/retraits s'accumulent (réponses aux questions comprises) puis
+    `apply` envoie un appel REST unique: tout ou rien, et aucun appel si rien
+    ne change. `@everyone` n'est jamais envoyé; les rôles gérés (bots,
+    intégrations, boost) ne peuvent pas être retirés et sont conservés.
+    """
+
+    def __init__(self, member):
+        self.member = member
+        guild_id = getattr(getattr(member, 'guild', None), 'id', None)
+        self.current = {r.id: r for r in getattr(member, 'roles', []) or [] if r.id != guild_id}
+        self.final = dict(self.current)
+
+    def add(self, role):
+        if role is not None:
+            self.final[role.id] = role
+        return self
+
+    def remove(self, role):
+        if role is not None and not getattr(role, 'managed', False):
+            self.final.pop(role.id, None)
+        return self
+
+    def clear(self):
+        """Retire tous les rôles retirables."""
+        self.final = {rid: r for rid, r in self.final.items() if getattr(r, 'managed', False)}
+        return self
+
+    @property
+    def added(self) -> list:
+        return [r for rid, r in self.final.items() if rid not in self.current]
+
+    @property
+    def removed(self) -> list:
+        return [r for rid, r in self.current.items() if rid not in self.final]
+
+    @property
+    def changed(self) -> bool:
+        return self.final.keys() != self.current.keys()
+
+    async def apply(self, reason: str = None) -> bool:
+        """Un seul `member.edit(roles=...)`; False si rien à changer."""
+        if not self.changed:
+            return False
+        await self.member.edit(roles=list(self.final.values()), reason=reason)
+        self.current = dict(self.final)
+        return True
+
+
+_singleton = None
+_singleton_lock = threading.Lock()
+
+
+def get_role_resolver() -> RoleResolver:
+    """Retourne le résolveur partagé du processus."""
+    global _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = RoleResolver()
+        return _singleton
+
+
+__all__ = ['RoleResolver', 'RolePlan', 'ROLE_ENV', 'get_role_resolver']
@@ -0,0 +1,63 @@
+"""Benchmark: coût par message entrant selon le nombre de vérifications ouvertes.
+
+`wait_for` (simulé comme dans discord.py: chaque écouteur évalue son `check`
+sur chaque message) est O(sessions ouvertes); `ConversationRouter.dispatch`
+est une recherche dans un dict, indépendante du nombre de sessions.
+
+Usage: python Python/scripts/bench_conversation_router.py [--messages 20000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from conversation_router import ConversationRouter  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Benchmark wait_for vs ConversationRouter')
+parser.add_argument('--messages', type=int, default=20000, help='Messages entrants mesurés')
+parser.add_argument('--sessions', default='10,100,1000,5000', help='Sessions ouvertes (liste)')
+args = parser.parse_args()
+
+
+def messages(n):
+    # trafic du serveur: auteurs/salons sans session ouverte
+    return [SimpleNamespace(author=SimpleNamespace(id=10 ** 6 + i), channel=SimpleNamespace(id=i % 50))
+            for i in range(n)]
+
+
+def bench_wait_for(sessions, msgs):
+    listeners = []
+    for sid in range(sessions):
+        def check(m, sid=sid):
+            return m.author.id == sid and m.channel.id == 10 ** 5 + sid
+        listeners.append((None, check))
+    t0 = time.perf_counter()
+    for m in msgs:
+        # discord.Client.dispatch: parcourt tous les écouteurs 'message'
+        for _, check in listeners:
+            if check(m):
+                break
+    return (time.perf_counter() - t0) / len(msgs)
+
+
+async def bench_router(sessions, msgs):
+    router = ConversationRouter()
+    for sid in range(sessions):
+        router.open(sid, 10 ** 5 + sid)
+    t0 = time.perf_counter()
+    for m in msgs:
+        router.dispatch(m)
+    return (time.perf_counter() - t0) / len(msgs)
+
+
+msgs = messages(args.messages)
+print(f"{'sessions':>9} {'wait_for ns/msg':>16} {'routeur ns/msg':>15}")
+for n in (int(x) for x in args.sessions.split(',')):
+    wf = bench_wait_for(n, msgs)
+    rt = asyncio.run(bench_router(n, msgs))
+    print(f'{n:>9} {wf * 1e9:>16.0f} {rt * 1e9:>15.0f}')
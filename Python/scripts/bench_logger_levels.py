@@ -0,0 +1,46 @@
+"""Microbenchmark du coût d'un appel de log dont le niveau est désactivé.
+
+Avec le seuil entier précalculé et les arguments différés, `log.debug(...)`
+sous LOG_LEVEL=info ne doit rien formater: objectif < 200ns par appel avec
+des %-args (la forme `callable` paie en plus la création de la lambda).
+
+Usage: python Python/scripts/bench_logger_levels.py [--number 1000000]
+"""
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ['LOG_LEVEL'] = 'info'
+
+from logger import Logger  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Coût des appels de log désactivés')
+parser.add_argument('--number', type=int, default=1000000, help="Nombre d'appels par mesure")
+parser.add_argument('--repeat', type=int, default=5, help='Nombre de mesures (on garde la meilleure)')
+args = parser.parse_args()
+
+
+class Member:
+    def __repr__(self):
+        return '<Member id=123456789 name=test>'
+
+
+log = Logger()
+member = Member()
+cases = {
+    "f-string (avant)": lambda: log.debug(f'Lancement vérification pour: {getattr(member, "user", member)}'),
+    "%-args": lambda: log.debug('Lancement vérification pour: %s', member),
+    "callable (+lambda)": lambda: log.debug(lambda: f'Lancement vérification pour: {member!r}'),
+}
+baseline = min(timeit.repeat(lambda: None, number=args.number, repeat=args.repeat)) / args.number
+
+print(f"{'cas':<20} {'ns/appel':>10}")
+for name, fn in cases.items():
+    best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat)) / args.number
+    ns = (best - baseline) * 1e9
+    flag = '  > 200ns!' if name == '%-args' and ns >= 200 else ''
+    print(f'{name:<20} {ns:>10.0f}{flag}')
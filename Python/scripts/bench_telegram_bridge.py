@@ -0,0 +1,106 @@
+"""Benchmark de bout en bout du pont Telegram, hors ligne.
+
+Lance `fake_telegram_api.FakeTelegramAPI` en local (latence et pannes
+injectables), pilote `TelegramBridge` à un débit d'enqueue donné puis
+rapporte:
+- le coût d'`enqueue_log` côté appelant (p50/p99)
+- la latence enqueue -> réception par le serveur (p50/p99/max)
+- le nombre de messages regroupés par requête HTTP
+- les octets écrits dans le journal de la file
+
+Usage: python Python/scripts/bench_telegram_bridge.py [--rate 200] [--duration 10]
+       [--latency 0.05] [--rate-429 0.01] [--rate-5xx 0.02] [--rate-reset 0.01]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fake_telegram_api import FakeTelegramAPI  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Benchmark de bout en bout du pont Telegram (serveur factice)')
+parser.add_argument('--rate', type=float, default=200, help='Enqueue par seconde')
+parser.add_argument('--duration', type=float, default=10, help="Durée de la phase d'enqueue (s)")
+parser.add_argument('--interval', type=float, default=1, help='TELEGRAM_LOG_INTERVAL_SEC du pont')
+parser.add_argument('--group-rate', type=float, default=20, help='TELEGRAM_GROUP_RATE_PER_MIN (limite Telegram: 20)')
+parser.add_argument('--latency', type=float, default=0.0, help='Latence serveur par requête (s)')
+parser.add_argument('--rate-429', type=float, default=0.0, help='Proportion de réponses 429')
+parser.add_argument('--rate-5xx', type=float, default=0.0, help='Proportion de réponses 502')
+parser.add_argument('--rate-reset', type=float, default=0.0, help='Proportion de connexions coupées')
+parser.add_argument('--retry-after', type=int, default=1, help='retry_after renvoyé avec les 429')
+args = parser.parse_args()
+
+rates = {k: v for k, v in (('429', args.rate_429), ('5xx', args.rate_5xx), ('reset', args.rate_reset)) if v > 0}
+api = FakeTelegramAPI(latency=args.latency, rates=rates, retry_after=args.retry_after).start()
+
+# configuration du pont avant son import (les lanes lisent l'environnement)
+os.environ.update({
+    'TELEGRAM_ENABLED': 'true',
+    'TELEGRAM_BOT_TOKEN': 'BENCH',
+    'TELEGRAM_CHAT_ID': '-100',
+    'TELEGRAM_API_BASE': api.base_url,
+    'TELEGRAM_LOG_INTERVAL_SEC': str(args.interval),
+    'TELEGRAM_GROUP_RATE_PER_MIN': str(args.group_rate),
+    # chaque ligne a un identifiant unique: pas de coalescence
+    'TELEGRAM_COALESCE_WINDOW_SEC': '0',
+})
+
+from telegram_bridge import TelegramBridge  # noqa: E402
+
+MARK_RE = re.compile(r'bench-(\d+)\b')
+
+
+def pct(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    tb = TelegramBridge(journal_dir=Path(tmp)).start()
+    total = int(args.rate * args.duration)
+    enqueued_at = {}
+    timings = []
+    t0 = time.monotonic()
+    for i in range(total):
+        delay = t0 + i / args.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        line = f'[2025-01-01T00:00:00] [INFO] bench-{i} commande /verif exécutée par utilisateur de test'
+        start = time.perf_counter()
+        tb.enqueue_log(line)
+        timings.append(time.perf_counter() - start)
+        enqueued_at[i] = time.monotonic()
+    enqueue_wall = time.monotonic() - t0
+    tb.close(drain=True)
+    journal_bytes = tb._journal.bytes_written
+    left = len(tb.get_queue())
+api.stop()
+
+latencies = []
+delivered = set()
+requests = api.delivered()
+for call in requests:
+    payload = call.payload
+    text = payload.decode('utf8', 'replace') if isinstance(payload, bytes) else payload.get('text', '')
+    for m in MARK_RE.finditer(text):
+        i = int(m.group(1))
+        if i in enqueued_at and i not in delivered:
+            delivered.add(i)
+            latencies.append(call.at - enqueued_at[i])
+
+us = [t * 1e6 for t in timings]
+print(f'enqueued        {total} in {enqueue_wall:.1f}s ({total / enqueue_wall:.0f}/s)')
+print(f'enqueue us      p50 {pct(us, 0.50):.1f}  p99 {pct(us, 0.99):.1f}  max {max(us, default=0):.1f}')
+print(f'delivered       {len(delivered)}/{total} (left in queue: {left})')
+print(f'e2e latency s   p50 {pct(latencies, 0.50):.2f}  p99 {pct(latencies, 0.99):.2f}  max {max(latencies, default=0):.2f}')
+print(f'requests        {len(requests)} ok / {api.requests} total, faults {api.injected}')
+print(f'msgs/request    {len(delivered) / max(1, len(requests)):.1f}')
+print(f'journal bytes   {journal_bytes} ({journal_bytes / max(1, total):.0f} B/msg)')
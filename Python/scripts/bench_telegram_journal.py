@@ -0,0 +1,54 @@
+"""Benchmark du coût d'un enqueue Telegram en fonction de la taille de la file.
+
+Avec le journal append-only, le coût d'un enqueue doit rester plat de 10 à
+100k éléments en file (l'ancien `_persist` réécrivait toute la file: O(n)).
+Les lignes sont toutes distinctes et passent par `enqueue(text, 'log')`: le
+regroupement des répétitions d'`enqueue_log` ne fausse pas la mesure.
+
+Usage: python Python/scripts/bench_telegram_journal.py [--samples 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ['TELEGRAM_ENABLED'] = 'false'
+
+from telegram_bridge import TelegramBridge  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Benchmark enqueue Telegram (journal)')
+parser.add_argument('--samples', type=int, default=2000, help="Nombre d'enqueue mesurés par palier")
+parser.add_argument('--sizes', default='10,100,1000,10000,100000', help='Tailles de file à tester (séparées par des virgules)')
+args = parser.parse_args()
+
+line = '[2025-01-01T00:00:00] [INFO] message de test {} pour le benchmark du journal Telegram'
+sizes = [int(x) for x in args.sizes.split(',')]
+
+# bornes du backlog au-dessus de la charge: sinon la politique de débordement
+# évince ou refuse au-delà de TELEGRAM_QUEUE_MAX_ITEMS (10k par défaut)
+peak = max(sizes) + args.samples
+os.environ['TELEGRAM_QUEUE_MAX_ITEMS'] = str(peak + 1)
+os.environ['TELEGRAM_QUEUE_MAX_BYTES'] = str((peak + 1) * (len(line) + 32))
+
+print(f"{'queued':>8} {'kept':>8} {'us/enqueue':>12} {'p99 us':>10}")
+for size in sizes:
+    with tempfile.TemporaryDirectory() as tmp:
+        tb = TelegramBridge(journal_dir=Path(tmp))
+        for i in range(size):
+            tb.enqueue(line.format(i), 'log')
+        timings = []
+        for i in range(size, size + args.samples):
+            text = line.format(i)
+            t0 = time.perf_counter()
+            tb.enqueue(text, 'log')
+            timings.append(time.perf_counter() - t0)
+        kept = tb.backlog_stats()['items']
+        tb.stop()
+    timings.sort()
+    mean = sum(timings) / len(timings) * 1e6
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1e6
+    print(f'{size:>8} {kept:>8} {mean:>12.1f} {p99:>10.1f}')
@@ -0,0 +1,65 @@
+"""Benchmark: latence d'une mise à jour de vérification, JSON vs SQLite.
+
+L'ancien `_save_store` réécrit tout `verifications.json` à chaque changement
+d'état (O(n)); le store SQLite (WAL) n'écrit qu'une ligne.
+
+Usage: python Python/scripts/bench_verification_store.py [--records 100000] [--writes 50]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from verification_store import VerificationStore  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Benchmark store des vérifications (JSON vs SQLite)')
+parser.add_argument('--records', type=int, default=100000, help='Enregistrements déjà présents')
+parser.add_argument('--writes', type=int, default=50, help='Mises à jour mesurées')
+args = parser.parse_args()
+
+
+def record(i):
+    return {'threadId': 10 ** 18 + i, 'channelId': '123456789012345678', 'createdAt': 1700000000000 + i,
+            'awaitingValidation': True}
+
+
+def report(name, timings):
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1e3
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e3
+    print(f'{name:<8} {p50:>10.3f} {p99:>10.3f}')
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    tmp = Path(tmp)
+    store = {'verifications': {str(i): record(i) for i in range(args.records)}}
+
+    # ancien comportement: réécriture indentée du fichier complet
+    json_file = tmp / 'verifications.json'
+    json_timings = []
+    for n in range(args.writes):
+        store['verifications'][str(n)] = {**store['verifications'][str(n)], 'status': 'processing'}
+        t0 = time.perf_counter()
+        json_file.write_text(json.dumps(store, indent=2, ensure_ascii=False), encoding='utf8')
+        json_timings.append(time.perf_counter() - t0)
+
+    db = VerificationStore(tmp / 'verifications.db')
+    db.put_many(store['verifications'].items())
+    sqlite_timings = []
+    for n in range(args.writes):
+        t0 = time.perf_counter()
+        db.update(str(n), status='accepted')
+        sqlite_timings.append(time.perf_counter() - t0)
+    db.close()
+
+    print(f'{args.records} enregistrements, {args.writes} mises à jour — fichier JSON: '
+          f'{os.path.getsize(json_file) / 1e6:.1f} MB')
+    print(f"{'store':<8} {'p50 ms':>10} {'p99 ms':>10}")
+    report('json', json_timings)
+    report('sqlite', sqlite_timings)
@@ -0,0 +1,58 @@
+"""Index et requêtes sur les logs JSON-lines (LOG_JSONL=true).
+
+Les index `app-YYYY-MM-DD-HH.jsonl.idx` sont construits automatiquement à la
+rotation; `build` sert à (ré)indexer des fichiers existants.
+
+Usage:
+    python Python/scripts/log_index.py build [--dir Python/logs]
+    python Python/scripts/log_index.py query --user 123 [--command verif]
+        [--guild 456] [--since 2025-01-01] [--until 2025-01-08] [--limit 50]
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from log_index import build_index, jsonl_files, load_index, query  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Index et requêtes sur les logs JSONL')
+parser.add_argument('--dir', default=str(ROOT / 'logs'), help='Dossier des logs')
+sub = parser.add_subparsers(dest='action', required=True)
+p_build = sub.add_parser('build', help='Indexe les fichiers .jsonl fermés sans index à jour')
+p_build.add_argument('--force', action='store_true', help='Reconstruit aussi les index à jour')
+p_query = sub.add_parser('query', help='Affiche les enregistrements correspondants (un JSON par ligne)')
+p_query.add_argument('--user', help='userId')
+p_query.add_argument('--command', help='nom de commande')
+p_query.add_argument('--guild', help='guildId')
+p_query.add_argument('--since', type=datetime.fromisoformat, help='date/heure ISO (UTC)')
+p_query.add_argument('--until', type=datetime.fromisoformat, help='date/heure ISO (UTC)')
+p_query.add_argument('--limit', type=int, default=0, help='Nombre max de résultats (0 = tous)')
+args = parser.parse_args()
+
+directory = Path(args.dir)
+if args.action == 'build':
+    # le fichier de l'heure courante est encore ouvert par le bot: pas d'index
+    current = datetime.utcnow().strftime('app-%Y-%m-%d-%H.jsonl')
+    built = 0
+    for path in jsonl_files(directory):
+        if path.name == current or (not args.force and load_index(path) is not None):
+            continue
+        index = build_index(path)
+        built += 1
+        print(f"{path.name}: {index['records']} enregistrements")
+    print(f'{built} index construits', file=sys.stderr)
+else:
+    stats = {}
+    shown = 0
+    for rec in query(directory, since=args.since, until=args.until, stats=stats,
+                     userId=args.user, command=args.command, guildId=args.guild):
+        print(json.dumps(rec, ensure_ascii=False))
+        shown += 1
+        if args.limit and shown >= args.limit:
+            break
+    print(f"{shown} résultats — fichiers: {stats['files']}, indexés: {stats['indexed']}, "
+          f"lectures directes: {stats['seeks']}, lignes parcourues: {stats['scanned']}", file=sys.stderr)
@@ -4,6 +4,8 @@ import json
 from logger import Logger
 logger = Logger()
 from telegram_bridge import get_bridge
+from role_resolver import get_role_resolver
+from discord_retry import get_retry_engine
 
 name = 'flushforum'
 description = 'Supprime tous les posts du forum de vérification sauf le premier épinglé.'
@@ -13,15 +15,10 @@ async def execute(interaction, **kwargs):
     try:
         # permission checks (VERIFIER_ROLE or admin)
         member = getattr(interaction, 'member', None)
-        allowed = False
-        verifier_role = os.getenv('VERIFIER_ROLE')
+        roles = kwargs.get('roles') or get_role_resolver()
+        retry = kwargs.get('retry') or get_retry_engine()
         try:
-            if member and getattr(member.guild_permissions, 'administrator', False):
-                allowed = True
-            if not allowed and verifier_role and member:
-                # best-effort: check role name membership
-                if any(r.name == verifier_role for r in getattr(member, 'roles', [])):
-                    allowed = True
+            allowed = roles.can_verify(member, 'administrator')
         except Exception:
             allowed = False
         if not allowed:
@@ -37,20 +34,25 @@ async def execute(interaction, **kwargs):
         # simplified: attempt to fetch channel and iterate threads if possible
         client = interaction.client
         try:
-            channel = await client.fetch_channel(int(forum_id))
+            channel = await retry.call('threads', lambda: client.fetch_channel(int(forum_id)))
         except Exception:
             channel = None
         if not channel:
             await interaction.followup.send('Impossible de récupérer le forum de vérification.', ephemeral=True)
             return
 
-        # For safety, create a backup of verifications.json if present
-        data_dir = os.path.join(os.getcwd(), 'data')
+        # For safety, create a backup of the verifications store
+        vm = kwargs.get('verification')
+        data_dir = str(vm.data_dir) if vm is not None else os.path.join(os.getcwd(), 'data')
         store_file = os.path.join(data_dir, 'verifications.json')
         try:
-            if os.path.exists(store_file):
-                stamp = __import__('datetime').datetime.utcnow().isoformat().replace(':','-').replace('.','-')
-                bak = store_file + '.bak.' + stamp
+            stamp = __import__('datetime').datetime.utcnow().isoformat().replace(':','-').replace('.','-')
+            bak = store_file + '.bak.' + stamp
+            if vm is not None:
+                # le store peut être SQLite: sauvegarde exportée en JSON
+                with open(bak, 'w', encoding='utf8') as fh:
+                    json.dump({'verifications': dict(vm.verifications.items())}, fh, ensure_ascii=False, indent=2)
+            elif os.path.exists(store_file):
                 __import__('shutil').copyfile(store_file, bak)
         except Exception as e:
             await interaction.followup.send('Erreur: impossible de créer la sauvegarde du store de vérifications. Opération annulée.', ephemeral=True)
@@ -61,7 +63,7 @@ async def execute(interaction, **kwargs):
         try:
             threads = []
             try:
-                fetched = await channel.threads.fetch()
+                fetched = await retry.call('threads', channel.threads.fetch)
                 threads = [t for t in getattr(fetched, 'threads', []).values()]
             except Exception:
                 threads = []
@@ -69,7 +71,7 @@ async def execute(interaction, **kwargs):
                 try:
                     # backup per thread minimally by storing starter content
                     try:
-                        starter = await t.fetch_message(t.id)
+                        starter = await retry.call('threads', lambda: t.fetch_message(t.id))
                         out = {'threadId': t.id, 'threadName': getattr(t, 'name', ''), 'starter': getattr(starter, 'content', '')}
                         odir = os.path.join(data_dir, 'thread-backups')
                         os.makedirs(odir, exist_ok=True)
@@ -77,7 +79,8 @@ async def execute(interaction, **kwargs):
                             json.dump(out, fh, ensure_ascii=False, indent=2)
                     except Exception:
                         pass
-                    await t.delete()
+                    # suppressions en série: budget partagé et reprises sur 429 via la route `threads`
+                    await retry.call('threads', t.delete)
                     deleted += 1
                 except Exception:
                     pass
@@ -86,7 +89,12 @@ async def execute(interaction, **kwargs):
 
         # Clear store
         try:
-            if os.path.exists(store_file):
+            if vm is not None:
+                # via l'enveloppe indexée pour garder les index en mémoire cohérents
+                for member_id in list(vm.verifications):
+                    del vm.verifications[member_id]
+                vm._save_store()
+            elif os.path.exists(store_file):
                 with open(store_file, 'r', encoding='utf8') as fh:
                     st = json.load(fh)
                 st['verifications'] = {}
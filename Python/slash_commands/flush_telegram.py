@@ -19,11 +19,11 @@ async def execute(interaction, **kwargs):
             return
 
         await interaction.response.defer(ephemeral=True)
-        tg = get_bridge()
+        tg = kwargs.get('telegram') or get_bridge()
         try:
-            # call internal flush implementation if available
-            if hasattr(tg, '_flush'):
-                tg._flush()
+            # async flush: runs on the bridge loop, keeps the gateway responsive
+            if hasattr(tg, 'flush'):
+                await tg.flush()
                 await interaction.followup.send("Flush Telegram exécuté (tentative d'envoi immédiat).", ephemeral=True)
             else:
                 await interaction.followup.send("Le module Telegram n'est pas disponible sur ce serveur.", ephemeral=True)
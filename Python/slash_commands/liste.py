@@ -17,7 +17,7 @@ async def execute(interaction, **kwargs):
             await interaction.response.send_message('Vous devez être administrateur pour utiliser cette commande.', ephemeral=True)
             return
 
-        tg = get_bridge()
+        tg = kwargs.get('telegram') or get_bridge()
         queue = tg.get_queue() if hasattr(tg, 'get_queue') else []
         if not queue:
             await interaction.response.send_message('✅ Aucune message en attente dans la file Telegram.', ephemeral=True)
@@ -25,7 +25,19 @@ async def execute(interaction, **kwargs):
 
         # build printable chunks
         MAX_CHUNK = 1800
-        items = [f"{i+1}. {str(q)[:1000].replace('\n',' ')}" for i, q in enumerate(queue)]
+        items = [f"{i+1}. " + str(q)[:1000].replace('\n', ' ') for i, q in enumerate(queue)]
+        depths = tg.lane_depths() if hasattr(tg, 'lane_depths') else {}
+        if depths:
+            header = 'Files: ' + ', '.join(f'{lane}={n}' for lane, n in depths.items())
+            stats = tg.backlog_stats() if hasattr(tg, 'backlog_stats') else {}
+            if stats.get('dropped') or stats.get('spilled'):
+                header += f" — évincés: {stats['dropped']} supprimés, {stats['spilled']} déversés"
+            co = tg.coalescing_stats() if hasattr(tg, 'coalescing_stats') else {}
+            if co.get('suppressed'):
+                header += f"\nLogs répétés regroupés: {co['suppressed']} lignes ({co['summaries']} résumés)"
+                for t in co.get('top') or []:
+                    header += f"\n  ×{t['suppressed']} {t['fingerprint'][:80]}"
+            items.insert(0, header)
         await interaction.response.defer(ephemeral=True)
         first = True
         current = ''
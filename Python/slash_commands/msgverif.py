@@ -1,21 +1,17 @@
 """/msgverif - publish a button message to allow users to request verification DM."""
-import os
 from logger import Logger
+from role_resolver import get_role_resolver
+from discord_retry import get_retry_engine
 logger = Logger()
 name = 'msgverif'
 description = 'Publie un message avec un bouton pour renvoyer le message de vérification'
 
 async def execute(interaction, **kwargs):
     try:
-        verifier_role = os.getenv('VERIFIER_ROLE')
+        roles = kwargs.get('roles') or get_role_resolver()
         member = getattr(interaction, 'member', None)
-        allowed = False
         try:
-            if getattr(member.guild_permissions, 'manage_guild', False):
-                allowed = True
-            if not allowed and verifier_role and member:
-                if any(r.name == verifier_role for r in getattr(member, 'roles', [])):
-                    allowed = True
+            allowed = roles.can_verify(member)
         except Exception:
             allowed = False
         if not allowed:
@@ -26,7 +22,8 @@ async def execute(interaction, **kwargs):
         try:
             await interaction.response.defer(ephemeral=True)
             if interaction.channel:
-                await interaction.channel.send('Cliquez sur le bouton ci-dessous pour recevoir le message de vérification en DM. (Bouton non supporté dans cette version simplifiée)')
+                retry = kwargs.get('retry') or get_retry_engine()
+                await retry.call('messages', lambda: interaction.channel.send('Cliquez sur le bouton ci-dessous pour recevoir le message de vérification en DM. (Bouton non supporté dans cette version simplifiée)'), idempotent=False)
             else:
                 await interaction.followup.send("Impossible d'envoyer le message de vérification ici (canal introuvable).", ephemeral=True)
         except Exception:
@@ -4,6 +4,7 @@ This module exposes `name`, `description` and async `execute(interaction)`.
 import os
 import asyncio
 from logger import Logger
+from discord_retry import get_retry_engine
 logger = Logger()
 
 name = 'say'
@@ -40,7 +41,8 @@ async def execute(interaction, **kwargs):
             if as_message:
                 await interaction.response.defer(ephemeral=True)
                 try:
-                    await interaction.channel.send(text)
+                    retry = kwargs.get('retry') or get_retry_engine()
+                    await retry.call('messages', lambda: interaction.channel.send(text), idempotent=False)
                     await interaction.followup.send('Message envoyé.', ephemeral=True)
                 except Exception as e:
                     logger.error(['Erreur lors de l\'envoi du message:', e])
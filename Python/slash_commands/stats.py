@@ -0,0 +1,45 @@
+"""/stats - live command usage counters (admin only)."""
+from logger import Logger
+from command_stats import get_command_stats
+logger = Logger()
+name = 'stats'
+description = "Affiche l'usage des commandes (période courante et cumul) (Administrateur uniquement)"
+
+async def execute(interaction, **kwargs):
+    try:
+        member = getattr(interaction, 'member', None) or getattr(interaction, 'user', None)
+        is_admin = False
+        try:
+            is_admin = getattr(member.guild_permissions, 'administrator', False)
+        except Exception:
+            is_admin = False
+        if not is_admin:
+            await interaction.response.send_message('Vous devez être administrateur pour utiliser cette commande.', ephemeral=True)
+            return
+
+        stats = kwargs.get('stats') or get_command_stats()
+        live = stats.live()
+        text = stats.summary(live['window']) + '\n\n' + stats.summary(live['total']).replace('📊', '🗂️', 1)
+        vm = kwargs.get('verification')
+        rs = getattr(vm, 'reaction_stats', None)
+        if rs:
+            text += (f"\n\nRéactions ✅/❌: {rs['seen']} vues, {rs['handled']} traitées — rejetées sans REST: "
+                     f"{rs['rejected_emoji']} emoji, {rs['rejected_channel']} hors fils de vérification; "
+                     f"{rs['rejected_permission']} sans permission, {rs['rest_calls']} appels REST")
+        scheduler = getattr(vm, 'scheduler', None)
+        if scheduler is not None:
+            q = scheduler.stats()
+            text += (f"\n\nFile de vérification: {q['depth']} en attente (la plus ancienne depuis "
+                     f"{q['oldest_wait_sec']:.0f}s), {q['running']}/{q['concurrency']} en cours, "
+                     f"{q['open']} sessions ouvertes — attente moyenne {q['avg_wait_sec']:.0f}s, "
+                     f"max {q['max_wait_sec']:.0f}s")
+        retry = kwargs.get('retry') or getattr(vm, 'retry', None)
+        if retry is not None and retry.metrics:
+            text += '\n\nAppels REST Discord par route:\n' + retry.summary()
+        await interaction.response.send_message(text[:1990], ephemeral=True)
+    except Exception as err:
+        logger.error(['Erreur /stats:', err])
+        try:
+            await interaction.followup.send('Erreur lors de la lecture des statistiques.', ephemeral=True)
+        except Exception:
+            pass
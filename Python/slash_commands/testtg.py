@@ -25,7 +25,7 @@ async def execute(interaction, **kwargs):
 
         await interaction.response.defer(ephemeral=True)
         text = f'Test Telegram depuis Discord par {interaction.user}'
-        ok = get_bridge().enqueue_verification(text)
+        ok = (kwargs.get('telegram') or get_bridge()).enqueue_verification(text)
         if ok:
             await interaction.followup.send('Message de test envoyé vers Telegram (mis en file).', ephemeral=True)
         else:
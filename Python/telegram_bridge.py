@@ -1,166 +1,808 @@
 """Pont Telegram léger qui appelle l'API HTTP de Telegram.
 
 Fonctionnalités principales:
-- queue persistée sur disque
-- flush périodique (background thread)
+- queue persistée sur disque via un journal append-only (voir `telegram_journal.py`)
+- envoi asynchrone sur une boucle asyncio dédiée (un seul thread par processus,
+  voir `get_bridge`) avec connexions HTTPS keep-alive (`telegram_transport.py`)
+- `await bridge.send(...)` / `await bridge.flush()` depuis la boucle Discord
+- cadence régulée par `RateGovernor` (token buckets global et par chat,
+  `retry_after` des 429, backoff exponentiel avec jitter sur les 5xx)
+- files prioritaires (`Lane`): les décisions de vérification partent toutes
+  les quelques secondes, les logs en lots plus espacés
+- gros backlog (après une panne) envoyé en un seul `sendDocument`
+- coalescence des logs répétés (`log_coalescer.py`) avant la file `log`
+- backlog borné (nombre d'éléments + octets) avec politique de débordement:
+  drop-oldest, drop-lowest-priority ou spill (fichier gzip de débordement)
+- cycle de vie explicite: `start()` / `drain()` / `close()`
 - split des messages trop longs
 - envoi uniquement si TELEGRAM_ENABLED=true et TELEGRAM_BOT_TOKEN/TELEGRAM_CHAT_ID fournis
 """
 import os
 import json
+import gzip
+import asyncio
+import concurrent.futures
+import random
+import re
+import tempfile
 import threading
 import time
+from collections import deque
+from contextlib import closing
+from datetime import datetime
 from pathlib import Path
 from typing import List
-import urllib.request
-import urllib.error
+
+from log_coalescer import LogCoalescer
+from rate_limit import TokenBucket
+from telegram_journal import TelegramJournal
+from telegram_transport import TelegramTransport, TelegramTransportError
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / 'data'
 DATA_DIR.mkdir(parents=True, exist_ok=True)
+# ancien format (liste JSON réécrite à chaque message), migré au démarrage
 QUEUE_FILE = DATA_DIR / 'telegram-queue.json'
+JOURNAL_DIR = DATA_DIR / 'telegram-journal'
+# éléments évincés par la politique `spill` (JSON lines, membres gzip concaténés)
+OVERFLOW_FILE = DATA_DIR / 'telegram-overflow.jsonl.gz'
+OVERFLOW_POLICIES = ('drop-oldest', 'drop-lowest-priority', 'spill')
 
 
-class TelegramBridge:
+class RateGovernor:
+    """Régulateur d'envoi Telegram: un seau global et un seau par chat.
+
+    Limites par défaut (documentation Telegram): ~30 msg/s au total, 20 msg/min
+    dans un groupe (chat_id négatif), 1 msg/s en privé.
+    """
+
     def __init__(self):
-        self._queue: List[str] = []
+        self.global_bucket = TokenBucket(
+            float(os.getenv('TELEGRAM_GLOBAL_RATE_PER_SEC', '30')),
+            float(os.getenv('TELEGRAM_GLOBAL_BURST', '30')))
+        self.group_per_min = float(os.getenv('TELEGRAM_GROUP_RATE_PER_MIN', '20'))
+        self.private_per_sec = float(os.getenv('TELEGRAM_PRIVATE_RATE_PER_SEC', '1'))
+        self.backoff_base = float(os.getenv('TELEGRAM_BACKOFF_BASE_SEC', '1'))
+        self.backoff_max = float(os.getenv('TELEGRAM_BACKOFF_MAX_SEC', '60'))
+        self.chats = {}
+        self.rate_limited = 0
+        self.server_errors = 0
+
+    def bucket(self, chat_id) -> TokenBucket:
+        key = str(chat_id)
+        b = self.chats.get(key)
+        if b is None:
+            if key.startswith('-'):
+                b = TokenBucket(self.group_per_min / 60.0, self.group_per_min)
+            else:
+                b = TokenBucket(self.private_per_sec, max(1.0, self.private_per_sec))
+            self.chats[key] = b
+        return b
+
+    def wait_time(self, chat_id) -> float:
+        now = time.monotonic()
+        return max(self.global_bucket.wait_time(now), self.bucket(chat_id).wait_time(now))
+
+    async def acquire(self, chat_id):
+        """Attend qu'un envoi vers `chat_id` soit autorisé puis consomme les jetons."""
+        while True:
+            wait = self.wait_time(chat_id)
+            if wait <= 0:
+                now = time.monotonic()
+                self.global_bucket.take(now)
+                self.bucket(chat_id).take(now)
+                return
+            await asyncio.sleep(wait)
+
+    def on_success(self, chat_id):
+        self.bucket(chat_id).reward()
+
+    def on_rate_limited(self, chat_id, retry_after: float):
+        self.rate_limited += 1
+        self.bucket(chat_id).penalize(max(1.0, float(retry_after)))
+
+    def backoff(self, attempt: int) -> float:
+        """Délai exponentiel avec jitter (5xx / erreurs réseau)."""
+        self.server_errors += 1
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+
+        def _b(b):
+            wait = b.wait_time(now)
+            return {'tokens': round(b.tokens, 2), 'rate': round(b.rate, 3), 'wait': round(wait, 2)}
+        return {
+            'global': _b(self.global_bucket),
+            'chats': {k: _b(v) for k, v in self.chats.items()},
+            'rateLimited': self.rate_limited,
+            'serverErrors': self.server_errors,
+        }
+
+
+_LEVEL_RE = re.compile(r'\[(DEBUG|INFO|WARN|ERROR)\]')
+
+
+def _document_line(text: str) -> str:
+    return text if text.endswith('\n') else text + '\n'
+
+
+def _size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode('utf8'))
+
+
+def _retry_after(resp) -> float:
+    try:
+        return float((resp.body.get('parameters') or {}).get('retry_after'))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(resp.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class Lane:
+    """File nommée du pont: priorité, intervalle de flush et budget de taille par lot.
+
+    `items` contient des (seq, text), seq étant la clé d'acquittement du journal.
+    `document_threshold` (octets, 0 = jamais): au-delà, tout le backlog de la
+    file part en une seule pièce jointe au lieu de dizaines de messages.
+    """
+
+    def __init__(self, name: str, priority: int, interval: float, max_batch_chars: int,
+                 document_threshold: int = 0):
+        self.name = name
+        self.priority = priority
+        self.interval = max(1.0, float(interval))
+        self.max_batch_chars = max(1000, int(max_batch_chars))
+        self.items = deque()
+        self.bytes = 0
+        self.next_due = 0.0
+        # au-delà de ce volume, le lot part en un seul fichier (sendDocument)
+        self.document_threshold = document_threshold
+
+    def batch(self):
+        """Premiers éléments de la file, dans la limite de `max_batch_chars` (au moins un)."""
+        out, size = [], 0
+        for item in self.items:
+            if out and size + len(item[1]) > self.max_batch_chars:
+                break
+            out.append(item)
+            size += len(item[1])
+        return out
+
+
+def _default_lanes():
+    return [
+        Lane('verification', 0,
+             float(os.getenv('TELEGRAM_VERIFICATION_INTERVAL_SEC', '2')),
+             int(os.getenv('TELEGRAM_VERIFICATION_MAX_BATCH_CHARS', '20000'))),
+        Lane('log', 10,
+             float(os.getenv('TELEGRAM_LOG_INTERVAL_SEC') or os.getenv('TELEGRAM_BATCH_INTERVAL_SEC', '15')),
+             int(os.getenv('TELEGRAM_LOG_MAX_BATCH_CHARS', '40000')),
+             int(os.getenv('TELEGRAM_DOCUMENT_THRESHOLD_BYTES', '50000'))),
+    ]
+
+
+class TelegramBridge:
+    DEFAULT_LANE = 'log'
+
+    def __init__(self, journal_dir: Path = None):
+        self._lanes = {}
+        for lane in _default_lanes():
+            self.add_lane(lane)
+        self._seq = 0
         self._lock = threading.Lock()
+        # bornes du backlog (toutes files confondues)
+        self._max_items = max(1, int(os.getenv('TELEGRAM_QUEUE_MAX_ITEMS', '10000')))
+        self._max_bytes = max(1024, int(os.getenv('TELEGRAM_QUEUE_MAX_BYTES', str(8 * 1024 * 1024))))
+        policy = os.getenv('TELEGRAM_OVERFLOW_POLICY', 'drop-oldest').lower()
+        self._overflow_policy = policy if policy in OVERFLOW_POLICIES else 'drop-oldest'
+        self._items = 0
+        self._bytes = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._spill_buffer = []
+        self._document_gzip = os.getenv('TELEGRAM_DOCUMENT_GZIP', '').lower() == 'true'
+        self._documents_sent = 0
+        self._journal = TelegramJournal(journal_dir or JOURNAL_DIR)
         self._load()
-        self._flush_interval = int(os.getenv('TELEGRAM_BATCH_INTERVAL_SEC', '15'))
+        self._coalescer = LogCoalescer(lambda text: self.enqueue(text, 'log'))
         self._max_message_size = int(os.getenv('TELEGRAM_MAX_MESSAGE_SIZE', '3800'))
         self._token = os.getenv('TELEGRAM_BOT_TOKEN')
         self._chat_id = os.getenv('TELEGRAM_CHAT_ID')
         self._enabled = (os.getenv('TELEGRAM_ENABLED', '').lower() == 'true')
-        self._stop = False
-        self._thread = threading.Thread(target=self._periodic_flush, daemon=True)
-        self._thread.start()
+        self._transport = TelegramTransport(self._token)
+        self._governor = RateGovernor()
+        self._max_attempts = max(1, int(os.getenv('TELEGRAM_MAX_ATTEMPTS', '5')))
+        # attente max d'un appelant synchrone (send_immediate)
+        self._sync_timeout = float(os.getenv('TELEGRAM_SYNC_TIMEOUT_SEC', '10'))
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._drain_on_close = True
+        self._flushing = False
+        self._thread = None
+        self._loop = None
+        self._wakeup = None
+        self._state_lock = threading.Lock()
+
+    def add_lane(self, lane: Lane):
+        """Déclare une file supplémentaire (à faire avant `start()`)."""
+        self._lanes[lane.name] = lane
+        self._lane_order = sorted(self._lanes.values(), key=lambda l: l.priority)
+
+    def _lane(self, name: str) -> Lane:
+        return self._lanes.get(name) or self._lanes[self.DEFAULT_LANE]
 
     def _load(self):
         try:
-            if QUEUE_FILE.exists():
-                raw = QUEUE_FILE.read_text(encoding='utf8')
-                parsed = json.loads(raw or '[]')
-                if isinstance(parsed, list):
-                    self._queue = [str(x) for x in parsed]
+            items, max_seq = self._journal.replay()
+            for seq, text, lane in items:
+                target = self._lane(lane)
+                target.items.append((seq, text))
+                self._account(target, 1, _size(text))
+            self._seq = max_seq
+        except Exception:
+            for lane in self._lane_order:
+                lane.items.clear()
+                lane.bytes = 0
+            self._items = self._bytes = 0
+        self._migrate_legacy_queue()
+        with self._lock:
+            self._enforce_bounds()
+        self._write_spill()
+
+    def _migrate_legacy_queue(self):
+        """Importe une ancienne `telegram-queue.json` dans le journal puis la vide."""
+        try:
+            if not QUEUE_FILE.exists():
+                return
+            parsed = json.loads(QUEUE_FILE.read_text(encoding='utf8') or '[]')
+            if not isinstance(parsed, list) or not parsed:
+                return
+            for x in parsed:
+                self._append(str(x))
+            self._journal.sync()
+            QUEUE_FILE.write_text('[]', encoding='utf8')
+        except Exception:
+            pass
+
+    def _append(self, text: str, lane: str = DEFAULT_LANE):
+        target = self._lane(lane)
+        self._seq += 1
+        self._journal.append_add(self._seq, text, target.name)
+        target.items.append((self._seq, text))
+        self._account(target, 1, _size(text))
+        self._enforce_bounds()
+
+    def _account(self, lane: Lane, items: int, size: int):
+        """Met à jour les compteurs (global et par file) après ajout/retrait d'éléments."""
+        self._items += items
+        self._bytes += size
+        lane.bytes += size
+
+    def _enforce_bounds(self):
+        """Applique la politique de débordement tant que le backlog dépasse ses bornes."""
+        evicted = []
+        while self._items > self._max_items or self._bytes > self._max_bytes:
+            if self._overflow_policy == 'drop-oldest':
+                lanes = [l for l in self._lane_order if l.items]
+                victim = min(lanes, key=lambda l: l.items[0][0]) if lanes else None
+            else:
+                victim = next((l for l in reversed(self._lane_order) if l.items), None)
+            if victim is None:
+                break
+            seq, text = victim.items.popleft()
+            self._account(victim, -1, -_size(text))
+            if self._overflow_policy == 'spill':
+                # acquitté dans le journal seulement une fois écrit dans OVERFLOW_FILE
+                self._spill_buffer.append({'seq': seq, 'lane': victim.name, 'text': text})
+                self._spilled += 1
+            else:
+                evicted.append(seq)
+                self._dropped += 1
+        if evicted:
+            self._journal.append_ack(evicted)
+
+    def _write_spill(self):
+        """Écrit les éléments évincés (politique `spill`) dans le fichier de débordement gzip."""
+        with self._lock:
+            pending, self._spill_buffer = self._spill_buffer, []
+        if not pending:
+            return
+        try:
+            with gzip.open(OVERFLOW_FILE, 'at', encoding='utf8') as fh:
+                for rec in pending:
+                    fh.write(json.dumps(rec, ensure_ascii=False) + '\n')
+            self._journal.append_ack(rec['seq'] for rec in pending)
         except Exception:
-            self._queue = []
+            pass
 
     def _persist(self):
+        """Force l'écriture sur disque des enregistrements du journal non encore fsyncés."""
         try:
-            tmp = str(QUEUE_FILE) + '.tmp'
-            with open(tmp, 'w', encoding='utf8') as fh:
-                json.dump(self._queue, fh, indent=2, ensure_ascii=False)
-            os.replace(tmp, QUEUE_FILE)
+            self._journal.sync()
         except Exception:
             pass
 
-    def enqueue_log(self, text: str) -> bool:
+    def _compact_if_needed(self):
+        try:
+            if self._journal.needs_compaction():
+                self._journal.compact(self._snapshot)
+        except Exception:
+            pass
+
+    def _snapshot(self):
+        with self._lock:
+            return [(seq, text, lane.name) for lane in self._lane_order for seq, text in lane.items]
+
+    def enqueue(self, text: str, lane: str = DEFAULT_LANE) -> bool:
         if not text:
             return False
         with self._lock:
-            self._queue.append(str(text))
-            self._persist()
+            try:
+                self._append(str(text), lane)
+            except Exception:
+                return False
+        return True
+
+    def enqueue_log(self, text: str) -> bool:
+        """Ajoute une ligne de log; les répétitions sont regroupées par `LogCoalescer`."""
+        if not text:
+            return False
+        self._coalescer.offer(str(text))
         return True
 
     def enqueue_verification(self, text: str) -> bool:
-        return self.enqueue_log(text)
+        return self.enqueue(text, 'verification')
 
-    def send_immediate(self, text: str, parse_mode: str = 'HTML') -> bool:
-        """Send a message immediately (synchronous). Returns True on success."""
-        if not self._enabled or not self._token or not self._chat_id:
-            return False
-        try:
-            chunks = self._split_chunks(text)
-            for c in chunks:
-                self._http_send({'chat_id': self._chat_id, 'text': c, 'parse_mode': parse_mode})
-                time.sleep(0.25)
-            return True
-        except Exception:
-            return False
+    def rate_status(self) -> dict:
+        """Jetons disponibles et temps d'attente courants (global et par chat)."""
+        return self._governor.snapshot()
 
     def get_queue(self) -> List[str]:
+        """Textes en attente, par ordre de priorité des files."""
         with self._lock:
-            return list(self._queue)
+            return [text for lane in self._lane_order for _, text in lane.items]
 
-    def _split_chunks(self, text: str) -> List[str]:
-        if not text:
-            return []
+    def backlog_stats(self) -> dict:
+        """Taille du backlog, bornes et compteurs d'éléments évincés."""
+        with self._lock:
+            return {
+                'items': self._items, 'bytes': self._bytes,
+                'maxItems': self._max_items, 'maxBytes': self._max_bytes,
+                'policy': self._overflow_policy,
+                'dropped': self._dropped, 'spilled': self._spilled,
+                'documents': self._documents_sent,
+            }
+
+    def coalescing_stats(self) -> dict:
+        """Compteurs de suppression des logs répétés."""
+        return self._coalescer.stats()
+
+    def lane_depths(self) -> dict:
+        """Nombre d'éléments en attente par file, par ordre de priorité."""
+        with self._lock:
+            return {lane.name: len(lane.items) for lane in self._lane_order}
+
+    def _cut(self, text: str) -> int:
+        """Longueur du premier morceau de `text` (coupé au dernier saut de ligne si possible)."""
         max_size = max(1000, int(self._max_message_size))
+        if len(text) <= max_size:
+            return len(text)
+        # try to cut at last newline
+        cut = text.rfind('\n', 0, max_size)
+        if cut < int(max_size * 0.6):
+            cut = max_size
+        return cut
+
+    def _split_chunks(self, text: str) -> List[str]:
         chunks = []
-        remaining = text
+        remaining = text or ''
         while remaining:
-            if len(remaining) <= max_size:
-                chunks.append(remaining)
-                break
-            # try to cut at last newline
-            cut = remaining.rfind('\n', 0, max_size)
-            if cut < int(max_size * 0.6):
-                cut = max_size
+            cut = self._cut(remaining)
             chunks.append(remaining[:cut])
             remaining = remaining[cut:]
         return chunks
 
-    def _http_send(self, payload: dict):
-        if not self._token:
-            raise RuntimeError('Telegram token not configured')
-        url = f'https://api.telegram.org/bot{self._token}/sendMessage'
-        data = json.dumps(payload).encode('utf8')
-        req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            # basic check
-            raw = resp.read(200)
-            return raw
+    def _plan_chunks(self, batch):
+        """Regroupe les éléments (seq, text) en messages de taille max.
 
-    def _flush(self):
-        if not self._enabled or not self._token or not self._chat_id:
+        Retourne une liste de (texte, seqs terminées, partiel) où `partiel` vaut
+        (seq, caractères restants) quand le message ne contient que le début
+        d'un élément trop long.
+        """
+        sep = '\n\n---\n\n'
+        max_size = max(1000, int(self._max_message_size))
+        chunks = []
+        cur, cur_len, cur_done = [], 0, []
+        for seq, text in batch:
+            while text:
+                extra = len(sep) if cur else 0
+                if cur_len + extra + len(text) <= max_size:
+                    cur.append(text)
+                    cur_len += extra + len(text)
+                    cur_done.append(seq)
+                    text = ''
+                elif cur:
+                    chunks.append((sep.join(cur), cur_done, None))
+                    cur, cur_len, cur_done = [], 0, []
+                else:
+                    cut = self._cut(text)
+                    piece, text = text[:cut], text[cut:]
+                    chunks.append((piece, [], (seq, len(text))))
+        if cur:
+            chunks.append((sep.join(cur), cur_done, None))
+        return chunks
+
+    # -- envoi (boucle asyncio dédiée) ----------------------------------
+
+    def _configured(self) -> bool:
+        return bool(self._enabled and self._token and self._chat_id)
+
+    async def _call(self, method: str, payload: dict, sender=None):
+        """Appel API régulé: attend le governor, respecte retry_after, réessaie les 5xx.
+
+        `sender` (optionnel) remplace l'appel JSON par défaut, p.ex. pour un upload.
+        """
+        chat_id = payload.get('chat_id')
+        last = None
+        for attempt in range(self._max_attempts):
+            await self._governor.acquire(chat_id)
+            final = attempt + 1 >= self._max_attempts
+            try:
+                resp = await (sender() if sender else self._transport.call(method, payload))
+            except (TelegramTransportError, OSError) as e:
+                # hôte injoignable (DNS, connexion refusée) compris: même délai et même budget que les 5xx
+                last = e if isinstance(e, TelegramTransportError) else TelegramTransportError(str(e) or e.__class__.__name__)
+                if not final:
+                    await asyncio.sleep(self._governor.backoff(attempt))
+                continue
+            if resp.ok:
+                self._governor.on_success(chat_id)
+                return resp
+            last = TelegramTransportError(f"{method} HTTP {resp.status}: {resp.body.get('description', '')}")
+            if resp.status == 429:
+                # l'attente est portée par le seau du chat (blocked_until)
+                self._governor.on_rate_limited(chat_id, _retry_after(resp))
+            elif resp.status >= 500:
+                if not final:
+                    await asyncio.sleep(self._governor.backoff(attempt))
+            else:
+                raise last
+        raise last or TelegramTransportError(f'{method}: retries exhausted')
+
+    async def _send_chunk(self, text: str, parse_mode: str = None):
+        payload = {'chat_id': self._chat_id, 'text': text}
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+        return await self._call('sendMessage', payload)
+
+    async def _send(self, text: str, parse_mode: str = None) -> bool:
+        if not self._configured():
+            return False
+        for c in self._split_chunks(text):
+            await self._send_chunk(c, parse_mode)
+        return True
+
+    async def _flush_async(self, force: bool = True):
+        """Envoie les files échues (toutes si `force`), par ordre de priorité.
+
+        En mode périodique, chaque file envoie au plus un lot (`max_batch_chars`)
+        par échéance; en mode `force` (flush/drain) les lots s'enchaînent tant
+        que les envois réussissent.
+        """
+        if force:
+            self._coalescer.flush_expired(force=True)
+        if not self._configured():
             # nothing to do, but keep queue persisted
             self._persist()
             return
+        # un seul flush à la fois (périodique et /flush-telegram partagent la boucle)
+        if self._flushing:
+            return
+        self._flushing = True
+        try:
+            now = time.monotonic()
+            for lane in self._lane_order:
+                if not force and now < lane.next_due:
+                    continue
+                lane.next_due = now + lane.interval
+                while await self._flush_lane(lane) and force:
+                    pass
+        finally:
+            self._flushing = False
+            self._persist()
+
+    async def _flush_lane(self, lane: Lane) -> bool:
+        """Envoie un lot de `lane`. Retourne True si tout le lot est parti et qu'il en reste."""
         with self._lock:
-            if not self._queue:
-                return
-            joined = '\n\n---\n\n'.join(self._queue)
-            chunks = self._split_chunks(joined)
+            as_document = bool(lane.document_threshold) and lane.bytes > lane.document_threshold
+            batch = list(lane.items) if as_document else lane.batch()
+        if not batch:
+            return False
+        if as_document:
+            return await self._flush_lane_document(lane, batch)
+        for text, done, partial in self._plan_chunks(batch):
+            try:
+                await self._send_chunk(text)
+            except Exception:
+                # stop here: the next flush resumes from the first undelivered item
+                return False
+            self._commit_progress(lane, done, partial)
+        with self._lock:
+            return bool(lane.items)
+
+    async def _flush_lane_document(self, lane: Lane, batch) -> bool:
+        """Envoie tout le backlog de `lane` en une pièce jointe (sendDocument).
+
+        Le document est lu en flux depuis les segments du journal, en deux
+        passes (taille et résumé par niveau, puis envoi): le backlog n'est
+        recopié ni en mémoire ni dans un fichier temporaire. Il commence par le
+        résumé, repris en légende. Avec TELEGRAM_DOCUMENT_GZIP=true la taille
+        n'est connue qu'après compression: le flux du journal est compressé
+        dans un fichier temporaire.
+        """
+        lengths = {seq: len(text) for seq, text in batch}
+
+        def texts():
+            return self._journal.iter_texts(lengths)
+
+        levels, size, count = self._document_stats(texts())
+        if count != len(batch):
+            # journal incomplet (segment illisible ou supprimé): repli sur la file en mémoire
+            def texts():
+                return (item for item in batch)
+            levels, size, count = self._document_stats(texts())
+        summary = f"📦 Backlog Telegram ({lane.name}): {count} messages — " + \
+            ', '.join(f'{k}: {v}' for k, v in sorted(levels.items()))
+        header = (summary + '\n\n').encode('utf8')
+
+        def blocks():
+            yield header
+            buf, buf_len = [], 0
+            with closing(texts()) as it:
+                for _, text in it:
+                    data = _document_line(text).encode('utf8')
+                    buf.append(data)
+                    buf_len += len(data)
+                    if buf_len >= 64 * 1024:
+                        yield b''.join(buf)
+                        buf, buf_len = [], 0
+            if buf:
+                yield b''.join(buf)
+
+        fields = {'chat_id': self._chat_id, 'caption': summary[:1024]}
+        stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+        tmp = None
         try:
-            for c in chunks:
-                self._http_send({'chat_id': self._chat_id, 'text': c})
-                time.sleep(0.3)
-            # clear queue on success
-            with self._lock:
-                self._queue.clear()
-                self._persist()
+            if self._document_gzip:
+                fd, tmp = tempfile.mkstemp(prefix='telegram-backlog-', suffix='.txt.gz')
+                os.close(fd)
+                with gzip.open(tmp, 'wb') as fh:
+                    for block in blocks():
+                        fh.write(block)
+                filename = f'backlog-{lane.name}-{stamp}.txt.gz'
+                sender = lambda: self._transport.upload('sendDocument', fields, 'document', filename, tmp)
+            else:
+                filename = f'backlog-{lane.name}-{stamp}.txt'
+                sender = lambda: self._transport.upload_stream('sendDocument', fields, 'document', filename,
+                                                               len(header) + size, blocks, 'text/plain; charset=utf-8')
+            await self._call('sendDocument', fields, sender=sender)
         except Exception:
-            # keep queue and persist
-            self._persist()
+            return False
+        finally:
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+        self._documents_sent += 1
+        self._commit_progress(lane, [seq for seq, _ in batch], None)
+        with self._lock:
+            return bool(lane.items)
+
+    @staticmethod
+    def _document_stats(items):
+        """(lignes par niveau, taille en octets, nombre d'éléments) d'un document de backlog."""
+        levels, size, count = {}, 0, 0
+        with closing(items):
+            for _, text in items:
+                count += 1
+                size += len(_document_line(text).encode('utf8'))
+                m = _LEVEL_RE.search(text)
+                level = m.group(1) if m else 'AUTRE'
+                levels[level] = levels.get(level, 0) + 1
+        return levels, size, count
+
+    def _commit_progress(self, lane: Lane, done, partial):
+        """Acquitte les éléments livrés par un message et persiste le curseur d'un élément partiel.
 
-    def _periodic_flush(self):
-        while not self._stop:
+        Seuls les seq livrés sont retirés: les éléments ajoutés pendant le
+        flush restent en file.
+        """
+        with self._lock:
+            items = lane.items
+            if done:
+                self._journal.append_ack(done)
+                acked = set(done)
+                while items and items[0][0] in acked:
+                    seq, text = items.popleft()
+                    acked.discard(seq)
+                    self._account(lane, -1, -_size(text))
+                if acked:
+                    # rare: élément acquitté hors de la tête de file
+                    for seq, text in items:
+                        if seq in acked:
+                            self._account(lane, -1, -_size(text))
+                    lane.items = items = deque(item for item in items if item[0] not in acked)
+            if partial:
+                seq, rest = partial
+                self._journal.append_cursor(seq, rest)
+                for i, (s, text) in enumerate(items):
+                    if s == seq:
+                        items[i] = (seq, text[len(text) - rest:])
+                        self._account(lane, 0, _size(items[i][1]) - _size(text))
+                        break
+
+    async def _on_bridge_loop(self, coro):
+        """Exécute `coro` sur la boucle du pont et l'attend depuis la boucle appelante."""
+        loop = self._loop
+        if loop is None or not loop.is_running() or loop is asyncio.get_running_loop():
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def _run_sync(self, coro, timeout: float = None, start: bool = False):
+        """Variante bloquante pour les appelants synchrones (hors boucle asyncio).
+
+        La coroutine s'exécute sur la boucle du pont (démarrée au besoin si
+        `start`) pour réutiliser ses connexions keep-alive; passé `timeout` elle
+        est annulée (concurrent.futures.TimeoutError). Sans boucle du pont
+        (`drain` d'un pont non démarré ou arrêté), boucle temporaire.
+        """
+        if start and not self.running and not self._stop.is_set():
+            self.start()
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            if threading.current_thread() is self._thread:
+                coro.close()
+                raise RuntimeError('appel bloquant depuis la boucle du pont')
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+            try:
+                return future.result(timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise
+        return asyncio.run(coro)
+
+    async def send(self, text: str, parse_mode: str = 'HTML') -> bool:
+        """Envoie `text` immédiatement, sans passer par la file. Retourne True si envoyé."""
+        try:
+            return await self._on_bridge_loop(self._send(text, parse_mode))
+        except Exception:
+            return False
+
+    async def flush(self):
+        """Envoie immédiatement la file (awaitable depuis la boucle Discord)."""
+        await self._on_bridge_loop(self._flush_async())
+
+    def send_immediate(self, text: str, parse_mode: str = 'HTML') -> bool:
+        """Send a message immediately (synchronous). Returns True on success.
+
+        Waits at most TELEGRAM_SYNC_TIMEOUT_SEC; on timeout the send is cancelled and False is returned.
+        """
+        try:
+            return self._run_sync(self._send(text, parse_mode), timeout=self._sync_timeout, start=True)
+        except Exception:
+            return False
+
+    def _flush(self):
+        self._run_sync(self._flush_async())
+
+    # -- cycle de vie ------------------------------------------------------
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._wakeup = asyncio.Event()
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_until_complete(self._periodic_flush())
+        finally:
+            try:
+                loop.run_until_complete(self._transport.close())
+            finally:
+                self._loop = None
+                loop.close()
+
+    async def _periodic_flush(self):
+        tick = min(lane.interval for lane in self._lane_order)
+        while not self._stop.is_set():
+            self._coalescer.flush_expired()
+            try:
+                await self._flush_async(force=False)
+            except Exception:
+                pass
+            self._compact_if_needed()
+            self._write_spill()
             try:
-                self._flush()
+                await asyncio.wait_for(self._wakeup.wait(), timeout=tick)
+            except asyncio.TimeoutError:
+                pass
+        if self._drain_on_close:
+            try:
+                await self._flush_async()
             except Exception:
                 pass
-            time.sleep(max(1, int(self._flush_interval)))
 
-    def stop(self):
-        self._stop = True
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'TelegramBridge':
+        """Démarre le thread de la boucle d'envoi et du flush périodique (idempotent)."""
+        with self._state_lock:
+            if not self.running and not self._stop.is_set():
+                self._ready.clear()
+                self._thread = threading.Thread(target=self._run_loop, name='telegram-flush', daemon=True)
+                self._thread.start()
+                self._ready.wait(timeout=5)
+        return self
+
+    def drain(self) -> bool:
+        """Tente un flush immédiat; retourne True si la file est vide ensuite."""
         try:
-            self._thread.join(timeout=2)
+            self._flush()
         except Exception:
             pass
+        self._persist()
+        with self._lock:
+            return not any(lane.items for lane in self._lane_order)
+
+    def close(self, drain: bool = True):
+        """Arrête la boucle d'envoi (après un dernier flush si `drain`) et ferme le journal."""
+        with self._state_lock:
+            self._stop.set()
+            self._drain_on_close = drain
+            thread, loop = self._thread, self._loop
+        if thread is not None and thread.is_alive():
+            if loop is not None:
+                try:
+                    loop.call_soon_threadsafe(self._wakeup.set)
+                except RuntimeError:
+                    pass
+            thread.join(timeout=15)
+        elif drain:
+            self.drain()
+        self._write_spill()
+        self._journal.close()
+
+    def stop(self):
+        self.close(drain=False)
 
 
 _singleton = None
+_singleton_lock = threading.Lock()
 
 
-def _get_singleton() -> TelegramBridge:
+def get_bridge() -> TelegramBridge:
+    """Retourne le pont du processus, créé et démarré une seule fois."""
     global _singleton
-    if _singleton is None:
-        _singleton = TelegramBridge()
-    return _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = TelegramBridge()
+            _singleton.start()
+        return _singleton
 
 
-def get_bridge() -> TelegramBridge:
-    return _get_singleton()
+def set_bridge(bridge: TelegramBridge):
+    """Remplace le pont du processus (injection depuis `Bot`, ou tests)."""
+    global _singleton
+    with _singleton_lock:
+        _singleton = bridge
 
 
-__all__ = ['TelegramBridge', 'get_bridge']
+__all__ = ['TelegramBridge', 'Lane', 'RateGovernor', 'TokenBucket', 'get_bridge', 'set_bridge']
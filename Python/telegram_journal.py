@@ -0,0 +1,275 @@
+"""Journal append-only (write-ahead log) pour la file Telegram.
+
+Remplace la réécriture complète de `telegram-queue.json` à chaque message:
+- chaque ajout écrit une seule ligne JSON dans le segment courant
+- les flush écrivent un marqueur d'acquittement (`ack`) par morceau envoyé,
+  et un curseur pour un élément partiellement envoyé
+- fsync groupés (par nombre d'enregistrements ou par délai)
+- rotation des segments par taille et compaction en arrière-plan
+- relecture (replay) au démarrage: ajouts moins acquittements
+
+Format d'une ligne:
+    {"op": "add", "seq": 12, "text": "...", "lane": "log"}
+    {"op": "ack", "seqs": [10, 11, 12]}
+    {"op": "cursor", "seq": 13, "rest": 420}   (élément 13 partiellement envoyé:
+                                                 il reste ses 420 derniers caractères)
+    {"op": "seq", "max": 12}          (en tête d'un segment compacté)
+"""
+import os
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+SEGMENT_PREFIX = 'seg-'
+SEGMENT_SUFFIX = '.log'
+
+
+def _segment_name(index: int) -> str:
+    return f'{SEGMENT_PREFIX}{index:08d}{SEGMENT_SUFFIX}'
+
+
+def _segment_index(path: Path) -> int:
+    try:
+        return int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+    except ValueError:
+        return -1
+
+
+class TelegramJournal:
+    """Journal segmenté et thread-safe.
+
+    Les appels à `append_add`/`append_ack` sont O(1) quelle que soit la taille
+    de la file; seul `compact()` réécrit les éléments vivants, hors du chemin
+    d'enqueue.
+    """
+
+    def __init__(self, directory: Path, segment_max_bytes: int = None,
+                 fsync_batch: int = None, fsync_interval: float = None):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes or int(os.getenv('TELEGRAM_JOURNAL_SEGMENT_BYTES', str(4 * 1024 * 1024)))
+        self.fsync_batch = fsync_batch or int(os.getenv('TELEGRAM_JOURNAL_FSYNC_BATCH', '64'))
+        self.fsync_interval = fsync_interval if fsync_interval is not None else float(os.getenv('TELEGRAM_JOURNAL_FSYNC_INTERVAL_SEC', '1'))
+        self._lock = threading.Lock()
+        self._fh = None
+        self._index = 0
+        self._size = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._max_seq = 0
+        # statistiques utilisées par compact() et par les benchmarks
+        self.bytes_written = 0
+        self._dead_records = 0
+        self._live_records = 0
+        # lectures en flux en cours (iter_texts): la compaction attend
+        self._readers = 0
+
+    # -- relecture -----------------------------------------------------
+
+    def _segments(self) -> List[Path]:
+        segs = [p for p in self.dir.glob(f'{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}') if _segment_index(p) >= 0]
+        return sorted(segs, key=_segment_index)
+
+    def replay(self) -> Tuple[List[Tuple[int, str, str]], int]:
+        """Relit tous les segments.
+
+        Retourne les éléments non acquittés (seq, text, lane) et la plus grande seq
+        rencontrée (les nouvelles seq doivent la dépasser, sinon un ancien
+        `ack` masquerait un nouvel ajout). Une dernière ligne tronquée (crash
+        pendant l'écriture) est ignorée. Ouvre ensuite un nouveau segment pour
+        les écritures suivantes.
+        """
+        adds: Dict[int, Tuple[str, str]] = {}
+        acked = set()
+        cursors: Dict[int, int] = {}
+        max_seq = 0
+        segs = self._segments()
+        for seg in segs:
+            try:
+                with open(seg, 'r', encoding='utf8') as fh:
+                    for line in fh:
+                        try:
+                            rec = json.loads(line)
+                        except ValueError:
+                            continue
+                        op = rec.get('op')
+                        if op == 'add':
+                            adds[int(rec['seq'])] = (str(rec.get('text', '')), rec.get('lane') or 'log')
+                        elif op == 'ack':
+                            acked.update(int(s) for s in rec.get('seqs') or [])
+                        elif op == 'cursor':
+                            seq, rest = int(rec['seq']), int(rec['rest'])
+                            cursors[seq] = min(rest, cursors.get(seq, rest))
+                        elif op == 'seq':
+                            max_seq = max(max_seq, int(rec.get('max') or 0))
+            except OSError:
+                continue
+        live = []
+        for seq, (text, lane) in sorted(adds.items()):
+            if seq in acked:
+                continue
+            rest = cursors.get(seq)
+            if rest is not None and rest < len(text):
+                text = text[len(text) - rest:]
+            live.append((seq, text, lane))
+        max_seq = max(max_seq, max(adds, default=0), max(acked, default=0))
+        with self._lock:
+            self._max_seq = max_seq
+            self._index = (_segment_index(segs[-1]) + 1) if segs else 0
+            self._live_records = len(live)
+            self._dead_records = len(adds) - len(live) + len(acked)
+            self._open_segment()
+        return live, max_seq
+
+    def iter_texts(self, lengths: Dict[int, int]) -> Iterator[Tuple[int, str]]:
+        """Relit en flux les textes des éléments `lengths` (seq -> caractères restants), par seq croissante.
+
+        Sert à exporter un gros backlog sans le recopier: une ligne de segment
+        à la fois. Les doublons de seq (compaction) sont ignorés; la compaction
+        est suspendue tant que l'itérateur n'est pas épuisé ou fermé.
+        """
+        with self._lock:
+            if self._fh:
+                self._fh.flush()
+            self._readers += 1
+        try:
+            last = 0
+            for seg in self._segments():
+                try:
+                    fh = open(seg, 'r', encoding='utf8')
+                except OSError:
+                    continue
+                with fh:
+                    for line in fh:
+                        if '"add"' not in line:
+                            continue
+                        try:
+                            rec = json.loads(line)
+                            seq = int(rec['seq'])
+                        except (ValueError, KeyError, TypeError):
+                            continue
+                        rest = lengths.get(seq)
+                        if rec.get('op') != 'add' or rest is None or seq <= last:
+                            continue
+                        last = seq
+                        text = str(rec.get('text', ''))
+                        yield seq, (text[len(text) - rest:] if rest < len(text) else text)
+        finally:
+            with self._lock:
+                self._readers -= 1
+
+    # -- écriture ------------------------------------------------------
+
+    def _open_segment(self):
+        if self._fh:
+            self._sync_locked()
+            self._fh.close()
+        path = self.dir / _segment_name(self._index)
+        self._fh = open(path, 'a', encoding='utf8')
+        self._size = path.stat().st_size
+
+    def _write_locked(self, rec: dict):
+        line = json.dumps(rec, ensure_ascii=False) + '\n'
+        self._fh.write(line)
+        n = len(line.encode('utf8')) if not line.isascii() else len(line)
+        self._size += n
+        self.bytes_written += n
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_batch or (time.monotonic() - self._last_sync) >= self.fsync_interval:
+            self._sync_locked()
+        if self._size >= self.segment_max_bytes:
+            self._index += 1
+            self._open_segment()
+
+    def _sync_locked(self):
+        if not self._fh or not self._unsynced:
+            return
+        try:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        except OSError:
+            pass
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append_add(self, seq: int, text: str, lane: str = 'log'):
+        with self._lock:
+            self._write_locked({'op': 'add', 'seq': seq, 'text': text, 'lane': lane})
+            self._live_records += 1
+            if seq > self._max_seq:
+                self._max_seq = seq
+
+    def append_ack(self, seqs: Iterable[int]):
+        seqs = list(seqs)
+        if not seqs:
+            return
+        with self._lock:
+            self._write_locked({'op': 'ack', 'seqs': seqs})
+            self._live_records -= len(seqs)
+            self._dead_records += 2 * len(seqs)
+
+    def append_cursor(self, seq: int, rest: int):
+        """Progression d'un élément envoyé en plusieurs morceaux: `rest` caractères restants."""
+        with self._lock:
+            self._write_locked({'op': 'cursor', 'seq': seq, 'rest': rest})
+            self._dead_records += 1
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    # -- compaction ----------------------------------------------------
+
+    def needs_compaction(self) -> bool:
+        """Vrai quand il y a des segments fermés et que la majorité des enregistrements est morte."""
+        with self._lock:
+            return (self._index > 0 and not self._readers
+                    and self._dead_records > max(1024, self._live_records))
+
+    def compact(self, live_snapshot):
+        """Réécrit les éléments vivants dans un segment unique et supprime les anciens.
+
+        `live_snapshot` est un callable appelé juste après la rotation (hors du
+        verrou du journal) qui retourne la liste (seq, text, lane) encore en file.
+        Un ajout concurrent peut alors figurer à la fois dans le nouveau segment
+        et dans le snapshot: c'est un doublon de seq, dédupliqué au replay.
+        Le segment compacté reprend l'index du segment fermé, donc l'ordre de
+        relecture reste correct; un crash avant la suppression des anciens
+        segments ne produit lui aussi que des doublons.
+        """
+        with self._lock:
+            closed_index = self._index
+            self._index += 1
+            self._open_segment()
+            dead_before = self._dead_records
+            max_seq = self._max_seq
+        items = list(live_snapshot())
+        target = self.dir / _segment_name(closed_index)
+        tmp = self.dir / (_segment_name(closed_index) + '.tmp')
+        with open(tmp, 'w', encoding='utf8') as fh:
+            fh.write(json.dumps({'op': 'seq', 'max': max_seq}) + '\n')
+            for seq, text, lane in items:
+                fh.write(json.dumps({'op': 'add', 'seq': seq, 'text': text, 'lane': lane}, ensure_ascii=False) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, target)
+        for seg in self._segments():
+            if _segment_index(seg) < closed_index:
+                try:
+                    seg.unlink()
+                except OSError:
+                    pass
+        with self._lock:
+            self._dead_records = max(0, self._dead_records - dead_before)
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._sync_locked()
+                self._fh.close()
+                self._fh = None
+
+
+__all__ = ['TelegramJournal']
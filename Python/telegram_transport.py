@@ -0,0 +1,243 @@
+"""Transport HTTP asyncio pour l'API Telegram, avec connexions keep-alive.
+
+Remplace `urllib.request.urlopen` (une connexion TCP+TLS par message) par un
+petit client HTTP/1.1 basé sur `asyncio.open_connection`:
+- pool de connexions réutilisées (keep-alive)
+- nombre de requêtes simultanées borné (`TELEGRAM_MAX_IN_FLIGHT`)
+- URL de base configurable (`TELEGRAM_API_BASE`) pour tester contre un
+  serveur local qui imite api.telegram.org
+
+Aucune dépendance en plus de la bibliothèque standard.
+"""
+import asyncio
+import json
+import os
+import ssl
+import uuid
+from urllib.parse import urlsplit
+
+DEFAULT_API_BASE = 'https://api.telegram.org'
+
+
+class TelegramResponse:
+    """Réponse brute de l'API: statut HTTP + corps JSON décodé (dict vide si invalide)."""
+
+    def __init__(self, status: int, body: dict, headers: dict = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300 and bool(self.body.get('ok', True))
+
+    def __repr__(self):
+        return f'TelegramResponse(status={self.status}, body={self.body!r})'
+
+
+class TelegramTransportError(Exception):
+    """Erreur réseau (connexion refusée/réinitialisée, timeout, réponse illisible)."""
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        # statistiques: combien de requêtes ont été servies par cette connexion
+        self.requests = 0
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class TelegramTransport:
+    """Client HTTP/1.1 keep-alive pour `https://api.telegram.org/bot<token>/<method>`.
+
+    Les connexions sont liées à la boucle asyncio qui les a ouvertes; si le
+    transport est utilisé depuis une autre boucle, le pool est simplement
+    reconstruit.
+    """
+
+    def __init__(self, token: str, base_url: str = None, max_in_flight: int = None, timeout: float = None):
+        self.token = token
+        self.base_url = (base_url or os.getenv('TELEGRAM_API_BASE') or DEFAULT_API_BASE).rstrip('/')
+        parts = urlsplit(self.base_url)
+        self._https = parts.scheme == 'https'
+        self._host = parts.hostname or 'api.telegram.org'
+        self._port = parts.port or (443 if self._https else 80)
+        self._path_prefix = parts.path.rstrip('/')
+        self.max_in_flight = max(1, int(max_in_flight or os.getenv('TELEGRAM_MAX_IN_FLIGHT', '4')))
+        self.timeout = float(timeout or os.getenv('TELEGRAM_HTTP_TIMEOUT_SEC', '10'))
+        self.upload_timeout = float(os.getenv('TELEGRAM_UPLOAD_TIMEOUT_SEC', '120'))
+        self._ssl = ssl.create_default_context() if self._https else None
+        self._loop = None
+        self._idle = []
+        self._sem = None
+        # statistiques exposées pour les tests/benchmarks
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+            self._sem = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+
+    async def _connect(self) -> _Connection:
+        """Nouvelle connexion; DNS, refus ou TLS en échec -> TelegramTransportError."""
+        try:
+            reader, writer = await asyncio.open_connection(
+                self._host, self._port, ssl=self._ssl,
+                server_hostname=self._host if self._https else None)
+        except (ConnectionError, OSError) as e:
+            raise TelegramTransportError(f'connect {self._host}:{self._port}: {str(e) or e.__class__.__name__}') from e
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def call(self, method: str, payload: dict) -> TelegramResponse:
+        """POST JSON sur `<base>/bot<token>/<method>`."""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf8')
+        return await self.request(method, body, 'application/json')
+
+    async def upload(self, method: str, fields: dict, file_field: str, filename: str, path,
+                     content_type: str = 'application/octet-stream') -> TelegramResponse:
+        """POST multipart/form-data dont le fichier est lu par blocs depuis `path`."""
+        def blocks():
+            with open(path, 'rb') as fh:
+                while True:
+                    block = fh.read(64 * 1024)
+                    if not block:
+                        return
+                    yield block
+
+        return await self.upload_stream(method, fields, file_field, filename, os.path.getsize(path),
+                                        blocks, content_type)
+
+    async def upload_stream(self, method: str, fields: dict, file_field: str, filename: str, size: int,
+                            blocks, content_type: str = 'application/octet-stream') -> TelegramResponse:
+        """POST multipart/form-data dont le fichier (`size` octets) est produit par `blocks()`.
+
+        `blocks` est appelé à chaque requête et itère des bytes; le corps n'est
+        jamais construit en mémoire: seule sa taille est calculée pour
+        l'en-tête Content-Length.
+        """
+        boundary = uuid.uuid4().hex
+        parts = []
+        for k, v in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n')
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                     f'Content-Type: {content_type}\r\n\r\n')
+        prefix = ''.join(parts).encode('utf8')
+        suffix = f'\r\n--{boundary}--\r\n'.encode('latin-1')
+        length = len(prefix) + size + len(suffix)
+
+        async def write_body(writer):
+            writer.write(prefix)
+            for block in blocks():
+                writer.write(block)
+                await writer.drain()
+            writer.write(suffix)
+
+        return await self.request(method, write_body, f'multipart/form-data; boundary={boundary}',
+                                  length=length, timeout=self.upload_timeout)
+
+    async def request(self, method: str, body, content_type: str, length: int = None,
+                      timeout: float = None) -> TelegramResponse:
+        """`body` est soit des bytes, soit une coroutine `write_body(writer)` (avec `length`)."""
+        self._bind_loop()
+        async with self._sem:
+            try:
+                return await asyncio.wait_for(self._request(method, body, content_type, length),
+                                              timeout or self.timeout)
+            except asyncio.TimeoutError as e:
+                raise TelegramTransportError(f'timeout calling {method}') from e
+
+    async def _request(self, method: str, body, content_type: str, length: int = None) -> TelegramResponse:
+        path = f'{self._path_prefix}/bot{self.token}/{method}'
+        if length is None:
+            length = len(body)
+        head = (
+            f'POST {path} HTTP/1.1\r\n'
+            f'Host: {self._host}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {length}\r\n'
+            'Connection: keep-alive\r\n\r\n'
+        ).encode('latin-1')
+        # une connexion réutilisée peut avoir été fermée par le serveur entre
+        # deux requêtes: dans ce cas on réessaie une fois sur une connexion neuve
+        for attempt in (0, 1):
+            reused = bool(self._idle) and attempt == 0
+            conn = self._idle.pop() if reused else await self._connect()
+            try:
+                if callable(body):
+                    conn.writer.write(head)
+                    await body(conn.writer)
+                else:
+                    conn.writer.write(head + body)
+                await conn.writer.drain()
+                status, headers, raw = await self._read_response(conn.reader)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+                conn.close()
+                if reused:
+                    continue
+                raise TelegramTransportError(str(e) or e.__class__.__name__) from e
+            except BaseException:
+                conn.close()
+                raise
+            conn.requests += 1
+            self.requests_sent += 1
+            if headers.get('connection', '').lower() == 'close':
+                conn.close()
+            else:
+                self._idle.append(conn)
+            try:
+                parsed = json.loads(raw.decode('utf8') or '{}')
+            except ValueError:
+                parsed = {}
+            return TelegramResponse(status, parsed if isinstance(parsed, dict) else {}, headers)
+        raise TelegramTransportError('connection lost')
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by server')
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError) as e:
+            raise TelegramTransportError(f'bad status line: {status_line!r}') from e
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            k, _, v = line.decode('latin-1').partition(':')
+            headers[k.strip().lower()] = v.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            raw = b''
+            while True:
+                size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                raw += await reader.readexactly(size)
+                await reader.readline()
+        elif 'content-length' in headers:
+            raw = await reader.readexactly(int(headers['content-length']))
+        else:
+            raw = await reader.read()
+            headers['connection'] = 'close'
+        return status, headers, raw
+
+    async def close(self):
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
+
+
+__all__ = ['TelegramTransport', 'TelegramResponse', 'TelegramTransportError']
@@ -0,0 +1,36 @@
+"""Tests de l'agrégateur d'usage des commandes."""
+import json
+
+from command_stats import CommandStats, LatencySketch
+
+
+def test_sketch_quantiles_within_bucket_error():
+    sk = LatencySketch()
+    for ms in range(1, 1001):
+        sk.add(float(ms))
+    assert abs(sk.quantile(0.5) - 500) / 500 < 0.1
+    assert abs(sk.quantile(0.99) - 990) / 990 < 0.1
+    assert sk.quantile(1.0) == 1000
+
+
+def test_snapshot_persists_totals_and_resets_window(tmp_path, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'false')
+    path = tmp_path / 'command-stats.json'
+    stats = CommandStats(path=path, interval=0, max_keys=2)
+    for user in (1, 2, 3, 3):
+        stats.record('ping', user_id=user, guild_id=10, latency_ms=20)
+    stats.record('say', user_id=1, guild_id=10, latency_ms=200, error=True)
+    stats.record('inconnue', known=False)
+
+    summary = stats.summary()
+    assert 'Commandes depuis' in summary and ': 5 (+1 inconnues, 1 erreurs)' in summary
+    assert '• ping: 4 — p50 ' in summary and '• say: 1, 1 err' in summary
+
+    data = stats.snapshot()
+    assert data['window']['users'] == {'1': 2, '2': 1, 'other': 2}
+    assert stats.live()['window']['commands'] == {}
+    assert json.loads(path.read_text())['total']['commands']['ping']['count'] == 4
+
+    restarted = CommandStats(path=path, interval=0)
+    restarted.record('ping', user_id=1)
+    assert restarted.live()['total']['commands']['ping']['count'] == 5
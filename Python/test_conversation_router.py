@@ -0,0 +1,54 @@
+"""Tests du routeur de conversations et de la roue de minuterie."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from conversation_router import ConversationRouter, TimerWheel
+
+
+def _msg(author, channel, content='x'):
+    return SimpleNamespace(author=SimpleNamespace(id=author), channel=SimpleNamespace(id=channel), content=content)
+
+
+def test_messages_routed_by_author_and_channel():
+    async def run():
+        router = ConversationRouter(TimerWheel(tick=0.01))
+        with router.open(1, 10) as a, router.open(2, 10) as b:
+            assert not router.dispatch(_msg(1, 99))  # autre salon
+            assert router.dispatch(_msg(2, 10, 'pour b'))
+            assert router.dispatch(_msg(1, 10, 'pour a'))
+            assert (await a.next(1)).content == 'pour a'
+            assert (await b.next(1)).content == 'pour b'
+        assert len(router) == 0 and not router.dispatch(_msg(1, 10))
+        assert len(router.wheel) == 0
+
+    asyncio.run(run())
+
+
+def test_timeout_from_shared_wheel_then_next_message_still_delivered():
+    async def run():
+        router = ConversationRouter(TimerWheel(tick=0.01))
+        with router.open(1, 10) as conv:
+            with pytest.raises(asyncio.TimeoutError):
+                await conv.next(0.03)
+            # l'échéance passée ne doit pas interrompre l'attente suivante
+            router.dispatch(_msg(1, 10, 'tard'))
+            assert (await conv.next(1)).content == 'tard'
+
+    asyncio.run(run())
+
+
+def test_wheel_fires_due_timers_and_skips_cancelled():
+    now = [100.0]
+    wheel = TimerWheel(tick=1.0, clock=lambda: now[0])
+    fired = []
+    wheel.schedule(5, lambda: fired.append('a'))
+    b = wheel.schedule(5, lambda: fired.append('b'))
+    wheel.schedule(3600, lambda: fired.append('c'))
+    wheel.cancel(b)
+    assert wheel.advance(104.0) == 0
+    assert wheel.advance(105.0) == 1 and fired == ['a']
+    # longue pause: saut direct aux buckets existants
+    assert wheel.advance(10 ** 6) == 1 and fired == ['a', 'c']
+    assert len(wheel) == 0
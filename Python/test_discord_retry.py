@@ -0,0 +1,148 @@
+"""Tests du moteur de reprises REST Discord (classification, budget partagé, jitter)."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from discord_retry import FATAL, NETWORK_ERROR, RATE_LIMITED, SERVER_ERROR, RetryEngine, RoutePacer, classify
+
+
+class HTTPException(Exception):
+    """Équivalent minimal de discord.HTTPException (status + response.headers)."""
+
+    def __init__(self, status, headers=None, retry_after=None):
+        super().__init__(f'{status} erreur')
+        self.status = status
+        self.response = SimpleNamespace(headers=headers or {})
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+
+def test_classify_uses_status_and_headers_not_message_text():
+    info = classify(HTTPException(429, {'Retry-After': '2.5', 'X-RateLimit-Bucket': 'abc',
+                                        'X-RateLimit-Global': 'true'}))
+    assert info['kind'] == RATE_LIMITED and info['retry_after'] == 2.5
+    assert info['bucket'] == 'abc' and info['global']
+    assert classify(HTTPException(429, {'X-RateLimit-Reset-After': '0.7'}))['retry_after'] == 0.7
+    assert classify(HTTPException(503))['kind'] == SERVER_ERROR
+    assert classify(asyncio.TimeoutError())['kind'] == NETWORK_ERROR
+    # un 403 dont le texte contient « rate » n'est plus pris pour une limite
+    assert classify(HTTPException(403, {}))['kind'] == FATAL
+    assert classify(Exception('rate limited 429'))['kind'] == FATAL
+
+
+def test_rate_limit_blocks_route_for_everyone_then_succeeds():
+    async def run():
+        engine = RetryEngine(RoutePacer({'roles': (100, 1)}), attempts=3, base=0.01)
+        calls = []
+
+        async def op():
+            calls.append(asyncio.get_running_loop().time())
+            if len(calls) == 1:
+                raise HTTPException(429, {'Retry-After': '0.2'})
+            return 'ok'
+
+        start = asyncio.get_running_loop().time()
+        assert await engine.call('roles', op) == 'ok'
+        # la reprise a attendu le retry_after du serveur, et la route reste freinée pour les autres
+        assert calls[1] - start >= 0.19
+        assert engine.pacer.buckets['roles'].rate < 100
+        m = engine.stats()['roles']
+        assert (m['calls'], m['ok'], m['retries'], m['rate_limited'], m['failures']) == (1, 1, 1, 1, 0)
+
+    asyncio.run(run())
+
+
+def test_server_errors_backoff_and_non_idempotent_not_retried():
+    async def run():
+        slept = []
+
+        async def fake_sleep(delay):
+            slept.append(delay)
+
+        engine = RetryEngine(RoutePacer({}), attempts=3, base=1.0, sleep=fake_sleep)
+
+        async def always_503():
+            raise HTTPException(503)
+
+        with pytest.raises(HTTPException):
+            await engine.call('roles', always_503)
+        assert len(slept) == 2 and 0.5 <= slept[0] <= 1.0 and 1.0 <= slept[1] <= 2.0
+        # envoi de message: une 5xx a pu aboutir, pas de reprise
+        with pytest.raises(HTTPException):
+            await engine.call('messages', always_503, idempotent=False)
+        assert len(slept) == 2 and engine.stats()['messages']['failures'] == 1
+
+    asyncio.run(run())
+
+
+def test_global_429_blocks_routes_created_later():
+    async def run():
+        engine = RetryEngine(RoutePacer({'roles': (100, 1)}), attempts=1)
+
+        async def global_429():
+            raise HTTPException(429, {'Retry-After': '0.2', 'X-RateLimit-Global': 'true'})
+
+        start = asyncio.get_running_loop().time()
+        with pytest.raises(HTTPException):
+            await engine.call('roles', global_429)
+        # route jamais vue avant le 429 global: elle attend aussi la fin du blocage
+        assert 'threads' not in engine.pacer.buckets
+        seen = []
+
+        async def op():
+            seen.append(asyncio.get_running_loop().time())
+
+        await engine.call('threads', op)
+        assert seen[0] - start >= 0.19
+
+    asyncio.run(run())
+
+
+def test_non_idempotent_call_retried_on_429():
+    async def run():
+        engine = RetryEngine(RoutePacer({}), attempts=3, base=0.01)
+        sent = []
+
+        async def send():
+            sent.append(True)
+            if len(sent) == 1:
+                raise HTTPException(429, {'Retry-After': '0.05'})
+            return 'envoyé'
+
+        # un 429 garantit que rien n'a été créé: l'envoi est repris
+        assert await engine.call('messages', send, idempotent=False) == 'envoyé'
+        m = engine.stats()['messages']
+        assert len(sent) == 2 and (m['rate_limited'], m['retries'], m['failures']) == (1, 1, 0)
+
+    asyncio.run(run())
+
+
+def test_network_errors_retried_with_backoff():
+    async def run():
+        slept = []
+
+        async def fake_sleep(delay):
+            slept.append(delay)
+
+        engine = RetryEngine(RoutePacer({}), attempts=3, base=1.0, sleep=fake_sleep)
+        calls = []
+
+        async def flaky():
+            calls.append(True)
+            if len(calls) < 3:
+                raise ConnectionResetError('connexion réinitialisée')
+            return 'ok'
+
+        assert await engine.call('roles', flaky) == 'ok'
+        assert len(slept) == 2 and 0.5 <= slept[0] <= 1.0 and 1.0 <= slept[1] <= 2.0
+        m = engine.stats()['roles']
+        assert (m['network_errors'], m['retries'], m['ok'], m['failures']) == (2, 2, 1, 0)
+
+        # envoi non idempotent: une coupure a pu laisser l'appel aboutir, pas de reprise
+        calls.clear()
+        with pytest.raises(ConnectionResetError):
+            await engine.call('messages', flaky, idempotent=False)
+        assert len(calls) == 1 and engine.stats()['messages']['network_errors'] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,105 @@
+"""Tests du détecteur de vagues d'arrivées et du mode dégradé."""
+import asyncio
+from types import SimpleNamespace
+
+from join_monitor import JoinRateMonitor
+from role_resolver import RoleResolver
+from verification import VerificationManager
+
+
+def test_sliding_window_enter_and_release():
+    mon = JoinRateMonitor(window=10, threshold=3, release=2)
+    assert mon.record(1, now=0) is None and mon.record(1, now=1) is None
+    assert mon.record(1, now=2) == 'enter' and mon.locked(1)
+    assert mon.record(1, now=3) is None  # déjà en mode dégradé
+    assert not mon.locked(2)
+    assert mon.update(1, now=5) is None
+    # arrivées de 0..3 sorties de la fenêtre: 1 seule restante (< release)
+    assert mon.update(1, now=12.5) == 'exit' and not mon.locked(1)
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.sent = []
+
+    def enqueue_verification(self, text):
+        self.sent.append(text)
+
+
+def test_wave_defers_members_then_drains(isolated, monkeypatch):
+    monkeypatch.setenv('JOIN_DRAIN_PER_MIN', '60000')
+    monkeypatch.delenv('FORUM_CHANNEL_ID', raising=False)
+    now = [0.0]
+    role = SimpleNamespace(id=5, name='Non vérifié')
+    guild = SimpleNamespace(id=1, name='Peluches', roles=[role])
+    members = {}
+
+    class Member:
+        def __init__(self, i):
+            self.id, self.guild, self.roles = i, guild, []
+
+        async def add_roles(self, r):
+            self.roles.append(r)
+
+    guild.get_member = lambda uid: members.get(uid)
+    client = SimpleNamespace(event=lambda fn: fn, guilds=[guild], get_guild=lambda gid: guild)
+    tg = FakeTelegram()
+    vm = VerificationManager(client, telegram_bridge=tg, data_dir=isolated / 'data',
+                             roles=RoleResolver({'NON_VERIFIED_ROLE': 'Non vérifié'}))
+    vm.joins = JoinRateMonitor(window=60, threshold=3, release=2, clock=lambda: now[0])
+    vm.lockdown_check_sec = 0.005
+    admitted = []
+    vm.scheduler.admit = lambda m, *a: admitted.append(m.id)
+
+    async def run():
+        for i in range(1, 7):
+            members[i] = Member(i)
+            await vm.admit_join(members[i])
+        # 2 premiers admis normalement, les 4 suivants reportés avec seulement le rôle
+        assert admitted == [1, 2]
+        assert [vm.verifications[str(i)]['status'] for i in (3, 6)] == ['deferred', 'deferred']
+        assert members[4].roles == [role] and members[1].roles == []
+        assert len(tg.sent) == 1 and 'mode dégradé' in tg.sent[0]
+        now[0] = 120.0  # le débit retombe
+        for _ in range(100):
+            await asyncio.sleep(0.005)
+            if len(admitted) == 6:
+                break
+        assert admitted == [1, 2, 3, 4, 5, 6]
+        assert len(tg.sent) == 2 and '4 membres' in tg.sent[1]
+
+    asyncio.run(run())
+
+
+def test_background_tasks_kept_single_and_errors_logged(isolated):
+    errors = []
+    log = SimpleNamespace(info=lambda *a, **k: None, warn=lambda *a, **k: None,
+                          error=lambda msg, *a, **k: errors.append(msg))
+    guild = SimpleNamespace(id=1, name='Peluches', roles=[])
+    client = SimpleNamespace(event=lambda fn: fn, guilds=[guild], get_guild=lambda gid: guild)
+    vm = VerificationManager(client, logger=log, telegram_bridge=FakeTelegram(), data_dir=isolated / 'data')
+    now = [0.0]
+    vm.joins = JoinRateMonitor(window=60, threshold=1, release=1, clock=lambda: now[0])
+    vm.lockdown_check_sec = 0.005
+
+    async def broken_drain(g):
+        raise RuntimeError('membre introuvable')
+
+    vm._drain_deferred = broken_drain
+
+    async def run():
+        vm.joins.record(1)
+        vm._enter_lockdown(guild)
+        watcher = vm._watchers[1]
+        # deuxième détection pendant la même vague: pas de second surveillant
+        vm._enter_lockdown(guild)
+        assert vm._watchers[1] is watcher and len(vm._watchers) == 1
+        now[0] = 120.0
+        for _ in range(100):
+            await asyncio.sleep(0.005)
+            if errors:
+                break
+        assert watcher.done() and not vm._watchers and not vm._drainers
+        assert errors and 'membre introuvable' in errors[0]
+
+    asyncio.run(run())
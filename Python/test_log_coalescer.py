@@ -0,0 +1,33 @@
+"""Tests de la coalescence des logs répétés."""
+from log_coalescer import LogCoalescer, fingerprint
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fingerprint_ignores_timestamps_and_ids():
+    a = '[2025-11-15T00:01:02.123456] [WARN] Tentative 1 échouée pour ajouter le rôle 1363472160110284870'
+    b = '[2025-11-15T00:09:59.000001] [WARN] Tentative 1 échouée pour ajouter le rôle 1409253783200071701'
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint('[2025-11-15T00:01:02] [WARN] autre chose')
+
+
+def test_repeats_are_summarised_once_per_window():
+    out, clock = [], _Clock()
+    co = LogCoalescer(out.append, window=60, burst=1, clock=clock)
+    for i in range(50):
+        co.offer(f'on_raw_reaction_add error: member {100000 + i} not found')
+    co.offer('autre ligne')
+    assert out == ['on_raw_reaction_add error: member 100000 not found', 'autre ligne']
+
+    clock.now += 61
+    co.flush_expired()
+    assert out[-1] == 'on_raw_reaction_add error: member 100049 not found (×49 repeated)'
+    stats = co.stats()
+    assert stats['suppressed'] == 49 and stats['summaries'] == 1
+    assert stats['top'][0]['suppressed'] == 49
@@ -0,0 +1,59 @@
+"""Tests du sink JSONL et des index de requêtes."""
+import json
+from datetime import datetime
+
+import pytest
+
+import log_index
+from logger import Logger
+
+
+def test_jsonl_sink_writes_typed_fields(isolated, monkeypatch):
+    monkeypatch.setenv('LOG_JSONL', 'true')
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'false')
+    log = Logger()
+    log.info('Commande %s terminée', 'verif', event='command_done', command='verif',
+             userId='42', guildId=7, latency='12.5')
+    assert log.flush()
+    path = next((isolated / 'logs').glob('app-*.jsonl'))
+    rec = json.loads(path.read_text(encoding='utf8').splitlines()[-1])
+    assert rec['msg'] == 'Commande verif terminée' and rec['level'] == 'info'
+    assert (rec['userId'], rec['guildId'], rec['latency']) == (42, 7, 12.5)
+
+
+@pytest.mark.parametrize('async_mode', ['true', 'false'])
+def test_event_record_kept_at_info_level(isolated, monkeypatch, async_mode):
+    monkeypatch.setenv('LOG_JSONL', 'true')
+    monkeypatch.setenv('LOG_LEVEL', 'info')
+    monkeypatch.setenv('LOG_ASYNC', async_mode)
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'false')
+    log = Logger()
+    log.event('Commande %s terminée', 'verif', event='command_done', command='verif', userId=42)
+    assert log.flush()
+    rec = json.loads(next((isolated / 'logs').glob('app-*.jsonl')).read_text(encoding='utf8').splitlines()[-1])
+    assert (rec['event'], rec['command'], rec['userId'], rec['level']) == ('command_done', 'verif', 42, 'info')
+    # la ligne texte reste réservée au niveau debug
+    assert not [p for p in (isolated / 'logs').glob('app-*.log') if 'verif' in p.read_text(encoding='utf8')]
+
+
+def test_query_seeks_through_index(tmp_path):
+    path = tmp_path / 'app-2025-01-01-10.jsonl'
+    with open(path, 'w', encoding='utf8') as fh:
+        for i in range(300):
+            rec = {'ts': f'2025-01-01T10:{i // 60:02d}:{i % 60:02d}', 'level': 'info', 'event': 'command',
+                   'userId': i % 10, 'command': 'verif' if i % 3 == 0 else 'ping', 'guildId': 1}
+            fh.write(json.dumps(rec) + '\n')
+    (tmp_path / 'app-2025-01-02-10.jsonl').write_text(json.dumps({'ts': '2025-01-02T10:00:00', 'userId': 3}) + '\n')
+    index = log_index.build_index(path)
+    assert index['records'] == 300
+
+    stats = {}
+    found = list(log_index.query(tmp_path, until=datetime(2025, 1, 1, 23), stats=stats, userId=3, command='verif'))
+    assert [r['ts'] for r in found] == [f'2025-01-01T10:{i // 60:02d}:{i % 60:02d}' for i in range(300)
+                                        if i % 10 == 3 and i % 3 == 0]
+    assert stats == {'files': 1, 'indexed': 1, 'seeks': len(found), 'scanned': 0}
+
+    # fichier sans index (heure courante): parcours complet
+    stats = {}
+    assert len(list(log_index.query(tmp_path, since=datetime(2025, 1, 2), stats=stats, userId=3))) == 1
+    assert stats['scanned'] == 1 and stats['indexed'] == 0
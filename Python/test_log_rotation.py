@@ -0,0 +1,79 @@
+"""Tests de la rotation horaire des logs (compression, rétention)."""
+import gzip
+import os
+
+from log_rotation import LogRotator
+
+HOUR = 3600
+T0 = 1735689600  # 2025-01-01T00:00:00Z
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_rotates_at_deadline_and_compresses(tmp_path):
+    clock = Clock(T0 + 10)
+    rot = LogRotator(tmp_path, header='# head\n', max_age_days=0, max_total_bytes=0, clock=clock)
+    rot.write('a\n')
+    clock.now = T0 + HOUR - 1
+    rot.write('b\n')
+    assert rot.current_path.name == 'app-2025-01-01-00.log'
+    clock.now = T0 + HOUR
+    rot.write('c\n')
+    assert rot.current_path.name == 'app-2025-01-01-01.log'
+    rot.close()
+
+    with gzip.open(tmp_path / 'app-2025-01-01-00.log.gz', 'rt') as fh:
+        assert fh.read() == '# head\na\nb\n'
+    assert not (tmp_path / 'app-2025-01-01-00.log').exists()
+    assert (tmp_path / 'app-2025-01-01-01.log.gz').exists()
+
+
+def test_startup_scan_applies_retention(tmp_path, monkeypatch):
+    for day in range(1, 6):
+        (tmp_path / f'app-2025-01-0{day}-00.log').write_text('x' * 1000)
+    (tmp_path / 'notes.txt').write_text('keep')
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda p: scans.append(p) or real_scandir(p))
+
+    clock = Clock(T0 + 5 * 86400 + 10)  # 2025-01-06
+    rot = LogRotator(tmp_path, max_age_days=3, max_total_bytes=0, clock=clock)
+    rot.wait_idle()
+    for _ in range(3):
+        clock.now += HOUR
+        rot.write('line\n')
+    rot.close()
+
+    assert len(scans) == 1
+    names = sorted(p.name for p in tmp_path.iterdir())
+    # horloge finale 2025-01-06T03:00: plus de 3 jours pour les trois premiers
+    assert not [n for n in names if n.startswith(('app-2025-01-01', 'app-2025-01-02', 'app-2025-01-03'))]
+    assert 'app-2025-01-04-00.log.gz' in names and 'notes.txt' in names
+    assert not [n for n in names if n.endswith('.log')]
+
+    small = LogRotator(tmp_path, max_age_days=0, max_total_bytes=1, clock=clock)
+    small.wait_idle()
+    assert [p.name for p in tmp_path.glob('app-*')] == []
+
+
+def test_retention_caps_log_and_jsonl_together(tmp_path):
+    for name in ('app-2025-01-01-00.log', 'app-2025-01-02-00.jsonl', 'app-2025-01-03-00.log'):
+        (tmp_path / name).write_text('x' * 1000)
+    (tmp_path / 'app-2025-01-02-00.jsonl.idx').write_text('{}')
+    clock = Clock(T0 + 5 * 86400)
+    # chaque famille seule (2000 / 1000 octets) tiendrait sous le plafond; ensemble non
+    rot = LogRotator(tmp_path, compress=False, max_age_days=0, max_total_bytes=2500, clock=clock,
+                     streams={'.jsonl': {'compress': False}})
+    rot.write('a\n')
+    rot.write('{"b": 1}\n', '.jsonl')
+    rot.close()
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == ['app-2025-01-02-00.jsonl', 'app-2025-01-02-00.jsonl.idx', 'app-2025-01-03-00.log',
+                     'app-2025-01-06-00.jsonl', 'app-2025-01-06-00.log']
+    assert rot.deleted == 1
@@ -0,0 +1,73 @@
+"""Tests du Logger non bloquant (thread `log-writer`)."""
+import builtins
+import os
+import threading
+
+import logger
+from logger import Logger
+
+
+def test_caller_never_touches_filesystem(isolated, monkeypatch):
+    monkeypatch.delenv('LOG_ASYNC', raising=False)
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'false')
+    log = Logger()
+    log.flush()
+    caller = threading.current_thread()
+    touched = []
+    real_open, real_stat = builtins.open, os.stat
+
+    def spy(real):
+        def wrapper(*args, **kwargs):
+            if threading.current_thread() is caller:
+                touched.append(args[0])
+            return real(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(builtins, 'open', spy(real_open))
+    monkeypatch.setattr(os, 'stat', spy(real_stat))
+    for i in range(500):
+        log.info(f'ligne {i}')
+    log.error('fin')
+    assert touched == []
+
+    assert log.flush()
+    files = list((isolated / 'logs').glob('app-*.log'))
+    assert len(files) == 1
+    lines = files[0].read_text(encoding='utf8').splitlines()
+    assert lines[0] == logger.LOG_HEADER.strip()
+    assert lines[-1].endswith('[ERROR] fin') and 'ligne 499' in lines[-2]
+    assert sum('[INFO] ligne' in line for line in lines) == 500
+
+
+def test_deferred_messages_render_only_when_enabled(isolated, monkeypatch):
+    monkeypatch.setenv('LOG_LEVEL', 'info')
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'false')
+    log = Logger()
+    calls = []
+    log.debug(lambda: calls.append('debug') or 'jamais')
+    log.info(lambda: calls.append('info') or 'rendu')
+    log.info('membre %s (%d)', 'alice', 42)
+    log.warn('pas d\'args: 100%')
+    assert calls == ['info']
+    assert log.flush()
+    text = next((isolated / 'logs').glob('app-*.log')).read_text(encoding='utf8')
+    assert '[INFO] rendu' in text and '[INFO] membre alice (42)' in text
+    assert "[WARN] pas d'args: 100%" in text and 'jamais' not in text
+
+
+def test_sync_mode_uses_rotation_and_retention(isolated, monkeypatch):
+    monkeypatch.setenv('LOG_ASYNC', 'false')
+    monkeypatch.setenv('LOG_JSONL', 'true')
+    monkeypatch.setenv('LOG_COMPRESS', 'true')
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'false')
+    stale = isolated / 'logs' / 'app-2020-01-01-00.log'
+    stale.write_text('ancien\n')
+    log = Logger()
+    log.info('synchrone %d', 1, event='test')
+    rot = logger.get_writer()._rot
+    rot.wait_idle()
+    # même rotator que le mode asynchrone: fichier fermé compressé (ou supprimé par la rétention)
+    assert not stale.exists()
+    current = rot.current_path.read_text(encoding='utf8')
+    assert current.startswith(logger.LOG_HEADER) and '[INFO] synchrone 1' in current
+    assert '"event": "test"' in rot.current_path.with_suffix('.jsonl').read_text(encoding='utf8')
@@ -0,0 +1,180 @@
+"""Tests du cache de résolution des rôles par serveur."""
+import asyncio
+from types import SimpleNamespace
+
+from role_resolver import RoleResolver
+
+
+class FakeGuild:
+    def __init__(self, gid, roles):
+        self.id = gid
+        self.roles = roles
+
+    def get_role(self, role_id):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+
+def _role(rid, name):
+    return SimpleNamespace(id=rid, name=name)
+
+
+def _member(guild, roles, manage=False):
+    ids = {r.id for r in roles}
+    return SimpleNamespace(guild=guild, roles=roles,
+                           guild_permissions=SimpleNamespace(manage_guild=manage, administrator=False),
+                           get_role=lambda rid: rid if rid in ids else None)
+
+
+ENV = {'NON_VERIFIED_ROLE': 'Non vérifié', 'PELUCHES_ROLE': '20', 'ARTIST_ROLE_TAG': '<@&30>',
+       'VERIFIER_ROLE': 'Vérif'}
+
+
+def test_names_ids_and_mentions_resolved_once_per_guild():
+    roles = [_role(10, 'Non vérifié'), _role(20, 'Peluche'), _role(30, 'Artiste'), _role(40, 'Vérif')]
+    guild = FakeGuild(1, roles)
+    res = RoleResolver(ENV)
+    assert res.resolve(guild, 'non_verified').id == 10
+    assert res.resolve(guild, 'pelucher').id == 20
+    assert res.resolve(guild, 'artist').id == 30
+    assert res.resolve(guild, 'major') is None and not res.configured('major')
+    assert res.resolutions == 1
+    # autre serveur: résolution séparée
+    assert res.resolve(FakeGuild(2, []), 'pelucher') is None
+    assert res.resolutions == 2
+
+
+def test_role_events_invalidate_the_guild(isolated, monkeypatch):
+    from verification import VerificationManager
+
+    guild = FakeGuild(1, [_role(40, 'Autre')])
+    client = SimpleNamespace(handlers={})
+    client.event = lambda fn: client.handlers.setdefault(fn.__name__, fn)
+    res = RoleResolver(ENV)
+    vm = VerificationManager(client, telegram_bridge=object(), data_dir=isolated / 'data', roles=res)
+    vm.attach_handlers()
+
+    verifier = _member(guild, [_role(40, 'Vérif')])
+    assert not res.can_verify(verifier)
+    # le rôle est renommé en "Vérif": le cache est invalidé par l'événement
+    guild.roles = [_role(40, 'Vérif')]
+    asyncio.run(client.handlers['on_guild_role_update'](guild.roles[0], SimpleNamespace(guild=guild)))
+    assert res.can_verify(verifier)
+    assert not res.can_verify(_member(guild, []))
+    assert res.can_verify(_member(guild, [], manage=True))
+    asyncio.run(client.handlers['on_guild_role_delete'](SimpleNamespace(guild=guild)))
+    assert 1 not in res._guilds
+
+
+ACCEPT_ENV = {'NON_VERIFIED_ROLE': 'Non vérifié', 'PELUCHER_ROLE': 'Peluche', 'MAJOR_ROLE': 'Majeur',
+              'MINOR_ROLE': 'Mineur', 'ARTIST_ROLE': 'Artiste'}
+EVERYONE, NV, PELUCHE, MAJOR, ARTIST = (_role(1, '@everyone'), _role(10, 'Non vérifié'), _role(20, 'Peluche'),
+                                        _role(30, 'Majeur'), _role(40, 'Artiste'))
+BOOSTER = SimpleNamespace(id=50, name='Booster', managed=True)
+
+
+def _accept_setup(isolated, roles):
+    """Serveur, membre 42 (relu par `fetch_member` à chaque appel) et VerificationManager."""
+    from verification import VerificationManager
+
+    guild = FakeGuild(1, [EVERYONE, NV, PELUCHE, MAJOR, _role(35, 'Mineur'), ARTIST, BOOSTER])
+    guild.name = 'Peluches'
+    state = SimpleNamespace(roles=list(roles), edits=[], fetches=0)
+
+    class Target:
+        id = 42
+
+        def __init__(self):
+            # instantané, comme un Member renvoyé par l'API
+            self.roles = list(state.roles)
+            self.guild = guild
+
+        async def edit(self, roles, reason=None):
+            state.edits.append(sorted(r.id for r in roles))
+            state.roles = list(roles)
+
+        async def send(self, text):
+            pass
+
+    async def fetch_member(uid):
+        state.fetches += 1
+        return Target()
+
+    guild.fetch_member = fetch_member
+    # cache de la gateway: reflète les changements de rôles sans appel REST
+    guild.get_member = lambda uid: Target()
+    vm = VerificationManager(SimpleNamespace(), telegram_bridge=SimpleNamespace(enqueue_verification=lambda t: None),
+                             data_dir=isolated / 'data', roles=RoleResolver(ACCEPT_ENV))
+    return guild, state, vm
+
+
+async def _reply(vm, moderator, channel, answer):
+    while not vm.route_message(SimpleNamespace(author=moderator, channel=channel, content=answer)):
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.001)
+
+
+def test_accept_applies_all_roles_in_one_edit(isolated):
+    guild, state, vm = _accept_setup(isolated, [EVERYONE, NV, BOOSTER])
+    moderator, sent = SimpleNamespace(id=7), []
+
+    async def run():
+        async def send(text):
+            sent.append(text)
+        channel = SimpleNamespace(id=777, send=send)
+
+        async def answers():
+            for answer in ('majeur', 'oui'):
+                await _reply(vm, moderator, channel, answer)
+
+        helper = asyncio.get_running_loop().create_task(answers())
+        await vm.handle_accept(guild, channel, moderator, 42)
+        await helper
+        # un seul member.edit: non-vérifié retiré, Peluche/Majeur/Artiste ajoutés, rôle géré conservé;
+        # le plan vient du cache, seul le fetch initial de handle_accept touche l'API
+        assert state.edits == [[20, 30, 40, 50]] and state.fetches == 1
+        assert vm.verifications['42']['status'] == 'accepted'
+        assert 'Peluche, Majeur, Artiste' in sent[-1]
+
+        state.edits.clear()
+        task = asyncio.get_running_loop().create_task(vm.handle_cancel(guild, channel, moderator, 42))
+        await _reply(vm, moderator, channel, 'raison')
+        await task
+        assert state.edits == [[10, 50]]
+
+    asyncio.run(run())
+
+
+def test_roles_changed_during_prompts_are_kept(isolated):
+    guild, state, vm = _accept_setup(isolated, [EVERYONE, NV, BOOSTER])
+    moderator = SimpleNamespace(id=7)
+    event, bot_role = _role(60, 'Événement'), SimpleNamespace(id=70, name='Bot', managed=True)
+
+    async def run():
+        async def send(text):
+            pass
+        channel = SimpleNamespace(id=777, send=send)
+
+        async def answers():
+            await _reply(vm, moderator, channel, 'majeur')
+            # un autre modérateur ajoute un rôle pendant la 2e invite
+            state.roles = state.roles + [event]
+            await _reply(vm, moderator, channel, 'non')
+
+        helper = asyncio.get_running_loop().create_task(answers())
+        await vm.handle_accept(guild, channel, moderator, 42)
+        await helper
+        assert state.edits == [[20, 30, 50, 60]]
+
+        state.edits.clear()
+        # membre absent du cache: relu une fois par fetch_member au moment de l'appel
+        guild.get_member = lambda uid: None
+        state.fetches = 0
+        task = asyncio.get_running_loop().create_task(vm.handle_cancel(guild, channel, moderator, 42))
+        await asyncio.sleep(0.01)
+        # une intégration ajoute un rôle géré pendant l'attente de la raison
+        state.roles = state.roles + [bot_role]
+        await _reply(vm, moderator, channel, 'raison')
+        await task
+        assert state.edits == [[10, 50, 70]] and state.fetches == 2
+
+    asyncio.run(run())
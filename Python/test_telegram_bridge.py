@@ -0,0 +1,67 @@
+"""Tests du cycle de vie du pont Telegram."""
+import gzip
+import json
+import threading
+
+import pytest
+
+import telegram_bridge
+from logger import Logger, command_invocation
+
+
+def _flush_threads():
+    return [t for t in threading.enumerate() if t.name == 'telegram-flush']
+
+
+def test_logging_reuses_a_single_bridge(isolated, monkeypatch, capsys):
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'true')
+    monkeypatch.setenv('TELEGRAM_QUEUE_MAX_ITEMS', '20000')
+    before = len(_flush_threads())
+    log = Logger()
+    for i in range(10000):
+        log.info(f'ligne {i}')
+    command_invocation({'command': 'ping', 'userId': 1})
+    assert log.flush()
+
+    assert len(_flush_threads()) == before + 1
+    assert telegram_bridge.get_bridge().coalescing_stats()['seen'] == 10001
+
+
+def test_close_stops_flush_thread(isolated):
+    tb = telegram_bridge.TelegramBridge().start()
+    assert tb.start() is tb and tb.running
+    tb.enqueue_log('x')
+    tb.close()
+    assert not tb.running
+
+
+@pytest.mark.parametrize('policy,expected', [
+    ('drop-oldest', ['v1', 'l2', 'v2', 'l3']),
+    ('drop-lowest-priority', ['v1', 'v2', 'l3']),
+])
+def test_backlog_bound_policies(isolated, monkeypatch, policy, expected):
+    monkeypatch.setenv('TELEGRAM_QUEUE_MAX_ITEMS', '3' if policy != 'drop-oldest' else '4')
+    monkeypatch.setenv('TELEGRAM_OVERFLOW_POLICY', policy)
+    tb = telegram_bridge.TelegramBridge()
+    for text, lane in [('l1', 'log'), ('v1', 'verification'), ('l2', 'log'), ('v2', 'verification'), ('l3', 'log')]:
+        tb.enqueue(text, lane)
+    assert sorted(tb.get_queue()) == sorted(expected)
+    assert tb.backlog_stats()['dropped'] == 5 - len(expected)
+    tb.close(drain=False)
+
+    # évincés = acquittés: ils ne reviennent pas au redémarrage
+    assert sorted(telegram_bridge.TelegramBridge().get_queue()) == sorted(expected)
+
+
+def test_spill_policy_writes_overflow_file(isolated, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_QUEUE_MAX_ITEMS', '2')
+    monkeypatch.setenv('TELEGRAM_OVERFLOW_POLICY', 'spill')
+    tb = telegram_bridge.TelegramBridge()
+    for i in range(5):
+        tb.enqueue_log(f'log {i}')
+    tb.close(drain=False)
+
+    assert tb.backlog_stats()['spilled'] == 3
+    with gzip.open(telegram_bridge.OVERFLOW_FILE, 'rt', encoding='utf8') as fh:
+        assert [json.loads(l)['text'] for l in fh] == ['log 0', 'log 1', 'log 2']
+    assert telegram_bridge.TelegramBridge().get_queue() == ['log 3', 'log 4']
@@ -0,0 +1,52 @@
+"""Tests du journal append-only de la file Telegram."""
+from telegram_journal import TelegramJournal
+
+
+def test_replay_skips_acked_and_torn_lines(tmp_path):
+    j = TelegramJournal(tmp_path)
+    j.replay()
+    for seq in (1, 2, 3):
+        j.append_add(seq, f'msg {seq}')
+    j.append_ack([1, 2])
+    j.close()
+    seg = sorted(tmp_path.glob('seg-*.log'))[-1]
+    with open(seg, 'a', encoding='utf8') as fh:
+        fh.write('{"op": "add", "seq": 4, "te')
+
+    items, max_seq = TelegramJournal(tmp_path).replay()
+    assert items == [(3, 'msg 3', 'log')]
+    assert max_seq == 3
+
+
+def test_compaction_keeps_live_items_and_seq(tmp_path):
+    j = TelegramJournal(tmp_path, segment_max_bytes=256)
+    j.replay()
+    for seq in range(1, 101):
+        j.append_add(seq, f'msg {seq}')
+    j.append_ack(range(1, 100))
+    j.compact(lambda: [(100, 'msg 100', 'log')])
+    j.close()
+    assert len(list(tmp_path.glob('seg-*.log'))) <= 2
+
+    items, max_seq = TelegramJournal(tmp_path).replay()
+    assert items == [(100, 'msg 100', 'log')]
+    assert max_seq == 100
+
+
+def test_iter_texts_streams_wanted_items_and_blocks_compaction(tmp_path):
+    j = TelegramJournal(tmp_path, segment_max_bytes=256)
+    j.replay()
+    for seq in range(1, 41):
+        j.append_add(seq, f'message {seq}')
+    j.append_ack(range(1, 31))
+    # 31 partiellement envoyé (3 caractères restants), 35 absent de la demande
+    lengths = {seq: len(f'message {seq}') for seq in range(31, 41) if seq != 35}
+    lengths[31] = 3
+    it = j.iter_texts(lengths)
+    first = next(it)
+    j._dead_records = 10 ** 6
+    assert not j.needs_compaction()  # lecture en cours: segments figés
+    rest = list(it)
+    assert j.needs_compaction()
+    assert [first] + rest == [(31, ' 31')] + [(s, f'message {s}') for s in range(32, 41) if s != 35]
+    j.close()
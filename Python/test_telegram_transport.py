@@ -0,0 +1,249 @@
+"""Tests du transport asyncio Telegram contre le faux serveur `fake_telegram_api`."""
+import asyncio
+import time
+
+import pytest
+
+import telegram_bridge
+from fake_telegram_api import FakeTelegramAPI
+from telegram_transport import TelegramTransport
+
+
+@pytest.fixture
+def api():
+    server = FakeTelegramAPI().start()
+    yield server
+    server.stop()
+
+
+def test_transport_reuses_connection(api):
+    tr = TelegramTransport('TOKEN', base_url=f'http://127.0.0.1:{api.server_port}')
+
+    async def run():
+        for i in range(5):
+            resp = await tr.call('sendMessage', {'chat_id': 1, 'text': str(i)})
+            assert resp.ok
+        await tr.close()
+
+    asyncio.run(run())
+    assert tr.connections_opened == 1
+    assert [c[0] for c in api.calls] == ['/botTOKEN/sendMessage'] * 5
+    assert len({c[2] for c in api.calls}) == 1
+
+
+def test_bridge_flush_awaitable_from_other_loop(api, isolated, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'true')
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'TOKEN')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '-100')
+    monkeypatch.setenv('TELEGRAM_API_BASE', f'http://127.0.0.1:{api.server_port}')
+    monkeypatch.setenv('TELEGRAM_BATCH_INTERVAL_SEC', '3600')
+    tb = telegram_bridge.TelegramBridge().start()
+    try:
+        tb.enqueue_log('hello')
+        tb.enqueue_log('world')
+
+        async def run():
+            await tb.flush()
+            assert await tb.send('direct')
+
+        asyncio.run(run())
+        assert tb.get_queue() == []
+        texts = [c[1]['text'] for c in api.calls]
+        assert 'hello' in texts[-2] and 'world' in texts[-2]
+        assert texts[-1] == 'direct'
+    finally:
+        tb.close(drain=False)
+
+
+@pytest.fixture
+def bridge_env(api, isolated, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'true')
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'TOKEN')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '-100')
+    monkeypatch.setenv('TELEGRAM_API_BASE', f'http://127.0.0.1:{api.server_port}')
+    monkeypatch.setenv('TELEGRAM_MAX_MESSAGE_SIZE', '1000')
+    return api
+
+
+def test_flush_resumes_from_first_undelivered_chunk(bridge_env):
+    api = bridge_env
+    tb = telegram_bridge.TelegramBridge()
+    for c in 'abcde':
+        tb.enqueue_log(c * 600)
+    api.fail_on = {3}
+    tb.drain()
+    assert [t[0] for t in tb.get_queue()] == ['c', 'd', 'e']
+
+    tb.enqueue_log('f' * 10)
+    tb.drain()
+    assert tb.get_queue() == []
+    sent = [c[1]['text'][0] for c in api.calls]
+    assert sent == ['a', 'b', 'c', 'c', 'd', 'e']
+    assert api.calls[-1][1]['text'].endswith('---\n\n' + 'f' * 10)
+    tb.close(drain=False)
+
+
+def test_partial_item_cursor_survives_restart(bridge_env):
+    api = bridge_env
+    tb = telegram_bridge.TelegramBridge()
+    tb.enqueue_log('x' * 1000 + 'y' * 1000 + 'z' * 500)
+    api.fail_on = {2}
+    tb.drain()
+    tb.close(drain=False)
+
+    restarted = telegram_bridge.TelegramBridge()
+    assert restarted.get_queue() == ['y' * 1000 + 'z' * 500]
+    restarted.close(drain=False)
+
+
+def test_governor_honors_retry_after_and_backs_off():
+    from telegram_bridge import RateGovernor
+
+    gov = RateGovernor()
+    assert gov.wait_time('-100') == 0
+    gov.on_rate_limited('-100', 7)
+    assert 6 < gov.wait_time('-100') <= 7
+    assert gov.wait_time('42') == 0
+    assert gov.snapshot()['rateLimited'] == 1
+    assert 0.5 <= gov.backoff(0) <= 1 and 4 <= gov.backoff(3) <= 8
+
+
+def test_verification_lane_flushes_before_logs(bridge_env):
+    api = bridge_env
+    tb = telegram_bridge.TelegramBridge()
+    for i in range(50):
+        tb.enqueue_log(f'log {i} ' + 'x' * 100)
+    tb.enqueue_verification('✅ Vérification ACCEPTÉE')
+    assert tb.lane_depths() == {'verification': 1, 'log': 50}
+
+    asyncio.run(tb._flush_async(force=False))
+    assert api.calls[0][1]['text'] == '✅ Vérification ACCEPTÉE'
+    assert all('ACCEPTÉE' not in c[1]['text'] for c in api.calls[1:])
+    assert tb.lane_depths() == {'verification': 0, 'log': 0}
+    tb.close(drain=False)
+
+
+def test_large_backlog_sent_as_single_document(bridge_env, monkeypatch):
+    api = bridge_env
+    monkeypatch.setenv('TELEGRAM_DOCUMENT_THRESHOLD_BYTES', '2000')
+    tb = telegram_bridge.TelegramBridge()
+    for i in range(100):
+        tb.enqueue_log(f'[2025-01-01T00:00:00] [ERROR] panne {i} ' + 'x' * 50)
+    tb.drain()
+    assert tb.get_queue() == []
+    assert [c[0] for c in api.calls] == ['/botTOKEN/sendDocument']
+    body = api.calls[0][1]
+    assert b'name="document"; filename="backlog-log-' in body
+    assert b'ERROR: 100' in body and b'panne 99 ' in body
+    assert tb.backlog_stats()['documents'] == 1
+    tb.close(drain=False)
+
+
+def test_bridge_delivers_through_injected_faults(bridge_env, monkeypatch):
+    api = bridge_env
+    monkeypatch.setenv('TELEGRAM_BACKOFF_BASE_SEC', '0.01')
+    # le 429 vide le seau du groupe: débit élevé pour ne pas attendre la recharge
+    monkeypatch.setenv('TELEGRAM_GROUP_RATE_PER_MIN', '6000')
+    api.faults = {1: '429', 2: '5xx', 3: 'reset'}
+    tb = telegram_bridge.TelegramBridge()
+    for c in 'abc':
+        tb.enqueue_log(c * 600)
+    assert tb.drain()
+    assert api.injected == {'429': 1, '5xx': 1, 'reset': 1}
+    assert [c.payload['text'][0] for c in api.delivered()] == ['a', 'b', 'c']
+    assert tb.rate_status()['rateLimited'] == 1
+    tb.close(drain=False)
+
+
+def _refused_port():
+    """Port local sur lequel personne n'écoute."""
+    import socket
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_connect_failures_raise_transport_error():
+    from telegram_transport import TelegramTransportError
+
+    tr = TelegramTransport('TOKEN', base_url=f'http://127.0.0.1:{_refused_port()}')
+
+    async def run():
+        with pytest.raises(TelegramTransportError):
+            await tr.call('sendMessage', {'chat_id': 1, 'text': 'x'})
+        await tr.close()
+
+    asyncio.run(run())
+    assert tr.connections_opened == 0 and tr.requests_sent == 0
+
+
+@pytest.mark.parametrize('base', ['refused', 'http://telegram.invalid'])
+def test_unreachable_host_uses_backoff_and_retry_budget(isolated, monkeypatch, base):
+    from telegram_transport import TelegramTransportError
+
+    monkeypatch.setenv('TELEGRAM_ENABLED', 'true')
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'TOKEN')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '-100')
+    monkeypatch.setenv('TELEGRAM_API_BASE', f'http://127.0.0.1:{_refused_port()}' if base == 'refused' else base)
+    monkeypatch.setenv('TELEGRAM_HTTP_TIMEOUT_SEC', '2')
+    monkeypatch.setenv('TELEGRAM_MAX_ATTEMPTS', '3')
+    tb = telegram_bridge.TelegramBridge()
+    backoffs = []
+    monkeypatch.setattr(tb._governor, 'backoff', lambda attempt: backoffs.append(attempt) or 0)
+
+    async def run():
+        with pytest.raises(TelegramTransportError):
+            await tb._call('sendMessage', {'chat_id': '-100', 'text': 'x'})
+
+    asyncio.run(run())
+    # 3 essais, délai avec jitter entre chacun, rien après le dernier
+    assert backoffs == [0, 1]
+    tb.close(drain=False)
+
+
+def test_send_immediate_reuses_bridge_loop_and_is_bounded(bridge_env, monkeypatch):
+    api = bridge_env
+    monkeypatch.setenv('TELEGRAM_SYNC_TIMEOUT_SEC', '0.2')
+    tb = telegram_bridge.TelegramBridge()
+    try:
+        assert tb.send_immediate('un') and tb.send_immediate('deux')
+        # boucle du pont démarrée une fois: une seule connexion keep-alive pour les deux envois
+        assert tb.running and tb._transport.connections_opened == 1
+        api.latency = 1.0
+        started = time.monotonic()
+        assert not tb.send_immediate('trop lent')
+        assert time.monotonic() - started < 0.9
+    finally:
+        tb.close(drain=False)
+
+
+def test_backlog_document_streamed_from_journal(bridge_env, monkeypatch):
+    api = bridge_env
+    monkeypatch.setenv('TELEGRAM_DOCUMENT_THRESHOLD_BYTES', '2000')
+    tb = telegram_bridge.TelegramBridge()
+    for i in range(60):
+        tb.enqueue(f'[2025-01-01T00:00:00] [WARN] lent {i:02d} ' + 'x' * 50, 'log')
+    lane = tb._lanes['log']
+    # le document est relu depuis les segments du journal, pas depuis la file en mémoire
+    lane.items = type(lane.items)((seq, '?' * len(text)) for seq, text in lane.items)
+    tb.drain()
+    assert tb.get_queue() == [] and tb.backlog_stats()['documents'] == 1
+    body = api.calls[0][1]
+    doc = body.split(b'filename="', 1)[1].split(b'\r\n\r\n', 1)[1]
+    # résumé en tête du document (et en légende), puis les lignes dans l'ordre
+    assert doc.startswith('📦 Backlog Telegram (log): 60 messages — WARN: 60\n\n'.encode('utf8'))
+    assert b'lent 00 ' in doc and doc.index(b'lent 00 ') < doc.index(b'lent 59 ') and b'???' not in doc
+    tb.close(drain=False)
+
+
+def test_backlog_document_falls_back_to_memory_without_journal(bridge_env, monkeypatch):
+    api = bridge_env
+    monkeypatch.setenv('TELEGRAM_DOCUMENT_THRESHOLD_BYTES', '2000')
+    tb = telegram_bridge.TelegramBridge()
+    for i in range(60):
+        tb.enqueue(f'[INFO] ligne {i:02d} ' + 'y' * 50, 'log')
+    monkeypatch.setattr(tb._journal, 'iter_texts', lambda lengths: (x for x in ()))
+    tb.drain()
+    assert tb.get_queue() == []
+    assert b'60 messages' in api.calls[0][1] and b'ligne 59 ' in api.calls[0][1]
+    tb.close(drain=False)
@@ -0,0 +1,93 @@
+"""Tests du pré-filtre de on_raw_reaction_add (aucun appel REST hors fils de vérification)."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from verification import VerificationManager
+
+
+class FakeClient:
+    def __init__(self, guild):
+        self.user = SimpleNamespace(id=1)
+        self.guilds = [guild]
+        self.handlers = {}
+        self._guild = guild
+        self.rest = []
+
+    def event(self, fn):
+        self.handlers[fn.__name__] = fn
+        return fn
+
+    def get_guild(self, guild_id):
+        return self._guild
+
+    async def fetch_channel(self, channel_id):
+        self.rest.append(('fetch_channel', channel_id))
+        raise RuntimeError('REST interdit dans ce test')
+
+
+class FakeGuild:
+    def __init__(self, members, channels):
+        self.id = 100
+        self.members = members
+        self.channels_by_id = channels
+        self.channels = list(channels.values())
+        self.rest = []
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_channel_or_thread(self, channel_id):
+        return self.channels_by_id.get(channel_id)
+
+    async def fetch_member(self, user_id):
+        self.rest.append(('fetch_member', user_id))
+        raise RuntimeError('REST interdit dans ce test')
+
+
+@pytest.fixture
+def manager(isolated, monkeypatch):
+    monkeypatch.setenv('FORUM_CHANNEL_ID', '500')
+    mod = SimpleNamespace(id=7, guild_permissions=SimpleNamespace(manage_guild=True), roles=[])
+    guild = FakeGuild({7: mod}, {
+        500: SimpleNamespace(id=500, name='verifs'),
+        501: SimpleNamespace(id=501, parent_id=500, topic='verification:42'),
+        900: SimpleNamespace(id=900, parent_id=None, topic=''),
+    })
+    client = FakeClient(guild)
+    vm = VerificationManager(client, telegram_bridge=object(), data_dir=isolated / 'data')
+    vm.verifications['43'] = {'threadId': 777, 'awaitingValidation': True}
+    vm.attach_handlers()
+    handled = []
+
+    async def fake_accept(guild, channel, member, target_id):
+        handled.append((getattr(channel, 'id', None), target_id))
+
+    vm.handle_accept = fake_accept
+    return vm, client, guild, handled
+
+
+def _payload(channel_id, emoji='✅', user_id=7):
+    return SimpleNamespace(user_id=user_id, guild_id=100, channel_id=channel_id, message_id=1,
+                           emoji=SimpleNamespace(name=emoji), member=None)
+
+
+def test_unrelated_reactions_rejected_without_rest(manager):
+    vm, client, guild, handled = manager
+    on_reaction = client.handlers['on_raw_reaction_add']
+
+    async def run():
+        await on_reaction(_payload(900))           # salon quelconque
+        await on_reaction(_payload(123456))        # salon hors cache
+        await on_reaction(_payload(501, '👍'))      # mauvais emoji
+        await on_reaction(_payload(501, user_id=8))  # fil du forum, membre absent du cache -> REST
+        await on_reaction(_payload(501))           # fil enfant du forum, topic
+        await on_reaction(_payload(777))           # fil connu du store, hors cache
+
+    asyncio.run(run())
+    assert handled == [(501, '42'), (None, '43')]
+    assert vm.reaction_stats['rejected_channel'] == 2 and vm.reaction_stats['rejected_emoji'] == 1
+    assert guild.rest == [('fetch_member', 8)]
+    # fil 777 inconnu du cache: seul fetch_channel est tenté (le store donne le membre)
+    assert client.rest == [('fetch_channel', 777)]
@@ -0,0 +1,96 @@
+"""Tests de la file d'admission des vérifications."""
+import asyncio
+from types import SimpleNamespace
+
+from verification_scheduler import PRIORITY_JOIN, PRIORITY_REQUEST, VerificationScheduler
+from verification_store import IndexedVerifications
+
+
+class FakeManager:
+    def __init__(self, members=()):
+        self.verifications = IndexedVerifications({})
+        self._active_sessions = set()
+        self.logger = SimpleNamespace(error=lambda *a: None)
+        guild = SimpleNamespace(id=1, get_member=lambda uid: self.members.get(uid))
+        self.client = SimpleNamespace(get_guild=lambda gid: guild)
+        self.members = {m.id: m for m in members}
+        self.started = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    def _save_store(self):
+        pass
+
+    async def run_verification_for_member(self, member, session=None):
+        self.started.append(member.id)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await self.release.wait()
+        self.running -= 1
+        self.verifications[str(member.id)] = {'awaitingValidation': True}
+
+
+def _member(i):
+    return SimpleNamespace(id=i, guild=SimpleNamespace(id=1))
+
+
+def test_concurrency_bounded_and_priority_order():
+    async def run():
+        vm = FakeManager()
+        sched = VerificationScheduler(vm, concurrency=2)
+        for i in range(1, 6):
+            sched.admit(_member(i))
+        assert sched.admit(_member(3)) == 3 and sched.admitted == 5  # déjà en file: pas de doublon
+        assert sched.admit(_member(9), PRIORITY_REQUEST) == 1
+        await asyncio.sleep(0.01)
+        assert vm.started == [9, 1] and sched.stats()['depth'] == 4
+        assert vm.verifications['2']['status'] == 'queued'
+        vm.release.set()
+        for _ in range(50):
+            await asyncio.sleep(0.005)
+        assert vm.started == [9, 1, 2, 3, 4, 5] and vm.peak == 2
+        assert sched.stats()['depth'] == 0 and sched.stats()['running'] == 0
+
+    asyncio.run(run())
+
+
+def test_persisted_queue_restored_in_original_order():
+    async def run():
+        vm = FakeManager([_member(1), _member(2)])
+        vm.verifications['2'] = {'status': 'queued', 'queuedAt': 1000, 'queuePriority': PRIORITY_JOIN, 'guildId': 1}
+        vm.verifications['1'] = {'status': 'queued', 'queuedAt': 2000, 'queuePriority': PRIORITY_JOIN, 'guildId': 1}
+        vm.release.set()
+        sched = VerificationScheduler(vm, concurrency=1)
+        assert sched.restore() == 2
+        for _ in range(20):
+            await asyncio.sleep(0.005)
+        assert vm.started == [2, 1]
+        # attente mesurée depuis l'admission d'origine, redémarrage compris
+        assert sched.stats()['max_wait_sec'] > 1000
+
+    asyncio.run(run())
+
+
+def test_idle_releases_slot_while_waiting():
+    async def run():
+        vm = FakeManager()
+        sched = VerificationScheduler(vm, concurrency=1)
+        waiting = asyncio.Event()
+
+        async def waits_for_reply(member, session=None):
+            vm.started.append(member.id)
+            async with sched.idle():
+                waiting.set()
+                await vm.release.wait()
+
+        vm.run_verification_for_member = waits_for_reply
+        sched.admit(_member(1))
+        sched.admit(_member(2))
+        await asyncio.sleep(0.02)
+        # le 1er attend sa réponse sans occuper la place: le 2e a démarré
+        assert vm.started == [1, 2]
+        vm.release.set()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
@@ -0,0 +1,156 @@
+"""Tests des sessions de vérification sauvegardées et reprises après redémarrage."""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from verification import VerificationManager
+
+
+class FakeDM:
+    id = 900
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+
+class FakeMember:
+    def __init__(self, guild, dm):
+        self.id = 42
+        self.guild = guild
+        self.roles = []
+        self._dm = dm
+
+    async def create_dm(self):
+        return self._dm
+
+
+def _answer(vm, content):
+    return vm.route_message(SimpleNamespace(author=SimpleNamespace(id=42), channel=SimpleNamespace(id=900),
+                                            content=content))
+
+
+async def _until(predicate):
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError('condition jamais atteinte')
+
+
+def test_session_resumes_after_restart(isolated, monkeypatch):
+    monkeypatch.setenv('QUESTIONS', json.dumps(['Q1', 'Q2']))
+    monkeypatch.delenv('VERIF_MESSAGE_MD', raising=False)
+    monkeypatch.delenv('FORUM_CHANNEL_ID', raising=False)
+    guild = SimpleNamespace(id=1)
+    client = SimpleNamespace(event=lambda fn: fn, guilds=[], get_guild=lambda gid: guild)
+    dm = FakeDM()
+    member = FakeMember(guild, dm)
+    guild.get_member = lambda uid: member if uid == 42 else None
+
+    async def first_run():
+        vm = VerificationManager(client, telegram_bridge=object(), data_dir=isolated / 'data')
+        task = asyncio.get_running_loop().create_task(vm.run_verification_for_member(member))
+        await _until(lambda: dm.sent == ['Q1'])
+        assert _answer(vm, 'réponse 1')
+        await _until(lambda: dm.sent == ['Q1', 'Q2'])
+        # redémarrage brutal pendant l'attente de la 2e réponse
+        task.cancel()
+        vm.db.close()
+
+    asyncio.run(first_run())
+
+    async def second_run():
+        vm = VerificationManager(client, telegram_bridge=object(), data_dir=isolated / 'data')
+        session = vm.verifications['42']['session']
+        assert session['index'] == 1 and session['asked'] and session['deadline'] > time.time()
+        assert await vm.resume_sessions() == 1
+        await _until(lambda: '42' in vm._active_sessions and len(vm.router) == 1)
+        assert _answer(vm, 'réponse 2')
+        await _until(lambda: not vm._active_sessions)
+        # Q2 n'est pas renvoyée; les réponses d'avant le redémarrage sont conservées
+        assert dm.sent == ['Q1', 'Q2']
+        session = vm.verifications['42']['session']
+        assert session['step'] == 'publish'
+        assert [a['answer'] for a in session['answers']] == ['réponse 1', 'réponse 2']
+        vm.db.close()
+
+    asyncio.run(second_run())
+
+
+def test_failed_publish_is_not_resumed(isolated, monkeypatch):
+    monkeypatch.setenv('QUESTIONS', json.dumps(['Q1']))
+    monkeypatch.delenv('VERIF_MESSAGE_MD', raising=False)
+    monkeypatch.setenv('FORUM_CHANNEL_ID', '123')
+
+    class BrokenForum:
+        async def create_thread(self, **kwargs):
+            raise RuntimeError('403 Forbidden')
+
+        async def send(self, content):
+            raise RuntimeError('403 Forbidden')
+
+    async def fetch_channel(cid):
+        return BrokenForum()
+
+    guild = SimpleNamespace(id=1)
+    client = SimpleNamespace(event=lambda fn: fn, guilds=[], get_guild=lambda gid: guild,
+                             fetch_channel=fetch_channel)
+
+    async def closed_dm():
+        raise RuntimeError('DM fermés')
+
+    member = SimpleNamespace(id=42, guild=guild, roles=[], create_dm=closed_dm)
+
+    async def run():
+        vm = VerificationManager(client, telegram_bridge=object(), data_dir=isolated / 'data')
+        await vm.run_verification_for_member(member)
+        record = vm.verifications['42']
+        assert record['status'] == 'failed' and record['session']['step'] == 'publish'
+        # reconnexion / redémarrage: la session en échec n'est plus remise en file
+        assert vm.scheduler.restore() == 0 and vm.scheduler.stats()['depth'] == 0
+        vm.db.close()
+
+    asyncio.run(run())
+
+
+def test_published_thread_id_unwrapped_and_indexed(isolated, monkeypatch):
+    monkeypatch.setenv('QUESTIONS', json.dumps(['Q1']))
+    monkeypatch.delenv('VERIF_MESSAGE_MD', raising=False)
+    monkeypatch.setenv('FORUM_CHANNEL_ID', '123')
+    thread = SimpleNamespace(id=555, sent=[])
+
+    async def thread_send(content):
+        thread.sent.append(content)
+
+    thread.send = thread_send
+
+    class Forum:
+        async def create_thread(self, **kwargs):
+            # discord.py 2.x: ThreadWithMessage, sans attribut id
+            return SimpleNamespace(thread=thread, message=SimpleNamespace(id=556))
+
+    async def fetch_channel(cid):
+        return Forum()
+
+    guild = SimpleNamespace(id=1)
+    client = SimpleNamespace(event=lambda fn: fn, guilds=[], get_guild=lambda gid: guild,
+                             fetch_channel=fetch_channel)
+
+    async def closed_dm():
+        raise RuntimeError('DM fermés')
+
+    member = SimpleNamespace(id=42, guild=guild, roles=[], create_dm=closed_dm)
+
+    async def run():
+        vm = VerificationManager(client, telegram_bridge=SimpleNamespace(enqueue_verification=lambda t: None),
+                                 data_dir=isolated / 'data')
+        await vm.run_verification_for_member(member)
+        assert vm.verifications['42']['threadId'] == 555
+        assert vm.verifications.is_thread(555) and vm.verifications.member_for_thread(555) == '42'
+        vm.db.close()
+
+    asyncio.run(run())
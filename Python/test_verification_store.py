@@ -0,0 +1,52 @@
+"""Tests du store SQLite des vérifications."""
+import json
+
+from verification_store import IndexedVerifications, VerificationStore, VerificationsMapping
+
+
+def test_migrates_json_once_and_keeps_dict_access(tmp_path):
+    legacy = tmp_path / 'verifications.json'
+    legacy.write_text(json.dumps({'verifications': {
+        '1': {'threadId': 11, 'channelId': 'forum', 'createdAt': 1000, 'awaitingValidation': True},
+        '2': {'threadId': None, 'status': 'accepted', 'createdAt': 2000},
+    }}), encoding='utf8')
+    db = VerificationStore(tmp_path / 'verifications.db')
+    assert db.migrate_json(legacy) == 2
+    assert not legacy.exists() and (tmp_path / 'verifications.json.migrated').exists()
+
+    store = {'verifications': VerificationsMapping(db)}
+    existing = store.get('verifications', {}).get('1', {})
+    store['verifications']['1'] = {**existing, 'status': 'processing', 'awaitingValidation': False}
+    assert store['verifications'].get('3', {}) == {}
+    assert sorted(store['verifications']) == ['1', '2']
+    db.close()
+
+    reopened = VerificationStore(tmp_path / 'verifications.db')
+    legacy.write_text('{"verifications": {"9": {}}}', encoding='utf8')
+    assert reopened.migrate_json(legacy) == 0
+    assert reopened.get('1') == {'threadId': 11, 'channelId': 'forum', 'createdAt': 1000,
+                                 'awaitingValidation': False, 'status': 'processing'}
+    assert reopened.by_thread(11) == '1'
+    assert [mid for mid, _ in reopened.by_status('accepted')] == ['2']
+    reopened.close()
+
+
+def test_indexes_follow_every_mutation(tmp_path):
+    db = VerificationStore(tmp_path / 'verifications.db')
+    db.put('1', {'threadId': 11, 'awaitingValidation': True})
+    verifs = IndexedVerifications(VerificationsMapping(db))
+    verifs['2'] = {'threadId': 22, 'awaitingValidation': True}
+    assert verifs.member_for_thread(11) == '1' and verifs.member_for_thread('22') == '2'
+    assert verifs.pending == {'1', '2'}
+
+    verifs['1'] = {**verifs['1'], 'status': 'accepted', 'awaitingValidation': False}
+    assert verifs.pending == {'2'} and verifs.with_status('accepted') == {'1'}
+    verifs['2'] = {'threadId': 23, 'status': 'processing'}
+    assert verifs.member_for_thread(22) is None and verifs.member_for_thread(23) == '2'
+    del verifs['2']
+    assert verifs.with_status('processing') == frozenset() and verifs.member_for_thread(23) is None
+
+    # reconstruit au chargement
+    reloaded = IndexedVerifications(VerificationsMapping(db))
+    assert reloaded.member_for_thread(11) == '1' and reloaded.with_status('accepted') == {'1'}
+    db.close()
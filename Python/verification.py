@@ -6,31 +6,76 @@ opérations dépendent de la version de `discord.py`; le code est robuste et
 utilise des fallback si l'API exacte n'est pas disponible.
 """
 import os
+import re
 import json
 import asyncio
 import time
+from collections import deque
 from pathlib import Path
 from logger import Logger
 from telegram_bridge import get_bridge
 from send_long import send_long
+from verification_store import IndexedVerifications, VerificationStore, VerificationsMapping
+from role_resolver import RolePlan, get_role_resolver
+from conversation_router import ConversationRouter
+from verification_scheduler import PRIORITY_REQUEST, VerificationScheduler
+from discord_retry import get_retry_engine
+from join_monitor import JoinRateMonitor
 
 
 class VerificationManager:
-    def __init__(self, client, logger: Logger = None, telegram_bridge=None):
+    def __init__(self, client, logger: Logger = None, telegram_bridge=None, data_dir=None, roles=None, retry=None):
         self.client = client
         self.logger = logger or Logger()
         self.telegram = telegram_bridge or get_bridge()
+        # rôles configurés résolus une fois par serveur (invalidés par les événements de rôles)
+        self.roles = roles or get_role_resolver()
+        # réponses attendues (DM, fils de modération): remise O(1) au lieu d'un wait_for par attente
+        self.router = ConversationRouter()
+        # appels REST: budget par route partagé avec les slash-commands, reprises sur 429/5xx
+        self.retry = retry or get_retry_engine()
+        self.pacer = self.retry.pacer
+        # file d'admission (concurrence bornée)
+        self.scheduler = VerificationScheduler(self)
+        # vagues d'arrivées: mode dégradé par serveur, membres reportés puis remis en file
+        self.joins = JoinRateMonitor()
+        self.lockdown_check_sec = min(5.0, self.joins.window / 4)
+        self._deferred = {}
+        self._waves = {}
+        # tâches de fond par serveur (référence gardée: pas de GC en cours de route ni de doublon)
+        self._watchers = {}
+        self._drainers = {}
         # store data under Python/data to keep Python artifacts together
         base_dir = Path(__file__).resolve().parent
-        self.data_dir = base_dir / 'data'
+        self.data_dir = Path(data_dir) if data_dir else base_dir / 'data'
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.store_file = self.data_dir / 'verifications.json'
+        self.db = None
         self.store = {'verifications': {}}
         self._load_store()
         # cooldown map for request_verif button
         self._last_request = {}
+        # member_id des sessions de vérification en cours dans ce processus
+        self._active_sessions = set()
+        # filtre des réactions ✅/❌: compteurs des rejets avant tout appel REST
+        self.reaction_stats = {'seen': 0, 'rejected_emoji': 0, 'rejected_channel': 0,
+                               'rejected_permission': 0, 'handled': 0, 'rest_calls': 0}
+        self._forum_id = None
 
     def _load_store(self):
+        # SQLite par défaut (une ligne écrite par changement d'état);
+        # VERIFICATION_STORE=json garde l'ancien fichier unique
+        if os.getenv('VERIFICATION_STORE', 'sqlite').lower() != 'json':
+            try:
+                self.db = VerificationStore(self.data_dir / 'verifications.db')
+                migrated = self.db.migrate_json(self.store_file)
+                if migrated:
+                    self.logger.info('Vérifications migrées de JSON vers SQLite: %d', migrated)
+                self.store = {'verifications': IndexedVerifications(VerificationsMapping(self.db))}
+                return
+            except Exception as e:
+                self.db = None
+                self.logger.error(f'Store SQLite indisponible, repli sur JSON: {e}')
         try:
             if self.store_file.exists():
                 raw = self.store_file.read_text(encoding='utf8')
@@ -39,34 +84,110 @@ class VerificationManager:
                     self.store['verifications'] = {}
         except Exception:
             self.store = {'verifications': {}}
+        self.store['verifications'] = IndexedVerifications(self.store['verifications'])
+
+    @property
+    def verifications(self) -> IndexedVerifications:
+        """Vérifications indexées par fil et par statut (toute mutation passe par là)."""
+        return self.store['verifications']
+
+    def _forum_channel_id(self):
+        """ID du forum de vérification (FORUM_CHANNEL_ID numérique ou nom résolu via le cache)."""
+        if self._forum_id is None:
+            forum_channel_id = os.getenv('FORUM_CHANNEL_ID') or ''
+            if forum_channel_id.isdigit():
+                self._forum_id = int(forum_channel_id)
+            elif forum_channel_id:
+                for g in getattr(self.client, 'guilds', []) or []:
+                    for c in getattr(g, 'channels', []) or []:
+                        if getattr(c, 'name', None) == forum_channel_id:
+                            self._forum_id = c.id
+                            break
+                    if self._forum_id:
+                        break
+        return self._forum_id
+
+    def _is_verification_channel(self, guild, channel_id) -> bool:
+        """Fil de vérification connu, forum lui-même ou fil enfant du forum (cache uniquement)."""
+        if self.verifications.is_thread(channel_id):
+            return True
+        forum_id = self._forum_channel_id()
+        if not forum_id:
+            return False
+        if int(channel_id) == forum_id:
+            return True
+        channel = None
+        try:
+            channel = guild.get_channel_or_thread(int(channel_id))
+        except Exception:
+            channel = None
+        return channel is not None and getattr(channel, 'parent_id', None) == forum_id
+
+    def _can_validate(self, member) -> bool:
+        try:
+            return self.roles.can_verify(member)
+        except Exception:
+            return False
+
+    def route_message(self, message) -> bool:
+        """Remet `message` à la conversation qui attend son auteur dans ce salon (True si remis)."""
+        return self.router.dispatch(message)
+
+    async def _wait_reply(self, author_id, channel_id, timeout: float):
+        """Prochain message de `author_id` dans `channel_id`; asyncio.TimeoutError sinon."""
+        with self.router.open(author_id, channel_id) as conv:
+            return await conv.next(timeout)
+
+    def pending_verifications(self) -> frozenset:
+        """member_id des vérifications en attente de validation, sans parcours du store."""
+        return frozenset(self.verifications.pending)
 
     def _save_store(self):
+        # avec SQLite chaque affectation est déjà persistée
+        if self.db is not None:
+            return
         try:
-            self.store_file.write_text(json.dumps(self.store, indent=2, ensure_ascii=False), encoding='utf8')
+            tmp = self.store_file.with_name(self.store_file.name + '.tmp')
+            data = {**self.store, 'verifications': dict(self.verifications.backing)}
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf8')
+            os.replace(tmp, self.store_file)
         except Exception:
             pass
 
     async def try_role_operation(self, op_coro, context_msg: str, channel=None):
-        # Retry transient errors
-        delays = [0.5, 1.5, 3.5]
-        for attempt, delay in enumerate([0, *delays], start=1):
-            try:
-                if attempt > 1:
-                    await asyncio.sleep(delay)
-                await op_coro()
-                return True
-            except Exception as e:
-                msg = str(e)
-                transient = '429' in msg or 'rate' in msg.lower() or 'timeout' in msg.lower()
-                self.logger.warn(f"Tentative {attempt} échouée pour {context_msg}: {msg}")
-                if not transient or attempt >= len(delays) + 1:
-                    if channel:
-                        try:
-                            await channel.send(f"⚠️ Erreur: impossible de {context_msg}. Détails: {msg}")
-                        except Exception:
-                            pass
-                    return False
-        return False
+        """Opération de rôles via le moteur de reprises (route `roles`); False et message d'erreur si elle échoue."""
+        try:
+            await self.retry.call('roles', op_coro)
+            return True
+        except Exception as e:
+            self.logger.warn(f"Échec pour {context_msg}: {e}")
+            if channel:
+                try:
+                    await channel.send(f"⚠️ Erreur: impossible de {context_msg}. Détails: {e}")
+                except Exception:
+                    pass
+            return False
+
+    async def _apply_role_plan(self, guild, member_id, build, reason: str = None):
+        """Applique `build(RolePlan)` en un seul `member.edit`, depuis l'état courant du membre.
+
+        Le membre est relu dans le cache de la gateway (tenu à jour par les
+        événements, sans appel REST) juste avant l'appel: les rôles ajoutés ou
+        retirés par d'autres pendant les invites au modérateur ne sont pas
+        écrasés. Hors cache, un `fetch_member` direct, repris avec l'appel
+        `roles` de l'appelant (pas de boucle de reprises imbriquée).
+        Retourne les rôles ajoutés.
+        """
+        try:
+            member = guild.get_member(int(member_id))
+        except Exception:
+            member = None
+        if member is None:
+            member = await guild.fetch_member(int(member_id))
+        plan = build(RolePlan(member))
+        added = plan.added
+        await plan.apply(reason=reason)
+        return added
 
     def attach_handlers(self):
         # Attach event handlers to the client. Use best-effort to map behavior.
@@ -74,11 +195,15 @@ class VerificationManager:
         @self.client.event
         async def on_ready():
             self.logger.info('VerificationManager attached handlers (ready)')
+            try:
+                await self.resume_sessions()
+            except Exception as e:
+                self.logger.error(f'Erreur reprise des vérifications: {e}')
 
         @self.client.event
         async def on_member_join(member):
             try:
-                await self.run_verification_for_member(member)
+                await self.admit_join(member)
             except Exception as e:
                 self.logger.error(f'Erreur run verification: {e}')
 
@@ -125,8 +250,11 @@ class VerificationManager:
                             except Exception:
                                 target_member = None
                         if target_member:
-                            await self.run_verification_for_member(target_member)
-                            await interaction.followup.send("Le message de vérification t'a été envoyé en DM (si tes DMs sont ouverts).", ephemeral=True)
+                            position = self.scheduler.admit(target_member, PRIORITY_REQUEST)
+                            if position > 1:
+                                await interaction.followup.send(f"Ta demande est en file d'attente (position {position}) — le message de vérification t'arrivera en DM (si tes DMs sont ouverts).", ephemeral=True)
+                            else:
+                                await interaction.followup.send("Le message de vérification va t'être envoyé en DM (si tes DMs sont ouverts).", ephemeral=True)
                         else:
                             await interaction.followup.send("Impossible de lancer la vérification (membre introuvable).", ephemeral=True)
 
@@ -138,6 +266,8 @@ class VerificationManager:
             try:
                 if message.author.bot:
                     return
+                if self.route_message(message):
+                    return
                 # global cancel command (annuler)
                 text = (message.content or '').lower().strip()
                 import re
@@ -147,20 +277,7 @@ class VerificationManager:
                 if not guild:
                     return
                 member = await guild.fetch_member(message.author.id)
-                allowed = False
-                try:
-                    if member.guild_permissions.manage_guild:
-                        allowed = True
-                except Exception:
-                    allowed = False
-                verifier_role = os.getenv('VERIFIER_ROLE')
-                if not allowed and verifier_role and member:
-                    try:
-                        if any(r.name == verifier_role for r in member.roles):
-                            allowed = True
-                    except Exception:
-                        pass
-                if not allowed:
+                if not self._can_validate(member):
                     await message.channel.send(f"<@{message.author.id}> Vous n'êtes pas autorisé·e à annuler une vérification.")
                     return
 
@@ -190,12 +307,15 @@ class VerificationManager:
         @self.client.event
         async def on_raw_reaction_add(payload):
             # best-effort: payload may be RawReactionActionEvent without message or guild objects
+            stats = self.reaction_stats
             try:
                 if str(payload.user_id) == str(self.client.user.id):
                     return
+                stats['seen'] += 1
                 emoji = getattr(payload, 'emoji', None)
                 name = getattr(emoji, 'name', str(emoji))
                 if name not in ('✅', '❌'):
+                    stats['rejected_emoji'] += 1
                     return
                 guild = None
                 try:
@@ -204,37 +324,40 @@ class VerificationManager:
                     guild = None
                 if not guild:
                     return
-                member = await guild.fetch_member(payload.user_id)
-                allowed = False
-                try:
-                    if member.guild_permissions.manage_guild:
-                        allowed = True
-                except Exception:
-                    allowed = False
-                verifier_role = os.getenv('VERIFIER_ROLE')
-                if not allowed and verifier_role and member:
-                    try:
-                        if any(r.name == verifier_role for r in member.roles):
-                            allowed = True
-                    except Exception:
-                        pass
-                if not allowed:
+                # filtre sans REST: la réaction doit viser un fil de vérification
+                if not self._is_verification_channel(guild, payload.channel_id):
+                    stats['rejected_channel'] += 1
+                    return
+                # membre depuis l'événement ou le cache; REST seulement en dernier recours
+                member = getattr(payload, 'member', None) or guild.get_member(payload.user_id)
+                if member is None:
+                    stats['rest_calls'] += 1
+                    member = await guild.fetch_member(payload.user_id)
+                if not self._can_validate(member):
+                    stats['rejected_permission'] += 1
                     return
+                stats['handled'] += 1
 
                 # Try to resolve targetId via thread topic or message content
                 target_id = None
                 # Try thread topic (payload.channel_id points to thread)
                 try:
-                    channel = await self.client.fetch_channel(payload.channel_id)
+                    channel = guild.get_channel_or_thread(payload.channel_id)
+                    if channel is None:
+                        stats['rest_calls'] += 1
+                        channel = await self.client.fetch_channel(payload.channel_id)
                     topic = getattr(channel, 'topic', '') or ''
-                    import re
                     m = re.search(r"verification:(\d+)", topic)
                     if m:
                         target_id = m.group(1)
                 except Exception:
                     pass
+                if not target_id:
+                    # index threadId -> membre (O(1)) avant de relire le message
+                    target_id = self.verifications.member_for_thread(payload.channel_id)
                 if not target_id:
                     try:
+                        stats['rest_calls'] += 1
                         msg = await channel.fetch_message(payload.message_id)
                         if msg and msg.content:
                             m2 = re.search(r"verification_member_id:(\d+)", msg.content)
@@ -242,15 +365,6 @@ class VerificationManager:
                                 target_id = m2.group(1)
                     except Exception:
                         pass
-                if not target_id:
-                    # fallback: search store by thread id
-                    try:
-                        for mid, info in (self.store.get('verifications') or {}).items():
-                            if info and str(info.get('threadId')) == str(payload.channel_id):
-                                target_id = mid
-                                break
-                    except Exception:
-                        pass
                 if not target_id:
                     return
 
@@ -261,143 +375,376 @@ class VerificationManager:
             except Exception as e:
                 self.logger.error(f'on_raw_reaction_add error: {e}')
 
+        # tout changement de rôle (création, renommage, suppression) invalide le cache du serveur
+        @self.client.event
+        async def on_guild_role_create(role):
+            self.roles.invalidate(role.guild.id)
+
+        @self.client.event
+        async def on_guild_role_update(before, after):
+            self.roles.invalidate(after.guild.id)
+
+        @self.client.event
+        async def on_guild_role_delete(role):
+            self.roles.invalidate(role.guild.id)
+
         @self.client.event
         async def on_message_edit(before, after):
             # ignore for now
             return
 
-    async def run_verification_for_member(self, member):
+    def _checkpoint(self, member_id, session: dict):
+        """Persiste l'état de la session (étape, réponses, échéance) dans le store."""
         try:
-            self.logger.info(f'Lancement vérification pour: {getattr(member, "user", member)}')
-            non_verified_role = os.getenv('NON_VERIFIED_ROLE')
-            # add non-verified role if configured
-            if non_verified_role and hasattr(member, 'roles'):
+            mid = str(member_id)
+            existing = self.verifications.get(mid) or {}
+            self.verifications[mid] = {**existing, 'status': 'in_progress', 'session': session}
+            self._save_store()
+        except Exception as e:
+            self.logger.warn(f'Checkpoint de session impossible pour {member_id}: {e}')
+
+    def _fail_session(self, member_id, reason: str):
+        """Statut terminal `failed`: `restore()` ne remet plus la session en file à chaque reconnexion."""
+        try:
+            mid = str(member_id)
+            existing = self.verifications.get(mid) or {}
+            if existing.get('status') == 'in_progress':
+                self.verifications[mid] = {**existing, 'status': 'failed', 'failedReason': reason,
+                                           'failedAt': int(time.time() * 1000)}
+                self._save_store()
+        except Exception as e:
+            self.logger.warn(f'Statut de session non enregistré pour {member_id}: {e}')
+
+    async def _wait_until(self, conv, session):
+        """Prochain message avant `session['deadline']` (secondes epoch); asyncio.TimeoutError sinon.
+
+        L'attente libère la place du pipeline dans la file d'admission.
+        """
+        async with self.scheduler.idle():
+            return await conv.next(max(0.0, session['deadline'] - time.time()))
+
+    async def _run_dm_steps(self, member, dm, session: dict) -> list:
+        """Machine à états du DM: intro -> collect (texte libre) ou questions -> publish.
+
+        Chaque transition est sauvegardée; une session reprise repart de son
+        étape, sans renvoyer la question déjà posée, avec l'échéance d'origine.
+        """
+        member_id = getattr(member, 'id', None)
+        with self.router.open(member_id, dm.id) as conv:
+            if session['step'] == 'intro':
+                await self.pacer.acquire('dm')
+                try:
+                    await send_long(dm, session['message'])
+                except Exception:
+                    try:
+                        await dm.send(session['message'])
+                    except Exception:
+                        pass
+                try:
+                    await dm.send("Merci : réponds à ces questions dans ce DM. Tape `done` quand tu as fini (ou attends 10 minutes).")
+                except Exception:
+                    pass
+                session.update(step='collect', deadline=time.time() + 10 * 60)
+                self._checkpoint(member_id, session)
+
+            if session['step'] == 'collect':
+                try:
+                    while True:
+                        m = await self._wait_until(conv, session)
+                        if m.content and m.content.lower().strip() == 'done':
+                            break
+                        session['collected'].append(m.content)
+                        session['deadline'] = time.time() + 10 * 60
+                        self._checkpoint(member_id, session)
+                except asyncio.TimeoutError:
+                    pass
+                collected = session['collected']
+                combined = '\n\n'.join(collected) if collected else 'Aucune réponse'
+                session['answers'] = [{'question': 'Réponses', 'answer': combined}]
+                try:
+                    if collected:
+                        await dm.send('Votre vérification a bien été reçue et sera bientôt traitée.')
+                except Exception:
+                    pass
+
+            while session['step'] == 'questions' and session['index'] < len(session['questions']):
+                q = session['questions'][session['index']]
                 try:
-                    guild = member.guild
-                    r = None
-                    if non_verified_role.isdigit():
-                        r = guild.get_role(int(non_verified_role))
-                    if not r:
-                        for rr in guild.roles:
-                            if rr.name == non_verified_role:
-                                r = rr
+                    if not session.get('asked'):
+                        await self.retry.call('dm', lambda: dm.send(q), idempotent=False)
+                        session.update(asked=True, deadline=time.time() + 10 * 60)
+                        self._checkpoint(member_id, session)
+                    try:
+                        m = await self._wait_until(conv, session)
+                        session['answers'].append({'question': q, 'answer': m.content})
+                    except asyncio.TimeoutError:
+                        session['answers'].append({'question': q, 'answer': 'Pas de réponse (temps écoulé)'})
+                except Exception:
+                    session['answers'].append({'question': q, 'answer': 'Erreur en envoi DM'})
+                session.update(index=session['index'] + 1, asked=False)
+                self._checkpoint(member_id, session)
+
+        session.update(step='publish', deadline=None)
+        self._checkpoint(member_id, session)
+        return session['answers']
+
+    async def _fetch_forum(self):
+        """Forum de vérification (FORUM_CHANNEL_ID: ID, sinon nom cherché dans les serveurs), ou None."""
+        forum_channel_id = os.getenv('FORUM_CHANNEL_ID')
+        if not forum_channel_id:
+            return None
+        forum = None
+        try:
+            if str(forum_channel_id).isdigit():
+                forum = await self.client.fetch_channel(int(forum_channel_id))
+        except Exception:
+            forum = None
+        if not forum:
+            # try by name across guilds
+            for g in self.client.guilds:
+                try:
+                    for c in g.channels:
+                        try:
+                            if getattr(c, 'name', None) == forum_channel_id:
+                                forum = c
                                 break
+                        except Exception:
+                            continue
+                    if forum:
+                        break
+                except Exception:
+                    continue
+        return forum
+
+    async def admit_join(self, member):
+        """Arrivée d'un membre: file de vérification, ou report si le serveur est en mode dégradé."""
+        guild = getattr(member, 'guild', None)
+        gid = getattr(guild, 'id', None)
+        if self.joins.record(gid) == 'enter':
+            self._enter_lockdown(guild)
+        if self.joins.locked(gid):
+            await self._defer_member(member)
+        else:
+            self.scheduler.admit(member)
+
+    def _enter_lockdown(self, guild):
+        gid = getattr(guild, 'id', None)
+        self._waves[gid] = {'started': time.time(), 'members': []}
+        self.logger.warn(f'Vague d\'arrivées sur {getattr(guild, "name", gid)}: mode dégradé '
+                         f'({self.joins.rate(gid)} arrivées en {self.joins.window:.0f}s)')
+        try:
+            self.telegram.enqueue_verification(
+                f"🚨 Vague d'arrivées sur {getattr(guild, 'name', gid)} — mode dégradé: rôle non-vérifié "
+                f"uniquement, DM et fils de vérification reportés.")
+        except Exception:
+            pass
+        self._spawn(self._watchers, gid, lambda: self._watch_lockdown(guild), 'surveillance de vague')
+
+    def _spawn(self, tasks: dict, gid, factory, what: str):
+        """Une tâche de fond par serveur dans `tasks`: pas de doublon, exceptions journalisées."""
+        task = tasks.get(gid)
+        if task is not None and not task.done():
+            return task
+        task = asyncio.get_running_loop().create_task(factory())
+        tasks[gid] = task
+
+        def done(t):
+            if tasks.get(gid) is t:
+                del tasks[gid]
+            if not t.cancelled() and t.exception() is not None:
+                self.logger.error(f'Erreur {what} ({gid}): {t.exception()}')
+
+        task.add_done_callback(done)
+        return task
+
+    async def _defer_member(self, member):
+        """Mode dégradé: applique seulement NON_VERIFIED_ROLE et note le membre (statut `deferred`)."""
+        gid = getattr(member.guild, 'id', None)
+        if self.roles.configured('non_verified'):
+            try:
+                r = self.roles.resolve(member.guild, 'non_verified')
+                if r:
+                    await self.retry.call('roles', lambda: member.add_roles(r))
+            except Exception:
+                pass
+        mid = str(member.id)
+        try:
+            existing = self.verifications.get(mid) or {}
+            self.verifications[mid] = {**existing, 'status': 'deferred', 'deferredAt': int(time.time() * 1000),
+                                       'guildId': gid}
+            self._save_store()
+        except Exception:
+            pass
+        self._deferred.setdefault(gid, deque()).append(mid)
+        wave = self._waves.get(gid)
+        if wave is not None:
+            wave['members'].append(mid)
+
+    async def _watch_lockdown(self, guild):
+        gid = getattr(guild, 'id', None)
+        while self.joins.update(gid) != 'exit':
+            await asyncio.sleep(self.lockdown_check_sec)
+        self.logger.info(f'Fin du mode dégradé sur {getattr(guild, "name", gid)}')
+        await self._post_wave_summary(guild)
+        # tâche séparée: une nouvelle vague pendant le drainage a son propre surveillant
+        self._spawn(self._drainers, gid, lambda: self._drain_deferred(guild), 'drainage des reports')
+
+    async def _post_wave_summary(self, guild):
+        """Un seul résumé (Telegram + un fil de forum) pour toute la vague, au lieu d'un fil par membre."""
+        wave = self._waves.pop(getattr(guild, 'id', None), None)
+        if not wave or not wave['members']:
+            return
+        members = wave['members']
+        minutes = max(1, round((time.time() - wave['started']) / 60))
+        per_min = os.getenv('JOIN_DRAIN_PER_MIN', '30')
+        summary = (f"Vague d'arrivées sur {getattr(guild, 'name', '')}: {len(members)} membres en ~{minutes} min. "
+                   f"Rôle non-vérifié appliqué; vérifications reprises progressivement (~{per_min}/min).")
+        try:
+            self.telegram.enqueue_verification('🚨 ' + summary)
+        except Exception:
+            pass
+        forum = await self._fetch_forum()
+        if not forum:
+            return
+        content = summary + '\n\n' + ' '.join(f'<@{mid}>' for mid in members)
+        try:
+            try:
+                thread = await self.retry.call('forum', lambda: forum.create_thread(
+                    name=f"Vague d'arrivées — {len(members)} membres", auto_archive_duration=10080,
+                    content=content[:1900]), idempotent=False)
+                target = getattr(thread, 'thread', thread)
+            except Exception:
+                await forum.send(content[:1900])
+                target = forum
+            if len(content) > 1900:
+                await send_long(target, content[1900:])
+        except Exception as e:
+            self.logger.warn(f'Résumé de vague non publié sur le forum: {e}')
+
+    async def _drain_deferred(self, guild):
+        """Remet en file les membres reportés, à `JOIN_DRAIN_PER_MIN`; s'interrompt si une vague reprend."""
+        gid = getattr(guild, 'id', None)
+        interval = 60.0 / max(0.1, float(os.getenv('JOIN_DRAIN_PER_MIN', '30')))
+        queue = self._deferred.get(gid) or deque()
+        while queue:
+            if self.joins.locked(gid):
+                return  # la fin de la nouvelle vague reprendra le drainage
+            mid = queue.popleft()
+            if (self.verifications.get(mid) or {}).get('status') != 'deferred':
+                continue  # déjà relancé (bouton request_verif) ou traité
+            member = guild.get_member(int(mid))
+            if member is None:
+                try:
+                    member = await self.retry.call('members', lambda: guild.fetch_member(int(mid)))
+                except Exception:
+                    member = None
+            if member is None:
+                self.verifications[mid] = {**self.verifications[mid], 'status': 'abandoned'}
+                self._save_store()
+                continue
+            self.scheduler.admit(member)
+            await asyncio.sleep(interval)
+
+    async def resume_sessions(self):
+        """Remet en file les vérifications interrompues (`in_progress`, en tête) et la file persistée (`queued`).
+
+        Les membres reportés par une vague d'arrivées (`deferred`) sont drainés au rythme habituel.
+        """
+        restored = self.scheduler.restore()
+        deferred = {}
+        for mid in self.verifications.with_status('deferred'):
+            record = self.verifications.get(mid) or {}
+            deferred.setdefault(record.get('guildId'), []).append((record.get('deferredAt') or 0, mid))
+        for gid, entries in deferred.items():
+            known = set(self._deferred.get(gid, ()))
+            queue = self._deferred.setdefault(gid, deque())
+            queue.extend(mid for _, mid in sorted(entries) if mid not in known)
+            guild = self.client.get_guild(int(gid or 0))
+            if guild is not None:
+                self._spawn(self._drainers, gid, lambda g=guild: self._drain_deferred(g), 'drainage des reports')
+        if restored:
+            self.logger.info('Vérifications reprises après redémarrage: %d', restored)
+        return restored
+
+    async def run_verification_for_member(self, member, session: dict = None):
+        member_id = getattr(member, 'id', None)
+        self._active_sessions.add(str(member_id))
+        try:
+            await self._run_verification(member, session)
+        finally:
+            self._active_sessions.discard(str(member_id))
+
+    async def _run_verification(self, member, session: dict = None):
+        member_id = getattr(member, 'id', None)
+        try:
+            resumed = session is not None
+            self.logger.info('%s vérification pour: %s', 'Reprise' if resumed else 'Lancement', getattr(member, "user", member))
+            # add non-verified role if configured
+            if not resumed and self.roles.configured('non_verified') and hasattr(member, 'roles'):
+                try:
+                    r = self.roles.resolve(member.guild, 'non_verified')
                     if r:
-                        await member.add_roles(r)
+                        await self.retry.call('roles', lambda: member.add_roles(r))
                 except Exception:
                     pass
 
             # open DM
             dm = None
             try:
-                dm = await member.create_dm()
+                dm = await self.retry.call('dm', member.create_dm)
             except Exception:
                 dm = None
 
-            questions_env = os.getenv('QUESTIONS')
-            verif_md = os.getenv('VERIF_MESSAGE_MD')
-            DEFAULT_QUESTIONS = [
-                "Bonjour ! Peux-tu te présenter en quelques lignes ?",
-                "Quel âge as-tu ?",
-                "D'où viens-tu (pays / région) ?",
-                "As-tu lu et accepté les règles du serveur ?"
-            ]
-
-            questions = DEFAULT_QUESTIONS
-            if questions_env:
-                try:
-                    parsed = json.loads(questions_env)
-                    if isinstance(parsed, list) and parsed:
-                        questions = parsed
-                except Exception:
-                    verif_md = questions_env
-                    questions = []
+            if not resumed:
+                questions_env = os.getenv('QUESTIONS')
+                verif_md = os.getenv('VERIF_MESSAGE_MD')
+                DEFAULT_QUESTIONS = [
+                    "Bonjour ! Peux-tu te présenter en quelques lignes ?",
+                    "Quel âge as-tu ?",
+                    "D'où viens-tu (pays / région) ?",
+                    "As-tu lu et accepté les règles du serveur ?"
+                ]
 
-            answers = []
-            if dm:
-                try:
-                    if verif_md:
-                        try:
-                            await send_long(dm, verif_md)
-                        except Exception:
-                            try:
-                                await dm.send(verif_md)
-                            except Exception:
-                                pass
-                        try:
-                            await dm.send("Merci : réponds à ces questions dans ce DM. Tape `done` quand tu as fini (ou attends 10 minutes).")
-                        except Exception:
-                            pass
+                questions = DEFAULT_QUESTIONS
+                if questions_env:
+                    try:
+                        parsed = json.loads(questions_env)
+                        if isinstance(parsed, list) and parsed:
+                            questions = parsed
+                    except Exception:
+                        verif_md = questions_env
+                        questions = []
 
-                        collected = []
-                        def check(m):
-                            return m.author.id == getattr(member, 'id', None)
+                # état complet de la session, sauvegardé à chaque transition
+                session = {
+                    'step': 'intro' if verif_md else 'questions',
+                    'message': verif_md, 'questions': [] if verif_md else questions,
+                    'index': 0, 'asked': False, 'answers': [], 'collected': [], 'deadline': None,
+                    'guildId': getattr(getattr(member, 'guild', None), 'id', None),
+                }
+                if not dm:
+                    session.update(step='publish', answers=[{'question': q, 'answer': 'Pas de réponse (DM fermé)'}
+                                                            for q in session['questions']])
+                self._checkpoint(member_id, session)
 
-                        try:
-                            while True:
-                                m = await self.client.wait_for('message', timeout=10 * 60, check=check)
-                                if m.content and m.content.lower().strip() == 'done':
-                                    break
-                                collected.append(m.content)
-                        except asyncio.TimeoutError:
-                            pass
-
-                        combined = '\n\n'.join(collected) if collected else 'Aucune réponse'
-                        answers.append({'question': 'Réponses', 'answer': combined})
-                        try:
-                            if collected:
-                                await dm.send('Votre vérification a bien été reçue et sera bientôt traitée.')
-                        except Exception:
-                            pass
-                    else:
-                        for q in questions:
-                            try:
-                                await dm.send(q)
-                                def check(m):
-                                    return m.author.id == getattr(member, 'id', None)
-                                try:
-                                    m = await self.client.wait_for('message', timeout=10 * 60, check=check)
-                                    answers.append({'question': q, 'answer': m.content})
-                                except asyncio.TimeoutError:
-                                    answers.append({'question': q, 'answer': 'Pas de réponse (temps écoulé)'})
-                            except Exception:
-                                answers.append({'question': q, 'answer': 'Erreur en envoi DM'})
+            answers = session['answers']
+            if dm and session['step'] != 'publish':
+                try:
+                    answers = await self._run_dm_steps(member, dm, session)
                 except Exception as e:
                     self.logger.warn(f'Erreur DM during verification: {e}')
-            else:
-                for q in questions:
-                    answers.append({'question': q, 'answer': 'Pas de réponse (DM fermé)'})
 
             # publish to forum
             forum_channel_id = os.getenv('FORUM_CHANNEL_ID')
             if not forum_channel_id:
                 self.logger.warn('FORUM_CHANNEL_ID non défini, impossible de poster les réponses de vérification.')
+                self._fail_session(member_id, 'forum non configuré')
                 return
 
-            forum = None
-            try:
-                if str(forum_channel_id).isdigit():
-                    forum = await self.client.fetch_channel(int(forum_channel_id))
-            except Exception:
-                forum = None
-            if not forum:
-                # try by name across guilds
-                for g in self.client.guilds:
-                    try:
-                        for c in g.channels:
-                            try:
-                                if getattr(c, 'name', None) == forum_channel_id:
-                                    forum = c
-                                    break
-                            except Exception:
-                                continue
-                        if forum:
-                            break
-                    except Exception:
-                        continue
-
+            forum = await self._fetch_forum()
             if not forum:
                 self.logger.warn('Impossible de récupérer le forum (FORUM_CHANNEL_ID incorrect)')
+                self._fail_session(member_id, 'forum introuvable')
                 return
 
             title = f"{getattr(member, 'nick', None) or getattr(member, 'name', getattr(member, 'user', member))}"
@@ -419,7 +766,8 @@ class VerificationManager:
                 # attempt to create a thread (API may vary)
                 try:
                     # discord.py ForumChannel has create_thread in some versions
-                    thread = await forum.create_thread(name=title, auto_archive_duration=10080, content=first_chunk)
+                    thread = await self.retry.call('forum', lambda: forum.create_thread(
+                        name=title, auto_archive_duration=10080, content=first_chunk), idempotent=False)
                 except Exception:
                     try:
                         thread = await forum.threads.create(name=title, auto_archive_duration=10080, message=first_chunk)
@@ -427,6 +775,8 @@ class VerificationManager:
                         # fallback: send as normal message
                         sent = await forum.send(first_chunk)
                         thread = None
+                # discord.py 2.x: create_thread renvoie un ThreadWithMessage (thread, message)
+                thread = getattr(thread, 'thread', thread)
                 if remaining:
                     if thread:
                         try:
@@ -446,6 +796,7 @@ class VerificationManager:
                                 pass
             except Exception as e:
                 self.logger.error(f'Erreur en créant le thread/forum post: {e}')
+                self._fail_session(member_id, f'publication: {e}')
                 return
 
             # forward to telegram
@@ -468,6 +819,7 @@ class VerificationManager:
 
         except Exception as e:
             self.logger.error(f'Erreur dans runVerificationForMember: {e}')
+            self._fail_session(member_id, str(e))
 
     async def handle_accept(self, guild, channel, moderator_user, target_id):
         try:
@@ -484,7 +836,7 @@ class VerificationManager:
 
             target = None
             try:
-                target = await guild.fetch_member(int(target_id))
+                target = await self.retry.call('members', lambda: guild.fetch_member(int(target_id)))
             except Exception:
                 try:
                     target = guild.get_member(int(target_id))
@@ -494,130 +846,74 @@ class VerificationManager:
                 await channel.send('Membre visé introuvable sur le serveur.')
                 return
 
-            # remove non-verified role
-            non_verified_role = os.getenv('NON_VERIFIED_ROLE')
-            if non_verified_role:
-                try:
-                    r = None
-                    if str(non_verified_role).isdigit():
-                        r = guild.get_role(int(non_verified_role))
-                    if not r:
-                        for rr in guild.roles:
-                            if rr.name == non_verified_role:
-                                r = rr
-                                break
-                    if r:
-                        await self.try_role_operation(lambda: target.remove_roles(r), f"retirer le rôle {r}", channel)
-                except Exception:
-                    pass
-
-            # add peluche role
-            peluche_role = os.getenv('PELUCHER_ROLE') or os.getenv('PELUCHES_ROLE') or os.getenv('PELUCHER')
-            if peluche_role:
-                try:
-                    r2 = None
-                    if str(peluche_role).isdigit():
-                        r2 = guild.get_role(int(peluche_role))
-                    if not r2:
-                        for rr in guild.roles:
-                            if rr.name == peluche_role:
-                                r2 = rr
-                                break
-                    if r2:
-                        await self.try_role_operation(lambda: target.add_roles(r2), f"ajouter le rôle {r2}", channel)
-                except Exception:
-                    pass
-
-            try:
-                try:
-                    await target.send(f"Félicitations — votre vérification a été acceptée sur {guild.name}. Vous avez reçu le rôle.")
-                except Exception:
-                    pass
-                await channel.send(f"✅ Vérification acceptée par <@{getattr(moderator_user, 'id', moderator_user)}> — rôle appliqué à <@{target.id}>.")
-            except Exception:
-                pass
+            # rôles à attribuer (réponses aux questions comprises); le plan est construit à l'application
+            grants = [self.roles.resolve(guild, 'pelucher')]
 
             # handle age/artiste prompts simplified
             try:
-                applied_roles = []
-                major_role = os.getenv('MAJOR_ROLE')
-                minor_role = os.getenv('MINOR_ROLE')
-                artist_role = os.getenv('ARTIST_ROLE') or os.getenv('ARTIST_ROLE_ID') or os.getenv('ARTIST_ROLE_TAG')
+                major_role = self.roles.configured('major')
+                minor_role = self.roles.configured('minor')
+                artist_role = self.roles.configured('artist')
                 moderator_id = getattr(moderator_user, 'id', moderator_user)
                 # ask in channel for majeur/mineur (simplified)
                 if major_role or minor_role:
                     await channel.send(f"<@{moderator_id}> Le membre est-il **majeur** ou **mineur** ? (majeur / mineur) — vous avez 5 minutes.")
-                    def check(m):
-                        return m.author.id == moderator_id and m.channel.id == channel.id
                     try:
-                        m = await self.client.wait_for('message', timeout=5*60, check=check)
+                        m = await self._wait_reply(moderator_id, channel.id, 5*60)
                         ans = m.content.strip().lower()
                         if ans.startswith('majeur') and major_role:
-                            # resolve role
-                            rr = None
-                            try:
-                                if str(major_role).isdigit():
-                                    rr = guild.get_role(int(major_role))
-                                else:
-                                    for r in guild.roles:
-                                        if r.name == major_role:
-                                            rr = r; break
-                            except Exception:
-                                rr = None
-                            if rr:
-                                await self.try_role_operation(lambda: target.add_roles(rr), f"ajouter le rôle {rr}", channel)
-                                applied_roles.append(rr.name if hasattr(rr, 'name') else str(rr))
+                            grants.append(self.roles.resolve(guild, 'major'))
                         elif ans.startswith('mineur') and minor_role:
-                            rr = None
-                            try:
-                                if str(minor_role).isdigit():
-                                    rr = guild.get_role(int(minor_role))
-                                else:
-                                    for r in guild.roles:
-                                        if r.name == minor_role:
-                                            rr = r; break
-                            except Exception:
-                                rr = None
-                            if rr:
-                                await self.try_role_operation(lambda: target.add_roles(rr), f"ajouter le rôle {rr}", channel)
-                                applied_roles.append(rr.name if hasattr(rr, 'name') else str(rr))
+                            grants.append(self.roles.resolve(guild, 'minor'))
                     except asyncio.TimeoutError:
                         await channel.send("Pas de réponse — rôle d'âge non attribué.")
 
                 # artist prompt
                 if artist_role:
                     await channel.send(f"<@{moderator_id}> Voulez-vous attribuer le rôle 'artiste' à <@{target.id}> ? (oui / non) — vous avez 5 minutes.")
-                    def check2(m):
-                        return m.author.id == moderator_id and m.channel.id == channel.id
                     try:
-                        m2 = await self.client.wait_for('message', timeout=5*60, check=check2)
+                        m2 = await self._wait_reply(moderator_id, channel.id, 5*60)
                         reply = m2.content.strip().lower()
                         if reply.startswith('oui'):
-                            rr = None
-                            try:
-                                if artist_role.startswith('<@&'):
-                                    aid = ''.join(ch for ch in artist_role if ch.isdigit())
-                                    rr = guild.get_role(int(aid))
-                                elif str(artist_role).isdigit():
-                                    rr = guild.get_role(int(artist_role))
-                                else:
-                                    for r in guild.roles:
-                                        if r.name == artist_role:
-                                            rr = r; break
-                            except Exception:
-                                rr = None
-                            if rr:
-                                await self.try_role_operation(lambda: target.add_roles(rr), f"ajouter le rôle {rr}", channel)
-                                applied_roles.append(rr.name if hasattr(rr, 'name') else str(rr))
-                                await channel.send(f"Rôle \"{rr.name}\" attribué à <@{target.id}>.")
+                            grants.append(self.roles.resolve(guild, 'artist'))
                     except asyncio.TimeoutError:
                         await channel.send("Pas de réponse — pas d'attribution du rôle 'artiste'.")
-
-                summary = ', '.join(applied_roles) if applied_roles else 'aucun rôle supplémentaire'
-                await channel.send(f"Vérification terminée — rôles appliqués pour <@{target.id}> : {summary}")
             except Exception as e:
                 self.logger.warn(f'Erreur lors du post-accept flow: {e}')
 
+            def build(plan):
+                plan.remove(self.roles.resolve(guild, 'non_verified'))
+                for role in grants:
+                    plan.add(role)
+                return plan
+
+            applied = []
+
+            async def apply():
+                applied[:] = await self._apply_role_plan(
+                    guild, target.id, build, reason=f'Vérification acceptée par {getattr(moderator_user, "id", moderator_user)}')
+
+            ok = await self.try_role_operation(apply, f"appliquer les rôles de {target.id}", channel)
+            applied_roles = [getattr(r, 'name', str(r)) for r in applied]
+            if not ok:
+                # rien n'a été appliqué: la vérification peut être relancée
+                try:
+                    self.verifications[str(target_id)] = {**(self.verifications.get(str(target_id)) or {}), 'status': 'failed'}
+                    self._save_store()
+                except Exception:
+                    pass
+                return
+
+            try:
+                try:
+                    await target.send(f"Félicitations — votre vérification a été acceptée sur {guild.name}. Vous avez reçu le rôle.")
+                except Exception:
+                    pass
+                summary = ', '.join(applied_roles) if applied_roles else 'aucun rôle supplémentaire'
+                await channel.send(f"✅ Vérification acceptée par <@{getattr(moderator_user, 'id', moderator_user)}> — rôles appliqués pour <@{target.id}> : {summary}")
+            except Exception:
+                pass
+
             # mark accepted
             try:
                 existing2 = self.store.get('verifications', {}).get(str(target_id), {})
@@ -651,7 +947,7 @@ class VerificationManager:
 
             target = None
             try:
-                target = await guild.fetch_member(int(target_id))
+                target = await self.retry.call('members', lambda: guild.fetch_member(int(target_id)))
             except Exception:
                 pass
             if not target:
@@ -659,10 +955,8 @@ class VerificationManager:
                 return
 
             await channel.send(f"<@{moderator_user.id}> Merci de fournir une justification du refus en répondant dans ce fil. Vous avez 30 minutes.")
-            def check(m):
-                return m.author.id == moderator_user.id and m.channel.id == channel.id
             try:
-                m = await self.client.wait_for('message', timeout=30*60, check=check)
+                m = await self._wait_reply(moderator_user.id, channel.id, 30*60)
                 justification = m.content
                 try:
                     await target.send(f"Votre vérification a été refusée sur {guild.name}. Raison donnée par l'équipe :\n\n{justification}")
@@ -690,7 +984,7 @@ class VerificationManager:
 
             target = None
             try:
-                target = await guild.fetch_member(int(target_id))
+                target = await self.retry.call('members', lambda: guild.fetch_member(int(target_id)))
             except Exception:
                 pass
             if not target:
@@ -698,39 +992,15 @@ class VerificationManager:
                 return
 
             await channel.send(f"<@{moderator_user.id}> Vous êtes sur le point d'annuler la vérification et de retirer TOUS les rôles de <@{target.id}>. Tapez la raison du refus dans les 30 minutes pour notifier le membre.")
-            def check(m):
-                return m.author.id == moderator_user.id and m.channel.id == channel.id
             try:
-                m = await self.client.wait_for('message', timeout=30*60, check=check)
+                m = await self._wait_reply(moderator_user.id, channel.id, 30*60)
                 justification = m.content or 'Aucune raison fournie'
-                # try to remove roles
-                try:
-                    await self.try_role_operation(lambda: target.edit(roles=[]), f"retirer tous les rôles à {target.id}", channel)
-                except Exception:
-                    try:
-                        # best-effort: remove roles one by one
-                        role_ids = [r.id for r in getattr(target, 'roles', []) if getattr(r, 'id', None) and r.id != guild.id]
-                        for rid in role_ids:
-                            robj = guild.get_role(rid)
-                            if robj:
-                                await self.try_role_operation(lambda rid=rid: target.remove_roles(robj), f"retirer le rôle {robj}", channel)
-                    except Exception:
-                        pass
-
-                non_verified_role = os.getenv('NON_VERIFIED_ROLE')
-                if non_verified_role:
-                    try:
-                        r = None
-                        if str(non_verified_role).isdigit():
-                            r = guild.get_role(int(non_verified_role))
-                        if not r:
-                            for rr in guild.roles:
-                                if rr.name == non_verified_role:
-                                    r = rr; break
-                        if r:
-                            await self.try_role_operation(lambda: target.add_roles(r), f"ajouter le rôle non-vérifié {r}", channel)
-                    except Exception:
-                        pass
+                # tous les rôles retirés et le rôle non-vérifié remis: un seul member.edit
+                await self.try_role_operation(
+                    lambda: self._apply_role_plan(guild, target.id,
+                                                  lambda plan: plan.clear().add(self.roles.resolve(guild, 'non_verified')),
+                                                  reason=f'Vérification annulée par {moderator_user.id}'),
+                    f"retirer tous les rôles à {target.id}", channel)
 
                 try:
                     await target.send(f"Votre vérification sur {guild.name} a été annulée par l'équipe de modération. Raison donnée :\n\n{justification}")
@@ -0,0 +1,204 @@
+"""Admission des vérifications: file persistante, concurrence bornée, lissage REST.
+
+Une vague d'arrivées (raid, lien d'invitation) ne lance plus un pipeline
+complet par membre en parallèle:
+
+- `VerificationScheduler.admit` place le membre dans une file à priorité
+  (reprises > bouton `request_verif` > arrivées, FIFO à priorité égale). La
+  file est persistée dans le store (statut `queued`) et restaurée au démarrage.
+- au plus `VERIFICATION_CONCURRENCY` pipelines sont en phase REST (rôles, DM,
+  post forum) en même temps; une session qui attend la réponse du membre
+  libère sa place (`idle()`) et la reprend ensuite.
+- les appels REST passent par `discord_retry` (budget partagé par route,
+  `VERIFICATION_ROUTE_RATES`).
+
+`stats()` expose la profondeur de file et les temps d'attente (affichés par /stats).
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+
+PRIORITY_RESUME = 0
+PRIORITY_REQUEST = 1
+PRIORITY_JOIN = 2
+
+
+class VerificationScheduler:
+    """File d'admission des vérifications et limite de pipelines en phase REST."""
+
+    def __init__(self, manager, concurrency: int = None):
+        self.manager = manager
+        self.concurrency = max(1, int(concurrency or os.getenv('VERIFICATION_CONCURRENCY', '4')))
+        self._heap = []
+        self._queued = {}
+        self._members = {}
+        self._seq = itertools.count()
+        self._sem = None
+        self._wakeup = None
+        self._task = None
+        self._holders = set()
+        self._tasks = set()
+        self.admitted = 0
+        self.started = 0
+        self.avg_wait = 0.0
+        self.max_wait = 0.0
+
+    # --- file -----------------------------------------------------------
+
+    def admit(self, member, priority: int = PRIORITY_JOIN) -> int:
+        """Met `member` en file (persistée); retourne sa position, 0 s'il est déjà en cours."""
+        mid = str(getattr(member, 'id', member))
+        if mid in self.manager._active_sessions:
+            return 0
+        self._members[mid] = member
+        if mid not in self._queued:
+            guild_id = getattr(getattr(member, 'guild', None), 'id', None)
+            queued_at = int(time.time() * 1000)
+            if priority != PRIORITY_RESUME:
+                try:
+                    existing = self.manager.verifications.get(mid) or {}
+                    self.manager.verifications[mid] = {**existing, 'status': 'queued', 'queuedAt': queued_at,
+                                                       'queuePriority': priority, 'guildId': guild_id}
+                    self.manager._save_store()
+                except Exception:
+                    pass
+            self._push(mid, priority, queued_at, guild_id)
+        return self.position(mid)
+
+    def _push(self, mid, priority, queued_at, guild_id):
+        entry = (priority, queued_at, next(self._seq), mid, guild_id)
+        self._queued[mid] = entry
+        heapq.heappush(self._heap, entry)
+        self.admitted += 1
+        self._ensure_running()
+
+    def position(self, mid) -> int:
+        entry = self._queued.get(str(mid))
+        if entry is None:
+            return 0
+        return 1 + sum(1 for e in self._queued.values() if e < entry)
+
+    def restore(self) -> int:
+        """Recharge la file persistée (`queued`) et les sessions interrompues (`in_progress`)."""
+        restored = 0
+        for status in ('in_progress', 'queued'):
+            for mid in self.manager.verifications.with_status(status):
+                if mid in self._queued or mid in self.manager._active_sessions:
+                    continue
+                try:
+                    record = self.manager.verifications[mid]
+                except KeyError:
+                    continue
+                if status == 'in_progress':
+                    guild_id = (record.get('session') or {}).get('guildId')
+                    priority, queued_at = PRIORITY_RESUME, int(time.time() * 1000)
+                else:
+                    guild_id = record.get('guildId')
+                    priority = int(record.get('queuePriority', PRIORITY_JOIN))
+                    queued_at = int(record.get('queuedAt') or time.time() * 1000)
+                self._push(mid, priority, queued_at, guild_id)
+                restored += 1
+        return restored
+
+    # --- exécution ------------------------------------------------------
+
+    def _ensure_running(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._sem = asyncio.Semaphore(self.concurrency)
+            self._wakeup = asyncio.Event()
+            self._holders.clear()
+            self._task = loop.create_task(self._dispatch())
+        self._wakeup.set()
+
+    async def _dispatch(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._sem.acquire()
+            if not self._heap:
+                self._sem.release()
+                continue
+            entry = heapq.heappop(self._heap)
+            self._queued.pop(entry[3], None)
+            # réservé dès maintenant: une nouvelle admission du même membre est ignorée
+            self.manager._active_sessions.add(entry[3])
+            task = asyncio.get_running_loop().create_task(self._run(entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _member(self, mid, guild_id):
+        member = self._members.pop(mid, None)
+        if member is not None:
+            return member
+        guild = self.manager.client.get_guild(int(guild_id or 0))
+        if guild is None:
+            return None
+        member = guild.get_member(int(mid))
+        if member is None:
+            try:
+                member = await self.manager.retry.call('members', lambda: guild.fetch_member(int(mid)))
+            except Exception:
+                member = None
+        return member
+
+    async def _run(self, entry):
+        _, queued_at, _, mid, guild_id = entry
+        task = asyncio.current_task()
+        self._holders.add(task)
+        try:
+            waited = max(0.0, time.time() - queued_at / 1000)
+            self.started += 1
+            self.avg_wait = waited if self.started == 1 else 0.8 * self.avg_wait + 0.2 * waited
+            self.max_wait = max(self.max_wait, waited)
+            member = await self._member(mid, guild_id)
+            if member is None:
+                self.manager.verifications[mid] = {**(self.manager.verifications.get(mid) or {}), 'status': 'abandoned'}
+                self.manager._save_store()
+                return
+            record = self.manager.verifications.get(mid) or {}
+            session = record.get('session') if record.get('status') == 'in_progress' else None
+            await self.manager.run_verification_for_member(member, session=session)
+        except Exception as e:
+            self.manager.logger.error(f'Erreur pipeline de vérification {mid}: {e}')
+        finally:
+            self.manager._active_sessions.discard(mid)
+            if task in self._holders:
+                self._holders.discard(task)
+                self._sem.release()
+
+    @asynccontextmanager
+    async def idle(self):
+        """Libère la place du pipeline courant pendant une attente (réponse du membre)."""
+        task = asyncio.current_task()
+        if task not in self._holders:
+            yield
+            return
+        self._holders.discard(task)
+        self._sem.release()
+        try:
+            yield
+        finally:
+            await self._sem.acquire()
+            self._holders.add(task)
+
+    def stats(self) -> dict:
+        now = time.time()
+        oldest = min((e[1] for e in self._queued.values()), default=None)
+        return {
+            'depth': len(self._queued), 'running': len(self._holders), 'open': len(self._tasks),
+            'concurrency': self.concurrency, 'admitted': self.admitted, 'started': self.started,
+            'oldest_wait_sec': round(now - oldest / 1000, 1) if oldest else 0.0,
+            'avg_wait_sec': round(self.avg_wait, 1), 'max_wait_sec': round(self.max_wait, 1),
+        }
+
+
+__all__ = ['VerificationScheduler', 'PRIORITY_RESUME', 'PRIORITY_REQUEST', 'PRIORITY_JOIN']
@@ -0,0 +1,262 @@
+"""Stockage des vérifications dans SQLite (mode WAL).
+
+Remplace la réécriture complète de `data/verifications.json` (indentée, non
+atomique) à chaque changement d'état: chaque mise à jour n'écrit plus qu'une
+ligne. Colonnes indexées: `member_id` (clé), `thread_id`, `status`,
+`created_at`; l'enregistrement complet reste un objet JSON (`data`), avec les
+mêmes clés qu'avant (`threadId`, `status`, `createdAt`...).
+
+`VerificationsMapping` expose la table comme un dict
+(`store['verifications'][member_id] = {...}`) pour le code existant, et
+`migrate_json` importe une fois l'ancien fichier JSON.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from pathlib import Path
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS verifications (
+    member_id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    status TEXT,
+    created_at INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_verif_thread ON verifications(thread_id);
+CREATE INDEX IF NOT EXISTS idx_verif_status ON verifications(status);
+CREATE INDEX IF NOT EXISTS idx_verif_created ON verifications(created_at);
+'''
+
+
+def _columns(member_id, record: dict):
+    thread_id = record.get('threadId')
+    created_at = record.get('createdAt')
+    try:
+        created_at = int(created_at) if created_at is not None else None
+    except (TypeError, ValueError):
+        created_at = None
+    return (str(member_id), str(thread_id) if thread_id is not None else None, record.get('status'),
+            created_at, json.dumps(record, ensure_ascii=False))
+
+
+class VerificationStore:
+    """Table `verifications` d'une base SQLite; sûr entre threads (un verrou, une connexion)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # autocommit: chaque écriture isolée est sa propre transaction
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        # NORMAL en WAL: durable au checkpoint, pas de fsync par transaction
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+
+    def get(self, member_id):
+        with self._lock:
+            row = self._db.execute('SELECT data FROM verifications WHERE member_id = ?',
+                                   (str(member_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, member_id, record: dict):
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO verifications (member_id, thread_id, status, created_at, data) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(member_id) DO UPDATE SET thread_id = excluded.thread_id, status = excluded.status, '
+                'created_at = excluded.created_at, data = excluded.data',
+                _columns(member_id, record))
+
+    def update(self, member_id, **fields) -> dict:
+        """Fusionne `fields` dans l'enregistrement (créé s'il n'existe pas) et le retourne."""
+        with self._lock:
+            row = self._db.execute('SELECT data FROM verifications WHERE member_id = ?',
+                                   (str(member_id),)).fetchone()
+        record = {**(json.loads(row[0]) if row else {}), **fields}
+        self.put(member_id, record)
+        return record
+
+    def delete(self, member_id) -> bool:
+        with self._lock:
+            cur = self._db.execute('DELETE FROM verifications WHERE member_id = ?', (str(member_id),))
+        return cur.rowcount > 0
+
+    def put_many(self, records):
+        """Insère `(member_id, record)` en une seule transaction."""
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO verifications (member_id, thread_id, status, created_at, data) '
+                    'VALUES (?, ?, ?, ?, ?)', (_columns(mid, rec) for mid, rec in records))
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def by_thread(self, thread_id):
+        """member_id de la vérification liée au fil `thread_id`, ou None."""
+        with self._lock:
+            row = self._db.execute('SELECT member_id FROM verifications WHERE thread_id = ? LIMIT 1',
+                                   (str(thread_id),)).fetchone()
+        return row[0] if row else None
+
+    def by_status(self, status):
+        with self._lock:
+            rows = self._db.execute('SELECT member_id, data FROM verifications WHERE status = ? ORDER BY created_at',
+                                    (status,)).fetchall()
+        return [(mid, json.loads(data)) for mid, data in rows]
+
+    def keys(self):
+        with self._lock:
+            return [r[0] for r in self._db.execute('SELECT member_id FROM verifications')]
+
+    def items(self):
+        with self._lock:
+            rows = self._db.execute('SELECT member_id, data FROM verifications').fetchall()
+        return [(mid, json.loads(data)) for mid, data in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM verifications').fetchone()[0]
+
+    def migrate_json(self, json_path) -> int:
+        """Importe une fois l'ancien `verifications.json` (renommé en `.migrated`).
+
+        Ne fait rien si la table contient déjà des lignes ou si le fichier
+        n'existe pas. Retourne le nombre d'enregistrements importés.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists() or self.count():
+            return 0
+        try:
+            data = json.loads(json_path.read_text(encoding='utf8') or '{}')
+        except ValueError:
+            return 0
+        records = [(mid, rec) for mid, rec in (data.get('verifications') or {}).items() if isinstance(rec, dict)]
+        self.put_many(records)
+        os.replace(json_path, json_path.with_name(json_path.name + '.migrated'))
+        return len(records)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class VerificationsMapping(MutableMapping):
+    """Vue dict de la table: lecture/écriture d'un enregistrement = une requête.
+
+    Les dicts retournés sont des copies: il faut réaffecter la clé
+    (`m[mid] = {**m.get(mid, {}), ...}`), comme le faisait déjà le code.
+    """
+
+    def __init__(self, store: VerificationStore):
+        self.db = store
+
+    def __getitem__(self, member_id):
+        record = self.db.get(member_id)
+        if record is None:
+            raise KeyError(member_id)
+        return record
+
+    def __setitem__(self, member_id, record):
+        self.db.put(member_id, dict(record))
+
+    def __delitem__(self, member_id):
+        if not self.db.delete(member_id):
+            raise KeyError(member_id)
+
+    def __iter__(self):
+        return iter(self.db.keys())
+
+    def __len__(self):
+        return self.db.count()
+
+    def items(self):
+        # une seule requête plutôt qu'un get() par clé
+        return self.db.items()
+
+
+class IndexedVerifications(MutableMapping):
+    """Enveloppe d'un mapping de vérifications avec index secondaires en mémoire.
+
+    - `threadId` -> member_id (`member_for_thread`)
+    - `status` -> ensemble de member_id (`with_status`; None = sans statut)
+    - `pending`: vérifications en attente de validation (`awaitingValidation`)
+
+    Les index sont reconstruits au chargement puis mis à jour à chaque
+    affectation/suppression: toute mutation doit passer par cette enveloppe.
+    """
+
+    def __init__(self, backing):
+        self.backing = backing
+        # member_id -> (threadId, status) indexés, pour désindexer sans relire le store
+        self._entries = {}
+        self._by_thread = {}
+        self._by_status = {}
+        self.pending = set()
+        for member_id, record in backing.items():
+            self._index(str(member_id), record)
+
+    def _index(self, member_id, record):
+        thread_id = record.get('threadId')
+        thread_id = str(thread_id) if thread_id is not None else None
+        status = record.get('status')
+        self._entries[member_id] = (thread_id, status)
+        if thread_id is not None:
+            self._by_thread[thread_id] = member_id
+        self._by_status.setdefault(status, set()).add(member_id)
+        if record.get('awaitingValidation'):
+            self.pending.add(member_id)
+
+    def _unindex(self, member_id):
+        entry = self._entries.pop(member_id, None)
+        if entry is None:
+            return
+        thread_id, status = entry
+        if thread_id is not None and self._by_thread.get(thread_id) == member_id:
+            del self._by_thread[thread_id]
+        members = self._by_status.get(status)
+        if members is not None:
+            members.discard(member_id)
+            if not members:
+                del self._by_status[status]
+        self.pending.discard(member_id)
+
+    def __getitem__(self, member_id):
+        return self.backing[str(member_id)]
+
+    def __setitem__(self, member_id, record):
+        member_id = str(member_id)
+        self.backing[member_id] = record
+        self._unindex(member_id)
+        self._index(member_id, record)
+
+    def __delitem__(self, member_id):
+        member_id = str(member_id)
+        del self.backing[member_id]
+        self._unindex(member_id)
+
+    def __iter__(self):
+        return iter(self.backing)
+
+    def __len__(self):
+        return len(self.backing)
+
+    def items(self):
+        return self.backing.items()
+
+    def member_for_thread(self, thread_id):
+        return self._by_thread.get(str(thread_id))
+
+    def with_status(self, status) -> frozenset:
+        return frozenset(self._by_status.get(status, ()))
+
+    def is_thread(self, thread_id) -> bool:
+        return str(thread_id) in self._by_thread
+
+
+__all__ = ['VerificationStore', 'VerificationsMapping', 'IndexedVerifications']